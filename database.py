@@ -2,7 +2,7 @@
 """
 Shared database models and configuration for all bots.
 """
-from sqlalchemy import create_engine, Column, Integer, String, Boolean, JSON, BigInteger, TIMESTAMP, ForeignKey, text
+from sqlalchemy import create_engine, Column, Integer, String, Boolean, JSON, BigInteger, Float, TIMESTAMP, ForeignKey, LargeBinary, text
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
@@ -38,6 +38,7 @@ class Managers(Base):
     access_token_recieved = Column(Boolean, default=False, nullable=False)
     access_token = Column(String)
     access_token_expires_at = Column(BigInteger)
+    refresh_token = Column(String)
     hh_data = Column(JSONB)
     vacancy_selected = Column(Boolean, default=False, nullable=False)
     messages_with_keyboards = Column(JSONB, default=list)
@@ -79,6 +80,8 @@ class Negotiations(Base):
     applicant_email = Column(String)
     resume_ai_analysis = Column(JSONB)
     resume_sorting_status = Column(String, default="new")
+    employer_state = Column(String, default="response")
+    employer_state_transition_status = Column(String)
     link_to_tg_bot_sent = Column(Boolean, default=False, nullable=False)
     video_received = Column(Boolean, default=False, nullable=False)
     video_path = Column(String)
@@ -89,6 +92,116 @@ class Negotiations(Base):
     updated_at = Column(TIMESTAMP(timezone=True), default=func.now(), onupdate=func.now())
 
 
+class NegotiationMessages(Base):
+    """Outbox of messages to applicants in HH.ru negotiations.
+    'id' is '<negotiation_id>:<template>', so the same message is never recorded (and sent) twice."""
+    __tablename__ = "negotiation_messages"
+
+    id = Column(String, primary_key=True)
+    negotiation_id = Column(String, nullable=False)
+    manager_id = Column(String, ForeignKey("managers.id"), nullable=False)
+    template = Column(String, nullable=False)
+    message_text = Column(String, nullable=False)
+    status = Column(String, default="pending", nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(String)
+    sent_at = Column(TIMESTAMP(timezone=True))
+    created_at = Column(TIMESTAMP(timezone=True), default=func.now())
+    updated_at = Column(TIMESTAMP(timezone=True), default=func.now(), onupdate=func.now())
+
+
+class AIAnalysisCacheEntries(Base):
+    """Content-addressed cache of AI resume analyses.
+    'id' is sha256 of normalized inputs (vacancy description, sourcing criterias, resume, prompt, model),
+    so the same inputs are never analyzed twice."""
+    __tablename__ = "ai_analysis_cache"
+
+    id = Column(String, primary_key=True)
+    criteria_hash = Column(String, nullable=False, index=True)
+    prompt_hash = Column(String, nullable=False, index=True)
+    model = Column(String, nullable=False)
+    vacancy_id = Column(String)
+    analysis = Column(JSONB, nullable=False)
+    created_at = Column(TIMESTAMP(timezone=True), default=func.now())
+    updated_at = Column(TIMESTAMP(timezone=True), default=func.now(), onupdate=func.now())
+
+
+class SourcingCriteriasCacheEntries(Base):
+    """Cache of sourcing criterias generated by AI from vacancy description.
+    'id' is sha256 of normalized vacancy description, prompt and model, so re-posted or cloned vacancies
+    with the same text (of any manager) reuse the criterias."""
+    __tablename__ = "sourcing_criterias_cache"
+
+    id = Column(String, primary_key=True)
+    description_hash = Column(String, nullable=False, index=True)
+    prompt_hash = Column(String, nullable=False, index=True)
+    model = Column(String, nullable=False)
+    vacancy_id = Column(String)
+    sourcing_criterias = Column(JSONB, nullable=False)
+    created_at = Column(TIMESTAMP(timezone=True), default=func.now())
+    updated_at = Column(TIMESTAMP(timezone=True), default=func.now(), onupdate=func.now())
+
+
+class TextEmbeddings(Base):
+    """Embeddings of vacancy and resume texts, so each text is embedded once per embedder.
+    'id' is '<embedder_name>:<sha256 of text>', 'vector' is float32 array bytes."""
+    __tablename__ = "text_embeddings"
+
+    id = Column(String, primary_key=True)
+    embedder = Column(String, nullable=False)
+    dimensions = Column(Integer, nullable=False)
+    vector = Column(LargeBinary, nullable=False)
+    created_at = Column(TIMESTAMP(timezone=True), default=func.now())
+
+
+class AIUsageLedger(Base):
+    """One record per OpenAI chat completion (interactive or batch request): tokens, latency, retries and outcome.
+    'prompt_hash' identifies the prompt version, so usage before and after prompt changes can be compared."""
+    __tablename__ = "ai_usage_ledger"
+
+    id = Column(String, primary_key=True)
+    operation = Column(String, nullable=False)
+    model = Column(String, nullable=False)
+    vacancy_id = Column(String, index=True)
+    negotiation_ids = Column(JSONB, default=list)
+    prompt_hash = Column(String, index=True)
+    prompt_tokens = Column(Integer, default=0, nullable=False)
+    completion_tokens = Column(Integer, default=0, nullable=False)
+    cached_tokens = Column(Integer, default=0, nullable=False)
+    cost_usd = Column(Float, default=0, nullable=False)
+    duration_secs = Column(Float)
+    retries = Column(Integer, default=0, nullable=False)
+    outcome = Column(String, nullable=False)
+    error = Column(String)
+    created_at = Column(TIMESTAMP(timezone=True), default=func.now(), index=True)
+
+
+class QueuedTasks(Base):
+    """Tasks of durable task queues (TASK_QUEUE_BACKEND="postgres"), so queued work survives restarts.
+    Task is stored as callable name ('module:qualname') and JSON arguments. Worker claims it with
+    'FOR UPDATE SKIP LOCKED' and holds a lease ('locked_until') which it extends while the task runs;
+    task with expired lease (worker crashed) is claimed again by any worker."""
+    __tablename__ = "tasks"
+
+    id = Column(String, primary_key=True)
+    queue_name = Column(String, nullable=False, index=True)
+    lane = Column(String, nullable=False, index=True)
+    task_key = Column(String, index=True)
+    # Tasks with the same ordering key run one at a time in order of 'created_at' (see TaskQueue 'key_fn')
+    ordering_key = Column(String, index=True)
+    func_name = Column(String, nullable=False)
+    args = Column(JSONB, default=list, nullable=False)
+    kwargs = Column(JSONB, default=dict, nullable=False)
+    status = Column(String, nullable=False, index=True)
+    attempt = Column(Integer, default=0, nullable=False)
+    run_after = Column(TIMESTAMP(timezone=True), nullable=False, index=True)
+    locked_by = Column(String)
+    locked_until = Column(TIMESTAMP(timezone=True))
+    last_error = Column(String)
+    created_at = Column(TIMESTAMP(timezone=True), default=func.now())
+    updated_at = Column(TIMESTAMP(timezone=True), default=func.now(), onupdate=func.now())
+
+
 def init_db():
     """
     Создаёт таблицы, если их ещё нет.
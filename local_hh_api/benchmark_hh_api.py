@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Measures throughput of HH-facing code of 'hh_service' against HH.ru API stub (or any HH_API_BASE_URL).
+- streams negotiations collection of the vacancy page by page
+- downloads resumes of all negotiations concurrently
+
+Usage:
+    python3 local_hh_api/hh_api_stub_server.py --negotiations 500 --latency-ms 100 &
+    HH_API_BASE_URL=http://127.0.0.1:8081 python3 local_hh_api/benchmark_hh_api.py --vacancy-id 128088543 --concurrency 5
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Add the project root to the path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from shared_services.hh_service import (
+    HH_API_BASE_URL,
+    get_resume_info,
+    stream_negotiations_collection_items,
+)
+from shared_services.metrics_service import metrics_registry
+
+
+async def benchmark(access_token: str, vacancy_id: str, concurrency: int) -> None:
+    print(f"🔍 Benchmarking {HH_API_BASE_URL} for vacancy {vacancy_id} (concurrency: {concurrency})")
+
+    # ----- NEGOTIATIONS COLLECTION -----
+
+    started_at = time.monotonic()
+    first_chunk_after_secs = None
+    resume_ids = []
+    async for items_chunk in stream_negotiations_collection_items(access_token=access_token, vacancy_id=vacancy_id):
+        if first_chunk_after_secs is None:
+            first_chunk_after_secs = time.monotonic() - started_at
+        resume_ids.extend(item["resume"]["id"] for item in items_chunk)
+    negotiations_secs = time.monotonic() - started_at
+    print(
+        f"✅ Negotiations: {len(resume_ids)} items in {negotiations_secs:.2f}s "
+        f"({len(resume_ids) / max(negotiations_secs, 1e-9):.1f} items/s, first chunk after {first_chunk_after_secs or 0:.2f}s)"
+    )
+
+    # ----- RESUMES -----
+
+    semaphore = asyncio.Semaphore(concurrency)
+    failed_count = 0
+
+    async def fetch_resume(resume_id: str) -> None:
+        nonlocal failed_count
+        async with semaphore:
+            resume = await asyncio.to_thread(get_resume_info, access_token=access_token, resume_id=resume_id)
+        if resume is None:
+            failed_count += 1
+
+    started_at = time.monotonic()
+    await asyncio.gather(*(fetch_resume(resume_id) for resume_id in resume_ids))
+    resumes_secs = time.monotonic() - started_at
+    print(
+        f"✅ Resumes: {len(resume_ids)} in {resumes_secs:.2f}s "
+        f"({len(resume_ids) / max(resumes_secs, 1e-9):.1f} resumes/s, failed: {failed_count})"
+    )
+
+    # ----- PER-ENDPOINT METRICS -----
+
+    print(f"📊 HH.ru metrics:\n{metrics_registry.format_summary(name_prefix='hh_')}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of HH-facing code against HH.ru API stub")
+    parser.add_argument("--vacancy-id", default="128088543")
+    parser.add_argument("--access-token", default="stub_token")
+    parser.add_argument("--concurrency", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(benchmark(access_token=args.access_token, vacancy_id=args.vacancy_id, concurrency=args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for HH.ru API for load testing of HH-facing code.
+Serves fixtures generated from test_data/ with configurable latency, error rate and number of pages.
+
+Usage:
+    python3 local_hh_api/hh_api_stub_server.py --port 8081 --negotiations 500 --latency-ms 150 --error-rate 0.02
+
+Then point the bots to it:
+    export HH_API_BASE_URL=http://localhost:8081
+
+Requires 'aiohttp' (pip install aiohttp).
+"""
+
+import argparse
+import asyncio
+import copy
+import json
+import logging
+import random
+import sys
+import time
+import uuid
+from pathlib import Path
+
+from aiohttp import web
+
+# Add the project root to the path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+TEST_DATA_DIR = project_root / "test_data"
+
+logger = logging.getLogger("hh_api_stub_server")
+
+
+# ------------------------------ FIXTURES ------------------------------
+
+def _load_json(file_name: str) -> dict:
+    with open(TEST_DATA_DIR / file_name, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class HHFixtures:
+    """In-memory fixtures generated from test_data/ files.
+    Each vacancy gets `negotiations_count` negotiations in "response" collection,
+    each negotiation points to a resume built from one of fake_resume_*.json templates."""
+
+    def __init__(self, negotiations_count: int, seed: int):
+        self._random = random.Random(seed)
+        self.vacancies = _load_json("fake_vacancies.json")
+        self.vacancy_description_template = _load_json("fake_vacancy_description.json")
+        self.resume_templates = [
+            _load_json(path.name) for path in sorted(TEST_DATA_DIR.glob("fake_resume_*.json"))
+        ]
+        if not self.resume_templates:
+            raise FileNotFoundError(f"No fake_resume_*.json files found in {TEST_DATA_DIR}")
+
+        self.employer_id = self.vacancies["items"][0]["employer"]["id"]
+        # {vacancy_id: {collection: [negotiation_item, ...]}}
+        self.negotiations = {}
+        # {negotiation_id: [message, ...]}
+        self.messages = {}
+        # {resume_id: template_index}
+        self.resumes = {}
+
+        for vacancy in self.vacancies["items"]:
+            vacancy_id = str(vacancy["id"])
+            response_items = []
+            for index in range(negotiations_count):
+                negotiation_id = f"{vacancy_id}{index:07d}"
+                resume_id = f"stub{vacancy_id}{index:07d}"
+                self.resumes[resume_id] = self._random.randrange(len(self.resume_templates))
+                response_items.append(self._build_negotiation_item(negotiation_id, resume_id, vacancy))
+                self.messages[negotiation_id] = []
+            self.negotiations[vacancy_id] = {"response": response_items, "consider": []}
+
+        logger.info(f"Fixtures generated: {len(self.vacancies['items'])} vacancies, {len(self.resumes)} resumes")
+
+
+    def _build_negotiation_item(self, negotiation_id: str, resume_id: str, vacancy: dict) -> dict:
+        return {
+            "id": negotiation_id,
+            "state": {"id": "response", "name": "Отклик"},
+            "created_at": "2024-01-20T10:00:00+0300",
+            "updated_at": "2024-01-20T10:00:00+0300",
+            "has_updates": True,
+            "messages_url": f"/negotiations/{negotiation_id}/messages",
+            "resume": {
+                "id": resume_id,
+                "title": "Юрист",
+                "url": f"/resumes/{resume_id}",
+            },
+            "vacancy": {"id": str(vacancy["id"]), "name": vacancy["name"]},
+        }
+
+
+    def build_resume(self, resume_id: str) -> dict:
+        resume = copy.deepcopy(self.resume_templates[self.resumes[resume_id]])
+        resume["id"] = resume_id
+        return resume
+
+
+    def build_vacancy_description(self, vacancy_id: str) -> dict:
+        description = copy.deepcopy(self.vacancy_description_template)
+        description["id"] = vacancy_id
+        return description
+
+
+    def find_negotiation(self, negotiation_id: str):
+        """Returns (vacancy_id, collection, item) or (None, None, None)."""
+        for vacancy_id, collections in self.negotiations.items():
+            for collection, items in collections.items():
+                for item in items:
+                    if item["id"] == negotiation_id:
+                        return vacancy_id, collection, item
+        return None, None, None
+
+
+# ------------------------------ MIDDLEWARE ------------------------------
+
+def build_fault_injection_middleware(latency_ms: float, latency_jitter_ms: float, error_rate: float, seed: int):
+    """Adds latency to every request and answers with 503 for `error_rate` share of requests."""
+    rnd = random.Random(seed)
+
+    @web.middleware
+    async def fault_injection_middleware(request: web.Request, handler):
+        started_at = time.monotonic()
+        delay_ms = max(0.0, latency_ms + rnd.uniform(-latency_jitter_ms, latency_jitter_ms))
+        await asyncio.sleep(delay_ms / 1000)
+        if rnd.random() < error_rate:
+            response = web.json_response(
+                {"errors": [{"type": "service_unavailable"}], "description": "Injected error"},
+                status=503,
+            )
+        else:
+            response = await handler(request)
+        logger.debug(f"{request.method} {request.path_qs} -> {response.status} in {(time.monotonic() - started_at) * 1000:.0f}ms")
+        return response
+
+    return fault_injection_middleware
+
+
+@web.middleware
+async def authorization_middleware(request: web.Request, handler):
+    """HH.ru answers 403 without bearer token, the stub does the same (token endpoint does not require it)."""
+    if request.path != "/token" and not request.headers.get("Authorization", "").startswith("Bearer "):
+        return web.json_response({"errors": [{"type": "oauth", "value": "token_not_provided"}]}, status=403)
+    return await handler(request)
+
+
+# ------------------------------ HANDLERS ------------------------------
+
+def build_routes(fixtures: HHFixtures, max_per_page: int) -> web.RouteTableDef:
+    routes = web.RouteTableDef()
+
+    @routes.get("/me")
+    async def get_me(request: web.Request):
+        return web.json_response({
+            "auth_type": "employer",
+            "id": "stub_manager",
+            "email": "manager@example.com",
+            "first_name": "Иван",
+            "middle_name": None,
+            "last_name": "Иванов",
+            "manager": {"id": "stub_manager"},
+            "employer": {"id": fixtures.employer_id, "name": "Test Company"},
+            "phone": "79990000000",
+        })
+
+    @routes.post("/token")
+    async def refresh_token(request: web.Request):
+        form = await request.post()
+        if form.get("grant_type") != "refresh_token" or not form.get("refresh_token"):
+            return web.json_response({"error": "invalid_request"}, status=400)
+        token_suffix = uuid.uuid4().hex
+        return web.json_response({
+            "access_token": f"stub_access_{token_suffix}",
+            "token_type": "bearer",
+            "expires_in": 1209600,
+            "refresh_token": f"stub_refresh_{token_suffix}",
+        })
+
+    @routes.get("/employers/{employer_id}/vacancies/active")
+    async def get_employer_vacancies(request: web.Request):
+        return web.json_response(fixtures.vacancies)
+
+    @routes.get("/vacancies/{vacancy_id}")
+    async def get_vacancy(request: web.Request):
+        vacancy_id = request.match_info["vacancy_id"]
+        if vacancy_id not in fixtures.negotiations:
+            return web.json_response({"errors": [{"type": "not_found"}]}, status=404)
+        return web.json_response(fixtures.build_vacancy_description(vacancy_id))
+
+    @routes.get("/negotiations")
+    @routes.get("/negotiations/")
+    async def get_negotiations(request: web.Request):
+        vacancy_id = request.query.get("vacancy_id", "")
+        collections = fixtures.negotiations.get(vacancy_id, {})
+        return web.json_response({
+            "collections": [
+                {"id": collection, "name": collection, "counters": {"total": len(items)}}
+                for collection, items in collections.items()
+            ],
+        })
+
+    @routes.get("/negotiations/{collection}")
+    async def get_negotiations_collection(request: web.Request):
+        collection = request.match_info["collection"]
+        vacancy_id = request.query.get("vacancy_id", "")
+        per_page = min(int(request.query.get("per_page", 20)), max_per_page)
+        page = int(request.query.get("page", 0))
+        items = fixtures.negotiations.get(vacancy_id, {}).get(collection)
+        if items is None:
+            return web.json_response({"errors": [{"type": "not_found"}]}, status=404)
+        pages = max(1, (len(items) + per_page - 1) // per_page)
+        return web.json_response({
+            "items": items[page * per_page:(page + 1) * per_page],
+            "found": len(items),
+            "pages": pages,
+            "per_page": per_page,
+            "page": page,
+        })
+
+    @routes.put("/negotiations/{collection}/{negotiation_id}")
+    async def change_negotiation_collection(request: web.Request):
+        target_collection = request.match_info["collection"]
+        negotiation_id = request.match_info["negotiation_id"]
+        vacancy_id, current_collection, item = fixtures.find_negotiation(negotiation_id)
+        if item is None:
+            return web.json_response({"errors": [{"type": "not_found"}]}, status=404)
+        if current_collection != target_collection:
+            fixtures.negotiations[vacancy_id][current_collection].remove(item)
+            fixtures.negotiations[vacancy_id].setdefault(target_collection, []).append(item)
+            item["state"] = {"id": target_collection, "name": target_collection}
+        return web.Response(status=204)
+
+    @routes.get("/negotiations/{negotiation_id}/messages")
+    async def get_negotiation_messages(request: web.Request):
+        negotiation_id = request.match_info["negotiation_id"]
+        if negotiation_id not in fixtures.messages:
+            return web.json_response({"errors": [{"type": "not_found"}]}, status=404)
+        messages = fixtures.messages[negotiation_id]
+        return web.json_response({"items": messages, "found": len(messages), "pages": 1, "per_page": 20, "page": 0})
+
+    @routes.post("/negotiations/{negotiation_id}/messages")
+    async def send_negotiation_message(request: web.Request):
+        negotiation_id = request.match_info["negotiation_id"]
+        if negotiation_id not in fixtures.messages:
+            return web.json_response({"errors": [{"type": "not_found"}]}, status=404)
+        message_text = request.query.get("message", "")
+        fixtures.messages[negotiation_id].append({
+            "id": str(len(fixtures.messages[negotiation_id]) + 1),
+            "text": message_text,
+            "author": {"participant_type": "employer"},
+        })
+        return web.Response(status=201)
+
+    @routes.get("/resumes/{resume_id}")
+    async def get_resume(request: web.Request):
+        resume_id = request.match_info["resume_id"]
+        if resume_id not in fixtures.resumes:
+            return web.json_response({"errors": [{"type": "not_found"}]}, status=404)
+        return web.json_response(fixtures.build_resume(resume_id))
+
+    @routes.get("/resumes/{resume_id}/negotiations_history")
+    async def get_resume_negotiations_history(request: web.Request):
+        resume_id = request.match_info["resume_id"]
+        if resume_id not in fixtures.resumes:
+            return web.json_response({"errors": [{"type": "not_found"}]}, status=404)
+        return web.json_response({"items": [], "found": 0, "pages": 1, "per_page": 20, "page": 0})
+
+    @routes.get("/dictionaries")
+    async def get_dictionaries(request: web.Request):
+        with open(project_root / "manager_bot" / "docs" / "hh_dictionaries.json", "r", encoding="utf-8") as f:
+            return web.json_response(json.load(f))
+
+    return routes
+
+
+def create_app(
+    negotiations_count: int = 200,
+    max_per_page: int = 100,
+    latency_ms: float = 0,
+    latency_jitter_ms: float = 0,
+    error_rate: float = 0,
+    seed: int = 42,
+) -> web.Application:
+    fixtures = HHFixtures(negotiations_count=negotiations_count, seed=seed)
+    app = web.Application(middlewares=[
+        build_fault_injection_middleware(latency_ms, latency_jitter_ms, error_rate, seed),
+        authorization_middleware,
+    ])
+    app["fixtures"] = fixtures
+    app.add_routes(build_routes(fixtures, max_per_page=max_per_page))
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local HH.ru API stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--negotiations", type=int, default=200, help="Negotiations per vacancy in 'response' collection")
+    parser.add_argument("--max-per-page", type=int, default=100, help="Upper bound for 'per_page' (controls number of pages)")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Mean latency added to every response")
+    parser.add_argument("--latency-jitter-ms", type=float, default=0, help="Latency is uniformly distributed in mean ± jitter")
+    parser.add_argument("--error-rate", type=float, default=0, help="Share of requests answered with 503 (0..1)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+    )
+
+    app = create_app(
+        negotiations_count=args.negotiations,
+        max_per_page=args.max_per_page,
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    print(f"🚀 HH.ru API stub is running on http://{args.host}:{args.port}")
+    print(f"   export HH_API_BASE_URL=http://{args.host}:{args.port}")
+    web.run_app(app, host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
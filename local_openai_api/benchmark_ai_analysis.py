@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Measures end-to-end throughput of resume analysis through 'TaskQueue' and 'ai_service' against OpenAI API stub
+(or any OPENAI_BASE_URL): resumes per minute, failed resumes, per-model latency and token metrics.
+Resumes are generated from test_data/fake_resume_*.json with unique IDs, so AI analysis cache is never hit.
+
+Usage:
+    python3 local_openai_api/openai_api_stub_server.py --latency-ms 800 --latency-distribution lognormal --rate-limit-rate 0.02 &
+    OPENAI_BASE_URL=http://127.0.0.1:8082/v1 python3 local_openai_api/benchmark_ai_analysis.py --resumes 200 --mode multi
+"""
+
+import argparse
+import asyncio
+import copy
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Add the project root to the path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from shared_services.constants import AI_ANALYSIS_WORKERS, AI_RESUMES_PER_REQUEST
+from shared_services.ai_service import (
+    analyze_resume_with_ai_async,
+    analyze_resumes_with_ai_async,
+    analyze_resumes_with_tiered_models_async,
+    async_client,
+    is_valid_resume_analysis,
+)
+from shared_services.metrics_service import metrics_registry
+from shared_services.task_queue_service import TaskQueue
+
+TEST_DATA_PATH = project_root / "test_data"
+
+
+def load_inputs(resumes_count: int) -> tuple:
+    """Vacancy description, sourcing criterias and 'resumes_count' resumes with unique IDs."""
+    with open(TEST_DATA_PATH / "fake_vacancy_description.json", "r", encoding="utf-8") as f:
+        vacancy_description = json.load(f)
+    with open(TEST_DATA_PATH / "fake_sourcing_criterias.json", "r", encoding="utf-8") as f:
+        sourcing_criterias = json.load(f)
+    template_resumes = []
+    for resume_path in sorted(TEST_DATA_PATH.glob("fake_resume_*.json")):
+        with open(resume_path, "r", encoding="utf-8") as f:
+            template_resumes.append(json.load(f))
+    resumes_data = {}
+    for resume_number in range(resumes_count):
+        resume_data = copy.deepcopy(template_resumes[resume_number % len(template_resumes)])
+        resume_data["id"] = f"benchmark_{resume_number}_{resume_data.get('id', '')}"
+        # Title is part of the analyzed fields, so every resume is unique for the cache
+        resume_data["title"] = f"{resume_data.get('title') or ''} #{resume_number}"
+        resumes_data[resume_data["id"]] = resume_data
+    return vacancy_description, sourcing_criterias, resumes_data
+
+
+async def benchmark(resumes_count: int, mode: str, concurrency: int, resumes_per_request: int) -> None:
+    print(f"🔍 Benchmarking resume analysis against {async_client.base_url}: {resumes_count} resumes, mode '{mode}', {concurrency} workers")
+    vacancy_description, sourcing_criterias, resumes_data = load_inputs(resumes_count)
+    prompt_path = project_root / "manager_bot" / "docs" / "ai_prompts" / "for_resume.txt"
+    prompt_resume_analysis_text = prompt_path.read_text(encoding="utf-8") if prompt_path.exists() else "Оцени резюме."
+    common_kwargs = {
+        "vacancy_description": vacancy_description,
+        "sourcing_criterias": sourcing_criterias,
+        "prompt_resume_analysis_text": prompt_resume_analysis_text,
+        "vacancy_id": "benchmark",
+        "use_cache": False,
+    }
+
+    # ----- TASKS (the same shape as manager bot queues) -----
+
+    succeeded_count = 0
+    failed_count = 0
+
+    async def analyze_group(group_resumes_data: dict) -> None:
+        nonlocal succeeded_count, failed_count
+        try:
+            if mode == "single":
+                analyses = {
+                    resume_id: await analyze_resume_with_ai_async(resume_data=resume_data, **common_kwargs)
+                    for resume_id, resume_data in group_resumes_data.items()
+                }
+            elif mode == "tiered":
+                analyses = await analyze_resumes_with_tiered_models_async(resumes_data=group_resumes_data, **common_kwargs)
+            else:
+                analyses = await analyze_resumes_with_ai_async(resumes_data=group_resumes_data, **common_kwargs)
+        except Exception as e:
+            print(f"❌ {len(group_resumes_data)} resumes failed: {type(e).__name__}: {e}")
+            failed_count += len(group_resumes_data)
+            return
+        valid_count = sum(1 for analysis in analyses.values() if is_valid_resume_analysis(analysis))
+        succeeded_count += valid_count
+        failed_count += len(group_resumes_data) - valid_count
+
+    group_size = 1 if mode == "single" else resumes_per_request
+    resume_ids = list(resumes_data)
+    queue = TaskQueue(maxsize=resumes_count + 1, concurrency=concurrency)
+
+    # ----- RUN -----
+
+    started_at = time.monotonic()
+    queue.start_worker()
+    for start in range(0, len(resume_ids), group_size):
+        group_resumes_data = {resume_id: resumes_data[resume_id] for resume_id in resume_ids[start:start + group_size]}
+        await queue.put(analyze_group, group_resumes_data, task_id=f"benchmark_{start}")
+    await queue.stop_worker(wait=True)
+    total_secs = time.monotonic() - started_at
+
+    print(
+        f"✅ {succeeded_count} of {resumes_count} resumes analyzed in {total_secs:.2f}s "
+        f"({succeeded_count / max(total_secs, 1e-9) * 60:.0f} resumes/min, failed: {failed_count})"
+    )
+
+    # ----- PER-MODEL METRICS -----
+
+    print(f"📊 AI metrics:\n{metrics_registry.format_summary(name_prefix='ai_')}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of resume analysis pipeline against OpenAI API stub")
+    parser.add_argument("--resumes", type=int, default=100)
+    parser.add_argument("--mode", choices=["single", "multi", "tiered"], default="single",
+                        help="single - one resume per request, multi - groups of resumes per request, tiered - cheaper model first")
+    parser.add_argument("--concurrency", type=int, default=AI_ANALYSIS_WORKERS)
+    parser.add_argument("--resumes-per-request", type=int, default=AI_RESUMES_PER_REQUEST)
+    args = parser.parse_args()
+    if not os.getenv("OPENAI_BASE_URL"):
+        print("⚠️ OPENAI_BASE_URL is not set, requests go to the real OpenAI API")
+    asyncio.run(benchmark(
+        resumes_count=args.resumes,
+        mode=args.mode,
+        concurrency=args.concurrency,
+        resumes_per_request=args.resumes_per_request,
+    ))
+
+
+if __name__ == "__main__":
+    main()
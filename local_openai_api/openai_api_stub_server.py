@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for OpenAI Chat Completions, Files and Batch API for testing and benchmarking of
+resume analysis without spending tokens or network access.
+- chat completions answer with deterministic fake analyses (single resume, multi-resume or vacancy criterias)
+  after latency sampled from configurable distribution, 429/500 errors are injected with configurable rates
+- batches complete after configurable time with the same fake analysis for every request
+- usage reports prompt tokens (~4 characters per token), cached tokens of repeated prompt prefix and completion tokens
+
+Usage:
+    python3 local_openai_api/openai_api_stub_server.py --port 8082 --batch-duration-secs 5 \\
+        --latency-ms 800 --latency-distribution lognormal --rate-limit-rate 0.02 --error-rate 0.01
+
+Then point the bots to it:
+    export OPENAI_BASE_URL=http://127.0.0.1:8082/v1
+
+Requires 'aiohttp' (pip install aiohttp).
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import random
+import time
+import uuid
+from pathlib import Path
+
+from aiohttp import web
+
+logger = logging.getLogger("openai_api_stub_server")
+
+project_root = Path(__file__).parent.parent
+FAKE_SOURCING_CRITERIAS_PATH = project_root / "test_data" / "fake_sourcing_criterias.json"
+
+# Markers of prompt parts built by shared_services/ai_service.py
+SINGLE_RESUME_MARKER = "Резюме кандидата:\n"
+MULTI_RESUME_MARKER = "Резюме кандидатов:\n"
+MULTI_RESUME_RESPONSE_FORMAT_NAME = "resume_analyses"
+# OpenAI caches prompt prefixes of at least 1024 tokens in 128 token increments
+PROMPT_CACHE_MIN_TOKENS = 1024
+PROMPT_CACHE_INCREMENT_TOKENS = 128
+
+
+# ------------------------------ FAULT AND LATENCY INJECTION ------------------------------
+
+class ChatCompletionsBehavior:
+    """Latency, injected errors and token counts of chat completions.
+    Latency distributions ('latency_ms' is the mean or the median):
+        - fixed: always 'latency_ms'
+        - uniform: 'latency_ms' ± 'latency_jitter_ms'
+        - exponential: mean 'latency_ms' (memoryless, many short and some very long answers)
+        - lognormal: median 'latency_ms' and shape 'latency_sigma' (long tail like real model latency)
+    'ms_per_output_token' is added per completion token, so longer answers (multi-resume) take longer.
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 0,
+        latency_distribution: str = "fixed",
+        latency_jitter_ms: float = 0,
+        latency_sigma: float = 0.5,
+        ms_per_output_token: float = 0,
+        rate_limit_rate: float = 0,
+        retry_after_secs: float = 1,
+        error_rate: float = 0,
+        completion_tokens: int = 0,
+        seed: int = 42,
+    ):
+        if latency_distribution not in ("fixed", "uniform", "exponential", "lognormal"):
+            raise ValueError(f"Unknown latency distribution '{latency_distribution}'")
+        self.latency_ms = latency_ms
+        self.latency_distribution = latency_distribution
+        self.latency_jitter_ms = latency_jitter_ms
+        self.latency_sigma = latency_sigma
+        self.ms_per_output_token = ms_per_output_token
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after_secs = retry_after_secs
+        self.error_rate = error_rate
+        self.completion_tokens = completion_tokens
+        self.rnd = random.Random(seed)
+        # Prompt cache keys seen before: their prompt prefix is reported as cached
+        self.prompt_cache_keys = set()
+
+
+    def sample_latency_secs(self, completion_tokens: int) -> float:
+        if self.latency_distribution == "uniform":
+            latency_ms = self.latency_ms + self.rnd.uniform(-self.latency_jitter_ms, self.latency_jitter_ms)
+        elif self.latency_distribution == "exponential":
+            latency_ms = self.rnd.expovariate(1 / self.latency_ms) if self.latency_ms > 0 else 0
+        elif self.latency_distribution == "lognormal":
+            latency_ms = self.rnd.lognormvariate(math.log(self.latency_ms), self.latency_sigma) if self.latency_ms > 0 else 0
+        else:
+            latency_ms = self.latency_ms
+        return max(0.0, latency_ms + completion_tokens * self.ms_per_output_token) / 1000
+
+
+    def sample_error(self) -> tuple:
+        """Returns:
+            tuple: (status, error body, headers) of injected error or (None, None, None)
+        """
+        draw = self.rnd.random()
+        if draw < self.rate_limit_rate:
+            return 429, {
+                "message": "Rate limit reached (injected by stub)",
+                "type": "rate_limit_error",
+                "code": "rate_limit_exceeded",
+            }, {"retry-after": f"{self.retry_after_secs:g}"}
+        if draw < self.rate_limit_rate + self.error_rate:
+            return 500, {"message": "Internal server error (injected by stub)", "type": "server_error", "code": None}, {}
+        return None, None, None
+
+
+    def build_usage(self, prompt_text: str, prompt_prefix_text: str, completion_text: str, prompt_cache_key: str = None) -> dict:
+        prompt_tokens = max(1, len(prompt_text) // 4)
+        completion_tokens = self.completion_tokens or max(1, len(completion_text) // 4)
+        cached_tokens = 0
+        if prompt_cache_key:
+            prefix_tokens = len(prompt_prefix_text) // 4
+            if prompt_cache_key in self.prompt_cache_keys and prefix_tokens >= PROMPT_CACHE_MIN_TOKENS:
+                cached_tokens = prefix_tokens // PROMPT_CACHE_INCREMENT_TOKENS * PROMPT_CACHE_INCREMENT_TOKENS
+            self.prompt_cache_keys.add(prompt_cache_key)
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": cached_tokens},
+        }
+
+
+# ------------------------------ STORAGE ------------------------------
+
+class OpenAIStubStorage:
+    """In-memory files and batches. Batch status is computed from its age on every read."""
+
+    def __init__(self, batch_duration_secs: float):
+        self.batch_duration_secs = batch_duration_secs
+        # {file_id: {"object": file metadata, "content": bytes}}
+        self.files = {}
+        # {batch_id: batch object}
+        self.batches = {}
+
+
+    def create_file(self, file_name: str, purpose: str, content: bytes) -> dict:
+        file_id = f"file-{uuid.uuid4().hex}"
+        file_object = {
+            "id": file_id,
+            "object": "file",
+            "bytes": len(content),
+            "created_at": int(time.time()),
+            "filename": file_name,
+            "purpose": purpose,
+        }
+        self.files[file_id] = {"object": file_object, "content": content}
+        return file_object
+
+
+    def create_batch(self, input_file_id: str, endpoint: str, completion_window: str, metadata: dict) -> dict:
+        batch_id = f"batch_{uuid.uuid4().hex}"
+        request_count = len(_read_jsonl(self.files[input_file_id]["content"]))
+        batch = {
+            "id": batch_id,
+            "object": "batch",
+            "endpoint": endpoint,
+            "input_file_id": input_file_id,
+            "completion_window": completion_window,
+            "status": "in_progress",
+            "output_file_id": None,
+            "error_file_id": None,
+            "created_at": int(time.time()),
+            "completed_at": None,
+            "request_counts": {"total": request_count, "completed": 0, "failed": 0},
+            "metadata": metadata,
+        }
+        self.batches[batch_id] = batch
+        return batch
+
+
+    def refresh_batch(self, batch_id: str) -> dict:
+        """Complete the batch and generate output file once 'batch_duration_secs' passed."""
+        batch = self.batches[batch_id]
+        if batch["status"] == "in_progress" and time.time() - batch["created_at"] >= self.batch_duration_secs:
+            input_lines = _read_jsonl(self.files[batch["input_file_id"]]["content"])
+            output_lines = [_build_output_line(input_line) for input_line in input_lines]
+            output_content = "\n".join(json.dumps(line, ensure_ascii=False) for line in output_lines).encode("utf-8")
+            output_file = self.create_file(file_name=f"{batch_id}_output.jsonl", purpose="batch_output", content=output_content)
+            batch["status"] = "completed"
+            batch["output_file_id"] = output_file["id"]
+            batch["completed_at"] = int(time.time())
+            batch["request_counts"]["completed"] = len(output_lines)
+            logger.info(f"Batch {batch_id} completed with {len(output_lines)} results")
+        return batch
+
+
+def _read_jsonl(content: bytes) -> list:
+    return [json.loads(line) for line in content.decode("utf-8").splitlines() if line.strip()]
+
+
+def build_fake_resume_analysis(custom_id: str) -> dict:
+    """Deterministic analysis result: the same resume always gets the same score."""
+    score = int(hashlib.sha256(custom_id.encode("utf-8")).hexdigest(), 16) % 11
+    return {
+        "final_score": score,
+        "recommendation": "Рекомендован к интервью" if score >= 7 else "Не рекомендован",
+        "requirements_compliance": {"attention": [] if score >= 7 else ["Stub: недостаточно опыта"]},
+    }
+
+
+def build_fake_sourcing_criterias() -> dict:
+    if FAKE_SOURCING_CRITERIAS_PATH.exists():
+        with open(FAKE_SOURCING_CRITERIAS_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {"requirements": {"must": ["Stub: опыт работы от 3 лет"], "nice_to_have": []}}
+
+
+def build_fake_chat_answer(user_message: str, response_format: dict) -> tuple:
+    """Answer of the model to the prompt built by 'ai_service'.
+    Returns:
+        tuple: (answer dict, prompt prefix shared by requests of the vacancy)
+    """
+    json_schema_name = ((response_format or {}).get("json_schema") or {}).get("name")
+    if json_schema_name == MULTI_RESUME_RESPONSE_FORMAT_NAME and MULTI_RESUME_MARKER in user_message:
+        prompt_prefix, resumes_text = user_message.split(MULTI_RESUME_MARKER, 1)
+        try:
+            resume_ids = list(json.loads(resumes_text))
+        except json.JSONDecodeError:
+            resume_ids = []
+        return {
+            "results": [{"resume_id": resume_id, "analysis": build_fake_resume_analysis(resume_id)} for resume_id in resume_ids]
+        }, prompt_prefix
+    if SINGLE_RESUME_MARKER in user_message:
+        prompt_prefix, resume_text = user_message.split(SINGLE_RESUME_MARKER, 1)
+        try:
+            resume_id = str(json.loads(resume_text).get("id") or resume_text)
+        except (json.JSONDecodeError, AttributeError):
+            resume_id = resume_text
+        return build_fake_resume_analysis(resume_id), prompt_prefix
+    # Vacancy analysis (or any other prompt)
+    return build_fake_sourcing_criterias(), ""
+
+
+def build_chat_completion(model: str, content: str, usage: dict) -> dict:
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": usage,
+    }
+
+
+def _build_output_line(input_line: dict) -> dict:
+    custom_id = input_line["custom_id"]
+    analysis = build_fake_resume_analysis(custom_id)
+    content = json.dumps(analysis, ensure_ascii=False)
+    prompt_text = "".join(message.get("content", "") for message in input_line.get("body", {}).get("messages", []))
+    return {
+        "id": f"batch_req_{uuid.uuid4().hex}",
+        "custom_id": custom_id,
+        "response": {
+            "status_code": 200,
+            "request_id": uuid.uuid4().hex,
+            "body": build_chat_completion(
+                model=input_line.get("body", {}).get("model", "stub-model"),
+                content=content,
+                usage={
+                    "prompt_tokens": max(1, len(prompt_text) // 4),
+                    "completion_tokens": max(1, len(content) // 4),
+                    "total_tokens": max(1, len(prompt_text) // 4) + max(1, len(content) // 4),
+                },
+            ),
+        },
+        "error": None,
+    }
+
+
+# ------------------------------ HANDLERS ------------------------------
+
+def build_routes(storage: OpenAIStubStorage, behavior: ChatCompletionsBehavior) -> web.RouteTableDef:
+    routes = web.RouteTableDef()
+
+    @routes.post("/v1/chat/completions")
+    async def create_chat_completion(request: web.Request):
+        payload = await request.json()
+        messages = payload.get("messages") or []
+        if not messages:
+            return web.json_response({"error": {"message": "'messages' is required", "type": "invalid_request_error"}}, status=400)
+        user_message = next((message.get("content", "") for message in reversed(messages) if message.get("role") == "user"), "")
+        answer, prompt_prefix = build_fake_chat_answer(user_message=user_message, response_format=payload.get("response_format"))
+        content = json.dumps(answer, ensure_ascii=False)
+        usage = behavior.build_usage(
+            prompt_text="".join(message.get("content", "") for message in messages),
+            prompt_prefix_text=prompt_prefix,
+            completion_text=content,
+            prompt_cache_key=payload.get("prompt_cache_key"),
+        )
+
+        await asyncio.sleep(behavior.sample_latency_secs(completion_tokens=usage["completion_tokens"]))
+        status, error, headers = behavior.sample_error()
+        if status is not None:
+            logger.debug(f"Chat completion answered with injected {status}")
+            return web.json_response({"error": {**error, "param": None}}, status=status, headers=headers)
+        return web.json_response(build_chat_completion(model=payload.get("model", "stub-model"), content=content, usage=usage))
+
+    @routes.post("/v1/files")
+    async def create_file(request: web.Request):
+        form = await request.post()
+        uploaded_file = form.get("file")
+        if uploaded_file is None or not hasattr(uploaded_file, "file"):
+            return web.json_response({"error": {"message": "'file' is required", "type": "invalid_request_error"}}, status=400)
+        file_object = storage.create_file(
+            file_name=uploaded_file.filename,
+            purpose=form.get("purpose", ""),
+            content=uploaded_file.file.read(),
+        )
+        return web.json_response(file_object)
+
+    @routes.get("/v1/files/{file_id}")
+    async def get_file(request: web.Request):
+        stored_file = storage.files.get(request.match_info["file_id"])
+        if stored_file is None:
+            return web.json_response({"error": {"message": "No such file", "type": "invalid_request_error"}}, status=404)
+        return web.json_response(stored_file["object"])
+
+    @routes.get("/v1/files/{file_id}/content")
+    async def get_file_content(request: web.Request):
+        stored_file = storage.files.get(request.match_info["file_id"])
+        if stored_file is None:
+            return web.json_response({"error": {"message": "No such file", "type": "invalid_request_error"}}, status=404)
+        return web.Response(body=stored_file["content"], content_type="application/octet-stream")
+
+    @routes.post("/v1/batches")
+    async def create_batch(request: web.Request):
+        payload = await request.json()
+        input_file_id = payload.get("input_file_id")
+        if input_file_id not in storage.files:
+            return web.json_response({"error": {"message": "No such input file", "type": "invalid_request_error"}}, status=400)
+        batch = storage.create_batch(
+            input_file_id=input_file_id,
+            endpoint=payload.get("endpoint", "/v1/chat/completions"),
+            completion_window=payload.get("completion_window", "24h"),
+            metadata=payload.get("metadata"),
+        )
+        logger.info(f"Batch {batch['id']} created with {batch['request_counts']['total']} requests")
+        return web.json_response(batch)
+
+    @routes.get("/v1/batches/{batch_id}")
+    async def get_batch(request: web.Request):
+        batch_id = request.match_info["batch_id"]
+        if batch_id not in storage.batches:
+            return web.json_response({"error": {"message": "No such batch", "type": "invalid_request_error"}}, status=404)
+        return web.json_response(storage.refresh_batch(batch_id))
+
+    return routes
+
+
+def create_app(batch_duration_secs: float = 5, behavior: ChatCompletionsBehavior = None) -> web.Application:
+    storage = OpenAIStubStorage(batch_duration_secs=batch_duration_secs)
+    behavior = behavior or ChatCompletionsBehavior()
+    app = web.Application()
+    app["storage"] = storage
+    app["behavior"] = behavior
+    app.add_routes(build_routes(storage, behavior))
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI API stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8082)
+    parser.add_argument("--batch-duration-secs", type=float, default=5, help="Time after which a batch is completed")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Mean (median for lognormal) latency of chat completions")
+    parser.add_argument("--latency-distribution", choices=["fixed", "uniform", "exponential", "lognormal"], default="fixed")
+    parser.add_argument("--latency-jitter-ms", type=float, default=0, help="Uniform distribution: latency is mean ± jitter")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="Lognormal distribution: shape (longer tail when bigger)")
+    parser.add_argument("--ms-per-output-token", type=float, default=0, help="Latency added per completion token")
+    parser.add_argument("--rate-limit-rate", type=float, default=0, help="Share of chat completions answered with 429 (0..1)")
+    parser.add_argument("--retry-after-secs", type=float, default=1, help="'retry-after' header of injected 429")
+    parser.add_argument("--error-rate", type=float, default=0, help="Share of chat completions answered with 500 (0..1)")
+    parser.add_argument("--completion-tokens", type=int, default=0, help="Reported completion tokens (0 - ~4 characters per token of the answer)")
+    parser.add_argument("--seed", type=int, default=42, help="Makes latency and injected errors reproducible")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+    )
+
+    app = create_app(
+        batch_duration_secs=args.batch_duration_secs,
+        behavior=ChatCompletionsBehavior(
+            latency_ms=args.latency_ms,
+            latency_distribution=args.latency_distribution,
+            latency_jitter_ms=args.latency_jitter_ms,
+            latency_sigma=args.latency_sigma,
+            ms_per_output_token=args.ms_per_output_token,
+            rate_limit_rate=args.rate_limit_rate,
+            retry_after_secs=args.retry_after_secs,
+            error_rate=args.error_rate,
+            completion_tokens=args.completion_tokens,
+            seed=args.seed,
+        ),
+    )
+    print(f"🚀 OpenAI API stub is running on http://{args.host}:{args.port}")
+    print(f"   export OPENAI_BASE_URL=http://{args.host}:{args.port}/v1")
+    web.run_app(app, host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -14,6 +14,9 @@ from manager_bot import (
     ai_task_queue, 
     start_command,
 )
+from shared_services.employer_state_service import employer_state_dispatcher
+from shared_services.negotiation_message_service import negotiation_message_outbox
+from shared_services.metrics_service import run_periodic_metrics_summary
 from shared_services.admin import (
     admin_get_users_command,
     admin_update_negotiations_command,
@@ -28,6 +31,12 @@ from shared_services.admin import (
     admin_push_file_command,
     admin_push_file_document_handler,
     admin_update_db_command,
+    admin_circuit_breakers_command,
+    admin_hh_metrics_command,
+    admin_ai_cache_command,
+    admin_top_resumes_command,
+    admin_ai_usage_command,
+    admin_dead_letters_command,
 )
 
 
@@ -107,6 +116,12 @@ async def run_manager_bot() -> None:
     application.add_handler(CommandHandler("admin_pull_file", admin_pull_file_command))
     application.add_handler(CommandHandler("admin_push_file", admin_push_file_command))
     application.add_handler(CommandHandler("admin_update_db", admin_update_db_command))
+    application.add_handler(CommandHandler("admin_circuit_breakers", admin_circuit_breakers_command))
+    application.add_handler(CommandHandler("admin_hh_metrics", admin_hh_metrics_command))
+    application.add_handler(CommandHandler("admin_ai_cache", admin_ai_cache_command))
+    application.add_handler(CommandHandler("admin_top_resumes", admin_top_resumes_command))
+    application.add_handler(CommandHandler("admin_ai_usage", admin_ai_usage_command))
+    application.add_handler(CommandHandler("admin_dead_letters", admin_dead_letters_command))
     # Add document handler with higher priority (group=-1 processes before group=0)
     # This ensures it's checked before other message handlers that might catch documents
     application.add_handler(MessageHandler(filters.Document.ALL, admin_push_file_document_handler), group=-1)
@@ -115,6 +130,21 @@ async def run_manager_bot() -> None:
 
     ai_task_queue.start_worker()
     logger.info("Task queue worker to process AI related tasks is started.")
+
+    # ------------- STARTING OF THE EMPLOYER STATE DISPATCHER for HH.ru negotiations -------------
+
+    employer_state_dispatcher.start()
+    logger.info("Employer state dispatcher to change HH.ru negotiations collections is started.")
+
+    # ------------- STARTING OF THE NEGOTIATION MESSAGES OUTBOX workers for messages to applicants -------------
+
+    await negotiation_message_outbox.start()
+    logger.info("Negotiation messages outbox workers to send messages to applicants are started.")
+
+    # ------------- STARTING OF THE PERIODIC METRICS SUMMARY (HH.ru latency, errors, payload sizes) -------------
+
+    metrics_summary_task = asyncio.create_task(run_periodic_metrics_summary())
+    logger.info("Periodic metrics summary is started.")
     
     # ------------- INITIALIZATION AND STARTING OF THE APPLICATION -------------
 
@@ -149,6 +179,29 @@ async def run_manager_bot() -> None:
                 logger.info("Task queue worker that processes AI related tasks is stopped.")
             except Exception as e:
                 logger.error(f"Error stopping task queue worker that processes AI related tasks: {e}")
+
+            # ------------- SHUTDOWN OF THE EMPLOYER STATE DISPATCHER -------------
+
+            try:
+                # Execute transitions submitted by the last AI tasks and stop the dispatcher
+                await employer_state_dispatcher.stop(wait=True)
+                logger.info("Employer state dispatcher is stopped.")
+            except Exception as e:
+                logger.error(f"Error stopping employer state dispatcher: {e}")
+
+            # ------------- SHUTDOWN OF THE NEGOTIATION MESSAGES OUTBOX -------------
+
+            try:
+                # Deliver messages enqueued by the last AI tasks and stop the workers
+                await negotiation_message_outbox.stop(wait=True)
+                logger.info("Negotiation messages outbox workers are stopped.")
+            except Exception as e:
+                logger.error(f"Error stopping negotiation messages outbox workers: {e}")
+
+            # ------------- SHUTDOWN OF THE PERIODIC METRICS SUMMARY -------------
+
+            metrics_summary_task.cancel()
+            await asyncio.gather(metrics_summary_task, return_exceptions=True)
             
             # ------------- SHUTDOWN OF THE APPLICATION in proper sequence -------------  
             
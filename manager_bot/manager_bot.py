@@ -7,7 +7,7 @@ import sys
 from datetime import datetime, timezone
 from multiprocessing import process
 from pathlib import Path
-from typing import Optional, List, Tuple
+from typing import Optional, List, Set, Tuple
 import os
 import json
 import shutil
@@ -60,8 +60,7 @@ from shared_services.hh_service import (
     filter_open_employer_vacancies,
     get_vacancy_description_from_hh,
     get_negotiations_collection_with_status_response,
-    change_negotiation_collection_status_to_consider,
-    send_negotiation_message,
+    stream_negotiations_collection_items,
     get_resume_info,
     get_available_employer_states_and_collections_negotiations,
     get_negotiations_messages,
@@ -70,9 +69,24 @@ from shared_services.hh_service import (
 
 
 from shared_services.ai_service import (
-    analyze_vacancy_with_ai, 
+    analyze_vacancy_with_ai_async,
     format_sourcing_criterias_analysis_result_for_markdown,
-    analyze_resume_with_ai
+    analyze_resume_with_ai_async,
+    analyze_resumes_with_ai_async,
+    analyze_resume_with_tiered_models_async,
+    analyze_resumes_with_tiered_models_async,
+    build_resume_analysis_batch_request,
+    submit_chat_completions_batch,
+    wait_for_batch_completion,
+    download_batch_results,
+)
+from shared_services.ai_cache_service import build_resume_analysis_cache_key, resume_analysis_cache
+from shared_services.ai_payload_service import count_tokens, project_resume_for_analysis, to_compact_json
+from shared_services.embedding_service import build_resume_text, build_vacancy_text, resume_ranker
+from shared_services.prescreening_service import (
+    build_prescreening_rules,
+    build_prescreening_rejection_analysis,
+    prescreen_resume_with_metrics,
 )
 
 from shared_services.questionnaire_service import (
@@ -82,7 +96,15 @@ from shared_services.questionnaire_service import (
     clear_all_unprocessed_keyboards
 )
 
-from shared_services.task_queue_service import TaskQueue
+from shared_services.task_queue_service import Task, build_task_queue
+
+from shared_services.employer_state_service import employer_state_dispatcher
+
+from shared_services.token_service import hh_token_manager
+
+from shared_services.circuit_breaker_service import hh_circuit_breaker
+
+from shared_services.negotiation_message_service import negotiation_message_outbox
 
 from shared_services.constants import *
 
@@ -93,13 +115,18 @@ from shared_services.db_service import (
     is_value_in_db,
     get_column_value_in_db,
     get_column_value_by_field,
-    update_column_value_by_field
+    get_column_value_by_fields,
+    get_record_ids_by_fields,
+    get_column_values_by_ids,
+    update_column_value_by_field,
+    upsert_records_in_db,
 )
 
 from shared_services.data_service import (
     get_employer_id_from_json_value_from_db,
     get_expires_at_from_callback_endpoint_resp,
     get_access_token_from_callback_endpoint_resp,
+    get_refresh_token_from_callback_endpoint_resp,
     get_decision_status_from_selected_callback_code,
     create_tg_bot_link_for_applicant,
     create_oauth_link,
@@ -119,7 +146,7 @@ from shared_services.data_service import (
     #get_target_vacancy_id_from_records,
     #get_target_vacancy_name_from_records,
     get_list_of_resume_ids_for_recommendation,
-    get_negotiation_id_from_resume_record,
+    get_vacancy_resumes_directory,
 )
 
 from database import (
@@ -133,8 +160,33 @@ HH_CLIENT_SECRET = os.getenv("HH_CLIENT_SECRET")
 OAUTH_REDIRECT_URL = os.getenv("OAUTH_REDIRECT_URL")
 USER_AGENT = os.getenv("USER_AGENT")
 
-# Global task queue for AI analysis tasks
-ai_task_queue = TaskQueue(maxsize=500)
+def get_ai_task_ordering_key(task: Task) -> Optional[str]:
+    """Ordering key of AI task - ID of the vacancy whose records the task writes.
+    Sourcing criterias, single resume and resumes group analyses of the same vacancy run one after another and never race,
+    tasks of different vacancies run in parallel."""
+    if task.func is get_sourcing_criterias_from_ai_and_save_to_db:
+        return f"vacancy_{task.args[0]}"
+    if task.func in (resume_analysis_from_ai_to_user_sort_resume, resumes_group_analysis_from_ai_to_user_sort_resumes):
+        return f"vacancy_{task.args[1]}"
+    return None
+
+
+# Global task queue for AI analysis tasks. Failed tasks are retried, then kept as dead letters (see /admin_dead_letters)
+# With TASK_QUEUE_BACKEND=postgres tasks are stored in 'tasks' table and survive restarts
+# Interactive tasks (sourcing criterias) have own priority lane, see AI_TASK_QUEUE_LANES
+ai_task_queue = build_task_queue(
+    backend=os.getenv("TASK_QUEUE_BACKEND", TASK_QUEUE_BACKEND),
+    maxsize=500,
+    concurrency=AI_ANALYSIS_WORKERS,
+    max_attempts=AI_TASK_MAX_ATTEMPTS,
+    retry_base_delay_secs=AI_TASK_RETRY_BASE_DELAY_SECS,
+    retry_max_delay_secs=AI_TASK_RETRY_MAX_DELAY_SECS,
+    name="ai_task_queue",
+    lanes=AI_TASK_QUEUE_LANES,
+    default_lane=AI_TASK_QUEUE_DEFAULT_LANE,
+    reserved_workers=AI_TASK_QUEUE_RESERVED_WORKERS,
+    key_fn=get_ai_task_ordering_key,
+)
 
 
 ########################################################################################
@@ -435,10 +487,13 @@ async def hh_authorization_command(update: Update, context: ContextTypes.DEFAULT
                     logger.debug(f"Endpoint response: {endpoint_response}")
                     access_token = get_access_token_from_callback_endpoint_resp(endpoint_response=endpoint_response)
                     expires_at = get_expires_at_from_callback_endpoint_resp(endpoint_response=endpoint_response)
+                    refresh_token = get_refresh_token_from_callback_endpoint_resp(endpoint_response=endpoint_response)
                     if access_token is not None and expires_at is not None:
                         update_record_in_db(db_model=Managers, record_id=bot_user_id, updates={"access_token_recieved": True})
                         update_record_in_db(db_model=Managers, record_id=bot_user_id, updates={"access_token": access_token})
                         update_record_in_db(db_model=Managers, record_id=bot_user_id, updates={"access_token_expires_at": expires_at})
+                        update_record_in_db(db_model=Managers, record_id=bot_user_id, updates={"refresh_token": refresh_token})
+                        hh_token_manager.set_token(manager_id=bot_user_id, access_token=access_token, expires_at=expires_at, refresh_token=refresh_token)
                         # If cannot update user records, ValueError is raised from method: update_user_records_with_top_level_key()
 
                     logger.info(f"Authorization successful on attempt {attempt}. Access token '{access_token}' and expires_at '{expires_at}' updated in records.")
@@ -480,7 +535,7 @@ async def pull_user_data_from_hh_command(update: Update, context: ContextTypes.D
 
         bot_user_id = str(get_tg_user_data_attribute_from_update_object(update=update, tg_user_attribute="id"))
         logger.info(f"pull_user_data_from_hh_command started. user_id: {bot_user_id}")
-        access_token = get_column_value_in_db(db_model=Managers, record_id=bot_user_id, field_name="access_token")
+        access_token = await hh_token_manager.get_access_token(manager_id=bot_user_id)
 
         # ----- CHECK IF USER DATA is already in records and STOP if it is -----
 
@@ -492,7 +547,7 @@ async def pull_user_data_from_hh_command(update: Update, context: ContextTypes.D
         # ----- PULL USER DATA from HH and enrich records with it -----
 
         # Get user info from HH.ru API
-        hh_user_info = get_user_info_from_hh(access_token=access_token)
+        hh_user_info = await asyncio.to_thread(get_user_info_from_hh, access_token=access_token)
         # Clean user info received from HH.ru API
         cleaned_hh_user_info = clean_user_info_received_from_hh(user_info=hh_user_info)
         # Update user info from HH.ru API in records
@@ -801,7 +856,7 @@ async def select_vacancy_command(update: Update, context: ContextTypes.DEFAULT_T
 
         bot_user_id = str(get_tg_user_data_attribute_from_update_object(update=update, tg_user_attribute="id"))
         logger.info(f"select_vacancy_command started. user_id: {bot_user_id}")
-        access_token = get_column_value_in_db(db_model=Managers, record_id=bot_user_id, field_name="access_token")
+        access_token = await hh_token_manager.get_access_token(manager_id=bot_user_id)
 
         # ----- CHECK IF Privacy confirmed and VACANCY is selected and STOP if it is -----
 
@@ -822,7 +877,7 @@ async def select_vacancy_command(update: Update, context: ContextTypes.DEFAULT_T
             raise ValueError(f"No employer id found for user {bot_user_id}")
 
         # Get open vacancies from HH.ru API
-        all_employer_vacancies = get_employer_vacancies_from_hh(access_token=access_token, employer_id=employer_id)
+        all_employer_vacancies = await asyncio.to_thread(get_employer_vacancies_from_hh, access_token=access_token, employer_id=employer_id)
         if all_employer_vacancies is None:
             await send_message_to_user(update, context, text=FAILED_TO_GET_OPEN_VACANCIES_TEXT)
             # Raise exception to be caught by outer try-except block (which will notify admin)
@@ -979,11 +1034,7 @@ async def read_vacancy_description_command(update: Update, context: ContextTypes
 
     await send_message_to_user(update, context, text="!!! Поздравляю !!! ты дошел до этапа получения описания вакансии.")
 
-    access_token = get_column_value_in_db(
-        db_model=Managers,
-        record_id=bot_user_id,
-        field_name="access_token",
-    )
+    access_token = await hh_token_manager.get_access_token(manager_id=bot_user_id)
     # Find vacancy id for this manager (manager_id == bot_user_id)
     target_vacancy_id = get_column_value_by_field(
         db_model=Vacancies,
@@ -1005,22 +1056,10 @@ async def read_vacancy_description_command(update: Update, context: ContextTypes
 
     try:
 
-        # ----- PULL VACANCY DESCRIPTION from HH and save it to file -----
-        """
-        vacancy_description = get_vacancy_description_from_hh(access_token=access_token, vacancy_id=target_vacancy_id)
-        """
-
-        # !!! FOR TESTING ONLY !!!
-        # !!! FOR TESTING ONLY !!!
-        # !!! FOR TESTING ONLY !!!
-
-        with open("/Users/gridavyv/HRVibe/hrvibe_2.1/test_data/fake_vacancy_description.json", "r", encoding="utf-8") as f:
-            vacancy_description = json.load(f)
-        logger.debug(f"Vacancy description fetched from fake file: {vacancy_description}")
+        # ----- PULL VACANCY DESCRIPTION from HH -----
 
-        # !!! FOR TESTING ONLY !!!
-        # !!! FOR TESTING ONLY !!!
-        # !!! FOR TESTING ONLY !!!
+        # For local testing point HH_API_BASE_URL to the stub server (see local_hh_api/), it serves fake vacancies
+        vacancy_description = await asyncio.to_thread(get_vacancy_description_from_hh, access_token=access_token, vacancy_id=target_vacancy_id)
 
         if vacancy_description is None:
             logger.error(f"Failed to get vacancy description from HH: {target_vacancy_name}")
@@ -1075,10 +1114,12 @@ async def define_sourcing_criterias_command(update: Update, context: ContextType
             )
 
 
-async def define_sourcing_criterias_triggered_by_admin_command(vacancy_id: str) -> None:
+async def define_sourcing_criterias_triggered_by_admin_command(vacancy_id: str, force: bool = False) -> None:
     # TAGS: [vacancy_related]
     """Prepare everything for vacancy description analysis and 
     create TaksQueue job to get sourcing criteria from AI and save it to file.
+    Criterias of vacancy with the same description are reused from cache unless 'force' is True.
+    'force' also regenerates criterias already received for the vacancy.
     Called from: 'read_vacancy_description_command' or 'define_sourcing_criterias_command'.
     Triggers: nothing.
     """
@@ -1097,7 +1138,7 @@ async def define_sourcing_criterias_triggered_by_admin_command(vacancy_id: str)
 
         # ----- CHECK IF SOURCING CRITERIA is already derived and STOP if it is -----
 
-        if is_boolean_field_true_in_db(db_model=Vacancies, record_id=vacancy_id, field_name="sourcing_criterias_recieved"):
+        if not force and is_boolean_field_true_in_db(db_model=Vacancies, record_id=vacancy_id, field_name="sourcing_criterias_recieved"):
             raise ValueError(f"Sourcing criterias is received already for vacancy {vacancy_id}.")
 
         # ----- DO AI ANALYSIS of the vacancy description  -----
@@ -1117,7 +1158,10 @@ async def define_sourcing_criterias_triggered_by_admin_command(vacancy_id: str)
             vacancy_id,
             vacancy_description,
             prompt_text,
-            task_id=f"vacancy_analysis_{vacancy_id}"
+            use_cache=not force,
+            task_id=f"vacancy_analysis_{vacancy_id}",
+            # Manager waits for criterias, so the task is not queued behind bulk resume analyses
+            lane="interactive",
         )  
 
     except Exception as e:
@@ -1129,10 +1173,12 @@ async def get_sourcing_criterias_from_ai_and_save_to_db(
     vacancy_id: str,
     vacancy_description: dict,
     prompt_text: str,
+    use_cache: bool = True,
     ) -> None:
     # TAGS: [vacancy_related]
     """
     Wrapper function to process vacancy analysis result.
+    If 'use_cache' is False, criterias are regenerated by AI even if cached for the same description.
     This function is executed through TaskQueue.
     """
 
@@ -1141,26 +1187,20 @@ async def get_sourcing_criterias_from_ai_and_save_to_db(
     logger.info(f"get_sourcing_criterias_from_ai_and_save_to_file: started. vacancy_id: {vacancy_id}")
 
     try:
-        '''
         # ----- CALL AI ANALYZER -----
 
-        vacancy_analysis_result = analyze_vacancy_with_ai(
+        vacancy_analysis_result = await analyze_vacancy_with_ai_async(
             vacancy_data=vacancy_description,
-            prompt_vacancy_analysis_text=prompt_text
+            prompt_vacancy_analysis_text=prompt_text,
+            vacancy_id=vacancy_id,
+            use_cache=use_cache,
         )
-        '''
-
-        # !!! FOR TESTING ONLY !!!
-        # !!! FOR TESTING ONLY !!!
-        # !!! FOR TESTING ONLY !!!
 
-        with open("/Users/gridavyv/HRVibe/hrvibe_2.1/test_data/fake_sourcing_criterias.json", "r", encoding="utf-8") as f:
-            vacancy_analysis_result = json.load(f)
-        logger.debug(f"Sourcing criterias fetched from fake file: {vacancy_analysis_result}")
+        # ----- INVALIDATE RESUME ANALYSES of previous SOURCING CRITERIAS -----
 
-        # !!! FOR TESTING ONLY !!!
-        # !!! FOR TESTING ONLY !!!
-        # !!! FOR TESTING ONLY !!!  
+        previous_sourcing_criterias = get_column_value_in_db(db_model=Vacancies, record_id=vacancy_id, field_name="sourcing_criterias_json")
+        if previous_sourcing_criterias and previous_sourcing_criterias != vacancy_analysis_result:
+            await asyncio.to_thread(resume_analysis_cache.invalidate_criterias, sourcing_criterias=previous_sourcing_criterias, vacancy_id=vacancy_id)
 
         # ----- SAVE SOURCING CRITERIAS to DB -----
 
@@ -1434,7 +1474,9 @@ async def handle_answer_sourcing_criterias_confirmation(update: Update, context:
 
 async def source_negotiations_triggered_by_admin_command(vacancy_id: str) -> None:
     # TAGS: [resume_related]
-    """Sources negotiations collection."""
+    """Sources negotiations collection.
+    Works as streaming pipeline: each fetched chunk of negotiations is parsed and upserted to DB
+    right away, so memory is bounded by one page and first rows appear in DB before the last page is downloaded."""
     
     try:
         logger.info(f"source_negotiations_triggered_by_admin_command started. vacancy_id: {vacancy_id}")
@@ -1442,35 +1484,29 @@ async def source_negotiations_triggered_by_admin_command(vacancy_id: str) -> Non
         # ----- IDENTIFY USER and pull required data from records -----
         
         manager_id = get_column_value_by_field(db_model=Vacancies, search_field_name="id", search_value=vacancy_id, target_field_name="manager_id")
-        access_token = get_column_value_by_field(db_model=Managers, search_field_name="id", search_value=manager_id, target_field_name="access_token")
+        access_token = await hh_token_manager.get_access_token(manager_id=manager_id)
 
-        # ----- IMPORTANT: do not check if NEGOTIATIONS COLLECTION file exists, we update it every time -----
+        # ----- IMPORTANT: do not check if NEGOTIATIONS COLLECTION exists in DB, we update it every time -----
 
-        # ----- PULL COLLECTIONS of negotiations and save it to file -----
+        # ----- STREAM COLLECTION of negotiations page by page and upsert it to DB -----
 
         #Define what employer_state to use for pulling the collection
         employer_state = EMPLOYER_STATE_RESPONSE
 
-        #Get collection of negotiations data for the target collection status "response"
-        """
-        negotiations_collection_data = get_negotiations_collection_with_status_response(access_token=access_token, vacancy_id=vacancy_id)
-        """
-
-        # !!! TESTING !!!
-        # !!! TESTING !!!
-        # !!! TESTING !!!
-
-        fake_negotiations_file_path = "/Users/gridavyv/HRVibe/hrvibe_2.1/test_data/fake_negotiations_collections_response.json"
-        with open(fake_negotiations_file_path, "r", encoding="utf-8") as f:
-            negotiations_collection_data = json.load(f)
-
-        # !!! TESTING !!!
-        # !!! TESTING !!!
-        # !!! TESTING !!!
+        collection_meta = {}
+        processed_items_count = 0
+        async for negotiations_items_chunk in stream_negotiations_collection_items(
+            access_token=access_token,
+            vacancy_id=vacancy_id,
+            collection=employer_state,
+            collection_meta=collection_meta,
+        ):
+            await upsert_negotiations_items_to_db(vacancy_id=vacancy_id, negotiations_items=negotiations_items_chunk)
+            processed_items_count += len(negotiations_items_chunk)
 
-        await parse_negotiations_collection_to_db(vacancy_id=vacancy_id, negotiations_json=negotiations_collection_data)
+        update_record_in_db(db_model=Vacancies, record_id=vacancy_id, updates={"negotiations_collection_recieved": True})
 
-        logger.info(f"source_negotiations_triggered_by_admin_command: successfully completed for vacancy_id: {vacancy_id}")
+        logger.info(f"source_negotiations_triggered_by_admin_command: successfully completed for vacancy_id: {vacancy_id}. Processed: {processed_items_count}, Found on HH: {collection_meta.get('found', 0)}")
     except Exception as e:
         logger.error(f"source_negotiations_triggered_by_admin_command: Failed to source negotiations for vacancy_id {vacancy_id}: {e}", exc_info=True)
         raise
@@ -1494,11 +1530,6 @@ async def parse_negotiations_collection_to_db(vacancy_id: str, negotiations_json
                 ]
             }
         vacancy_id: The vacancy ID to associate negotiations with (required foreign key)
-    
-    Updates Negotiations table:
-        - id: Set to [items][id] (negotiation ID)
-        - resume_id: Set to [items][resume][id] (resume ID)
-        - vacancy_id: Set to provided vacancy_id
     """
 
     logger.info(f"_parse_negotiations_collection_to_db: started. vacancy_id: {vacancy_id}")
@@ -1511,48 +1542,54 @@ async def parse_negotiations_collection_to_db(vacancy_id: str, negotiations_json
             logger.warning("parse_negotiations_collection_to_db: No items found in negotiations_json")
             return
         
-        logger.info(f"parse_negotiations_collection_to_db: Processing {len(items)} negotiations for vacancy {vacancy_id}")
-        
-        for item in items:
-            # Extract negotiation ID and resume ID
-            negotiation_id = item.get("id")
-            resume = item.get("resume", {})
-            resume_id = resume.get("id") if isinstance(resume, dict) else None
-            
-            if not negotiation_id:
-                logger.warning(f"parse_negotiations_collection_to_db: Skipping item with missing 'id': {item}")
-                continue
-            
-            if not resume_id:
-                logger.warning(f"parse_negotiations_collection_to_db: Skipping negotiation {negotiation_id} with missing resume.id")
-                continue
-            
-            # Ensure negotiation_id and resume_id are strings
-            negotiation_id = str(negotiation_id)
-            resume_id = str(resume_id)
-            
-            # Check if negotiation record already exists
-            if not is_value_in_db(db_model=Negotiations, field_name="id", value=negotiation_id):
-                # Create new record
-                create_new_record_in_db(
-                    db_model=Negotiations,
-                    record_id=negotiation_id,
-                    initial_values={
-                        "resume_id": resume_id,
-                        "vacancy_id": vacancy_id
-                    }
-                )
-                logger.debug(f"parse_negotiations_collection_to_db: Created negotiation {negotiation_id} with resume_id {resume_id}")
-            else:        
-                logger.debug(f"parse_negotiations_collection_to_db: Skipping^ cause negotiation {negotiation_id} exists in database")
-        
-        logger.info(f"parse_negotiations_collection_to_db: Successfully processed {len(items)} negotiations for vacancy {vacancy_id}")
+        await upsert_negotiations_items_to_db(vacancy_id=vacancy_id, negotiations_items=items)
     
     except Exception as e:
         logger.error(f"parse_negotiations_collection_to_db: Failed to parse negotiations: {e}", exc_info=True)
         raise
 
 
+async def upsert_negotiations_items_to_db(vacancy_id: str, negotiations_items: List[dict]) -> int:
+    # TAGS: [negotiations_related]
+    """
+    Upsert chunk of negotiations collection items to Negotiations table with one statement.
+    Existing negotiations are left untouched.
+    Updates Negotiations table:
+        - id: Set to [items][id] (negotiation ID)
+        - resume_id: Set to [items][resume][id] (resume ID)
+        - vacancy_id: Set to provided vacancy_id
+    Returns:
+        Number of new negotiations created
+    """
+
+    negotiations_records = []
+    for item in negotiations_items:
+        # Extract negotiation ID and resume ID
+        negotiation_id = item.get("id")
+        resume = item.get("resume", {})
+        resume_id = resume.get("id") if isinstance(resume, dict) else None
+        
+        if not negotiation_id:
+            logger.warning(f"upsert_negotiations_items_to_db: Skipping item with missing 'id': {item}")
+            continue
+        
+        if not resume_id:
+            logger.warning(f"upsert_negotiations_items_to_db: Skipping negotiation {negotiation_id} with missing resume.id")
+            continue
+        
+        # Ensure negotiation_id and resume_id are strings
+        negotiations_records.append({
+            "id": str(negotiation_id),
+            "resume_id": str(resume_id),
+            "vacancy_id": vacancy_id,
+        })
+
+    # DB call is blocking, so it is executed in a separate thread to keep the event loop free
+    created_count = await asyncio.to_thread(upsert_records_in_db, db_model=Negotiations, records=negotiations_records)
+    logger.info(f"upsert_negotiations_items_to_db: {created_count} new of {len(negotiations_items)} negotiations saved for vacancy {vacancy_id}")
+    return created_count
+
+
 
 
 async def source_resumes_triggered_by_admin_command(bot_user_id: str) -> None:
@@ -1618,9 +1655,13 @@ async def source_resumes_triggered_by_admin_command(bot_user_id: str) -> None:
         
         #for resume_id in fresh_resume_ids_from_negotiations_collection:
         for resume_id, negotiation_id in fresh_resume_id_and_negotiation_id_dict.items():
+            # Stop instead of failing each remaining resume one by one while HH.ru is down
+            if hh_circuit_breaker.is_open():
+                logger.warning(f"source_resumes_triggered_by_admin_command: HH.ru circuit is open, stopping download for user {bot_user_id}")
+                break
             try:
                 resume_file_path = new_resume_data_dir / f"resume_{resume_id}.json"
-                resume_data = get_resume_info(access_token=access_token, resume_id=resume_id)
+                resume_data = await asyncio.to_thread(get_resume_info, access_token=access_token, resume_id=resume_id)
                 # Write resume data JSON into resume_file_path
                 create_json_file_with_dictionary_content(file_path=str(resume_file_path), content_to_write=resume_data)
                 logger.debug(f"source_resumes_triggered_by_admin_command: successfully downloaded resume {resume_id} to file: {resume_file_path}")
@@ -1682,12 +1723,104 @@ async def source_resumes_triggered_by_admin_command(bot_user_id: str) -> None:
         raise
 
 
-async def analyze_resume_triggered_by_admin_command(bot_user_id: str) -> None:
+def get_target_vacancy_id_from_db(bot_user_id: str) -> str:
+    # TAGS: [get_data]
+    """ID of the vacancy selected by the manager."""
+    target_vacancy_id = get_column_value_by_field(db_model=Vacancies, search_field_name="manager_id", search_value=bot_user_id, target_field_name="id")
+    if not target_vacancy_id:
+        raise ValueError(f"Target vacancy not found in DB for user {bot_user_id}")
+    return target_vacancy_id
+
+
+def load_resume_analysis_inputs(target_vacancy_id: str) -> Tuple[dict, dict, str]:
+    # TAGS: [resume_related]
+    """Load vacancy description, sourcing criterias (from DB) and prompt used for AI analysis of resumes of the vacancy."""
+    vacancy_description = get_column_value_in_db(db_model=Vacancies, record_id=target_vacancy_id, field_name="description_json")
+    if not vacancy_description:
+        raise ValueError(f"Vacancy description not found in DB for vacancy {target_vacancy_id}")
+    sourcing_criterias = get_column_value_in_db(db_model=Vacancies, record_id=target_vacancy_id, field_name="sourcing_criterias_json")
+    if not sourcing_criterias:
+        raise ValueError(f"Sourcing criterias not found in DB for vacancy {target_vacancy_id}")
+    return vacancy_description, sourcing_criterias, load_resume_analysis_prompt()
+
+
+def load_resume_analysis_prompt() -> str:
+    # TAGS: [resume_related]
+    """Load current prompt of AI resume analysis."""
+    with open(Path(PROMPT_DIR) / "for_resume.txt", "r", encoding="utf-8") as f:
+        return f.read()
+
+
+async def rank_resume_files_against_vacancy(
+    resume_json_paths_list: List[Path],
+    vacancy_description: dict,
+    sourcing_criterias: dict,
+) -> List[Tuple[Path, dict, float]]:
+    # TAGS: [resume_related]
+    """Rank resume files by embedding similarity to the vacancy.
+    Returns:
+        list: [(resume_json_path, resume_json, similarity)] sorted from the most similar resume
+    """
+    resumes = {}
+    for resume_json_path in resume_json_paths_list:
+        with open(resume_json_path, "r", encoding="utf-8") as rf:
+            resumes[str(resume_json_path)] = (resume_json_path, json.load(rf))
+    ranking = await resume_ranker.rank_resumes(
+        vacancy_text=build_vacancy_text(vacancy_description=vacancy_description, sourcing_criterias=sourcing_criterias),
+        resume_texts={resume_key: build_resume_text(resume_json) for resume_key, (_, resume_json) in resumes.items()},
+    )
+    return [(resumes[resume_key][0], resumes[resume_key][1], similarity) for resume_key, similarity in ranking]
+
+
+async def build_top_resumes_preview_text(bot_user_id: str, top_n: int = RESUMES_TOP_N_PREVIEW) -> str:
+    # TAGS: [resume_related]
+    """Preview of 'top_n' resumes of the target vacancy most similar to it (new and passed resumes).
+    Available right after resumes are downloaded, long before AI scoring of all of them is done.
+    """
+    target_vacancy_id = get_target_vacancy_id_from_db(bot_user_id=bot_user_id)
+    resume_data_dir = get_vacancy_resumes_directory(vacancy_id=target_vacancy_id)
+    # Resumes of the vacancy are taken from its negotiations in DB, file of the resume is in directory of its sorting status
+    resume_sorting_status_by_path = {}
+    for resume_sorting_status in ("new", "passed"):
+        negotiation_ids = get_record_ids_by_fields(db_model=Negotiations, search_values={"vacancy_id": target_vacancy_id, "resume_sorting_status": resume_sorting_status})
+        for resume_id in get_column_values_by_ids(db_model=Negotiations, record_ids=negotiation_ids, field_name="resume_id").values():
+            resume_json_path = resume_data_dir / resume_sorting_status / f"resume_{resume_id}.json"
+            if resume_json_path.exists():
+                resume_sorting_status_by_path[resume_json_path] = resume_sorting_status
+            else:
+                logger.warning(f"build_top_resumes_preview_text: file of resume {resume_id} not found: {resume_json_path}")
+    resume_json_paths_list = list(resume_sorting_status_by_path.keys())
+    if not resume_json_paths_list:
+        return f"Нет резюме для вакансии {target_vacancy_id}."
+    vacancy_description, sourcing_criterias, _ = load_resume_analysis_inputs(target_vacancy_id=target_vacancy_id)
+    ranking = await rank_resume_files_against_vacancy(
+        resume_json_paths_list=resume_json_paths_list,
+        vacancy_description=vacancy_description,
+        sourcing_criterias=sourcing_criterias,
+    )
+    lines = [f"Топ-{min(top_n, len(ranking))} из {len(ranking)} резюме по сходству с вакансией (до оценки AI):"]
+    for position, (resume_json_path, resume_json, similarity) in enumerate(ranking[:top_n], start=1):
+        status = "оценено AI" if resume_sorting_status_by_path[resume_json_path] == "passed" else "ждет оценки AI"
+        experience_months = (resume_json.get("total_experience") or {}).get("months")
+        experience_text = f", опыт {experience_months // 12} л. {experience_months % 12} мес." if isinstance(experience_months, int) else ""
+        lines.append(
+            f"{position}. {resume_json.get('title', 'Без названия')}{experience_text} — сходство {similarity:.2f} ({status})"
+            + (f"\n{resume_json['alternate_url']}" if resume_json.get("alternate_url") else "")
+        )
+    return "\n".join(lines)
+
+
+async def analyze_resume_triggered_by_admin_command(bot_user_id: str, use_batch: bool = False, resumes_per_request: int = 1) -> Optional[str]:
     # TAGS: [resume_related]
     """Analyzes resume with AI. 
     Sorts resumes into "passed" or "failed" directories based on the final score. 
     Triggers 'send_message_to_applicants_command' and 'change_employer_state_command' for each resume.
     Does not trigger any other commands once done.
+    If 'use_batch' is True, all new resumes are submitted as one OpenAI batch instead of queueing interactive calls,
+    results are ingested in the background once the batch is completed.
+    If 'resumes_per_request' > 1, short resumes are scored in groups of this size by one request each.
+    Returns:
+        str: Batch ID if 'use_batch' is True, otherwise None
     """
     
     try:
@@ -1695,27 +1828,18 @@ async def analyze_resume_triggered_by_admin_command(bot_user_id: str) -> None:
 
         # ----- IDENTIFY USER and pull required data from records -----
         
-        target_vacancy_id = get_target_vacancy_id_from_records(record_id=bot_user_id)
+        target_vacancy_id = get_target_vacancy_id_from_db(bot_user_id=bot_user_id)
 
         # ----- PREPARE paths and files for AI analysis -----
 
         #Get files paths for AI analysis
-        vacancy_data_dir = get_vacancy_directory(bot_user_id=bot_user_id, vacancy_id=target_vacancy_id)
-        vacancy_description_file_path = vacancy_data_dir / "vacancy_description.json"
-        sourcing_criterias_file_path = vacancy_data_dir / "sourcing_criterias.json"
-        resume_analysis_prompt_file_path = Path(PROMPT_DIR) / "for_resume.txt"
-        resume_data_dir = get_resume_directory(bot_user_id=bot_user_id, vacancy_id=target_vacancy_id)
+        resume_data_dir = get_vacancy_resumes_directory(vacancy_id=target_vacancy_id)
         new_resume_data_path = Path(resume_data_dir) / "new"
         passed_resume_data_path = Path(resume_data_dir) / "passed"
         failed_resume_data_path = Path(resume_data_dir) / "failed"
 
         # Load inputs for AI analysis
-        with open(vacancy_description_file_path, "r", encoding="utf-8") as f:
-            vacancy_description = json.load(f)
-        with open(sourcing_criterias_file_path, "r", encoding="utf-8") as f:
-            sourcing_criterias = json.load(f)
-        with open(resume_analysis_prompt_file_path, "r", encoding="utf-8") as f:
-            resume_analysis_prompt = f.read() 
+        vacancy_description, sourcing_criterias, resume_analysis_prompt = load_resume_analysis_inputs(target_vacancy_id=target_vacancy_id)
 
         # ----- QUEUE RESUMES for AI ANALYSIS -----
 
@@ -1726,13 +1850,135 @@ async def analyze_resume_triggered_by_admin_command(bot_user_id: str) -> None:
         logger.debug(f"Total resumes: {num_of_new_resumes} in directory {new_resume_data_path}")
         queued_resumes = 0
         failed_resumes = 0
+
+        # ----- PRE-SCREEN RESUMES by structured fields before AI -----
+
+        # Resumes clearly failing "must" requirements are sorted to "failed" without AI call
+        prescreening_rules = build_prescreening_rules(sourcing_criterias=sourcing_criterias)
+        prescreened_resumes = 0
+        if not prescreening_rules.is_empty():
+            remaining_resume_json_paths_list = []
+            for resume_json_path in new_resume_json_paths_list:
+                try:
+                    with open(resume_json_path, "r", encoding="utf-8") as rf:
+                        resume_json = json.load(rf)
+                    rejection_reason = prescreen_resume_with_metrics(resume_data=resume_json, rules=prescreening_rules)
+                    if not rejection_reason:
+                        remaining_resume_json_paths_list.append(resume_json_path)
+                        continue
+                    resume_id = resume_json_path.stem.split("_")[1]
+                    logger.info(f"Resume {resume_id} rejected by pre-screening: {rejection_reason}")
+                    await save_resume_analysis_and_sort_resume(
+                        bot_user_id=bot_user_id,
+                        target_vacancy_id=target_vacancy_id,
+                        resume_id=resume_id,
+                        resume_json_path=resume_json_path,
+                        ai_analysis_result=build_prescreening_rejection_analysis(reason=rejection_reason),
+                        passed_resume_data_path=passed_resume_data_path,
+                        failed_resume_data_path=failed_resume_data_path,
+                    )
+                    prescreened_resumes += 1
+                except Exception as e:
+                    # Resume is left for AI analysis
+                    logger.error(f"Failed to pre-screen resume '{resume_json_path}': {e}", exc_info=True)
+                    remaining_resume_json_paths_list.append(resume_json_path)
+            new_resume_json_paths_list = remaining_resume_json_paths_list
+        logger.info(f"analyze_resume_triggered_by_admin_command: {prescreened_resumes} of {num_of_new_resumes} resumes rejected by pre-screening (AI calls saved)")
+
+        # ----- ORDER RESUMES by EMBEDDING SIMILARITY to vacancy -----
+
+        # Best candidates are queued first, so they are scored (and can be contacted) earlier
+        try:
+            ranking = await rank_resume_files_against_vacancy(
+                resume_json_paths_list=new_resume_json_paths_list,
+                vacancy_description=vacancy_description,
+                sourcing_criterias=sourcing_criterias,
+            )
+            new_resume_json_paths_list = [resume_json_path for resume_json_path, _, _ in ranking]
+        except Exception as e:
+            # Ranking only changes the order, resumes are analyzed anyway
+            logger.error(f"analyze_resume_triggered_by_admin_command: Failed to rank resumes, keeping directory order: {e}", exc_info=True)
+
+        # ----- SUBMIT RESUMES to BATCH API instead of queue -----
+
+        if use_batch:
+            batch_requests = []
+            cached_resumes = 0
+            for resume_json_path in new_resume_json_paths_list:
+                resume_id = resume_json_path.stem.split("_")[1]
+                with open(resume_json_path, "r", encoding="utf-8") as rf:
+                    resume_json = json.load(rf)
+                # Resumes analyzed before with the same inputs are sorted right away
+                cached_analysis = await asyncio.to_thread(resume_analysis_cache.get, build_resume_analysis_cache_key(
+                    vacancy_description=vacancy_description,
+                    sourcing_criterias=sourcing_criterias,
+                    resume_data=resume_json,
+                    prompt_resume_analysis_text=resume_analysis_prompt,
+                    model=MODEL_NAME,
+                ))
+                if cached_analysis is not None:
+                    await save_resume_analysis_and_sort_resume(
+                        bot_user_id=bot_user_id,
+                        target_vacancy_id=target_vacancy_id,
+                        resume_id=resume_id,
+                        resume_json_path=resume_json_path,
+                        ai_analysis_result=cached_analysis,
+                        passed_resume_data_path=passed_resume_data_path,
+                        failed_resume_data_path=failed_resume_data_path,
+                    )
+                    cached_resumes += 1
+                    continue
+                batch_requests.append(build_resume_analysis_batch_request(
+                    custom_id=resume_id,
+                    vacancy_description=vacancy_description,
+                    sourcing_criterias=sourcing_criterias,
+                    resume_data=resume_json,
+                    prompt_resume_analysis_text=resume_analysis_prompt,
+                ))
+            if not batch_requests:
+                logger.info(f"analyze_resume_triggered_by_admin_command: No resumes to submit in batch for user_id: {bot_user_id}. Taken from cache: {cached_resumes}")
+                return None
+            batch_id = await submit_chat_completions_batch(
+                batch_requests=batch_requests,
+                metadata={"manager_id": str(bot_user_id), "vacancy_id": str(target_vacancy_id)},
+            )
+            start_resume_analysis_batch_ingestion(bot_user_id=bot_user_id, batch_id=batch_id)
+            logger.info(f"analyze_resume_triggered_by_admin_command: {len(batch_requests)} resumes submitted in batch {batch_id} for user_id: {bot_user_id}. Taken from cache: {cached_resumes}")
+            return batch_id
         
+        # Short resumes are collected into groups scored by one request (if 'resumes_per_request' > 1)
+        short_resumes_group = []
+
+        async def queue_short_resumes_group() -> None:
+            await ai_task_queue.put(
+                resumes_group_analysis_from_ai_to_user_sort_resumes,
+                bot_user_id,
+                target_vacancy_id,
+                vacancy_description,
+                sourcing_criterias,
+                list(short_resumes_group),
+                resume_analysis_prompt,
+                passed_resume_data_path,
+                failed_resume_data_path,
+                task_id=f"resumes_group_analysis_{bot_user_id}_{target_vacancy_id}_{short_resumes_group[0][0]}",
+                lane="bulk",
+            )
+            logger.info(f"Added group of {len(short_resumes_group)} resumes to analysis queue")
+            short_resumes_group.clear()
+
         # Open each resume file and add AI analysis task to queue
         for resume_json_path in new_resume_json_paths_list:
             try:
                 resume_id = resume_json_path.stem.split("_")[1]
                 with open(resume_json_path, "r", encoding="utf-8") as rf:
                     resume_json = json.load(rf)
+
+                if resumes_per_request > 1 and await asyncio.to_thread(count_tokens, to_compact_json(project_resume_for_analysis(resume_json))) <= AI_MULTI_RESUME_MAX_RESUME_TOKENS:
+                    short_resumes_group.append((resume_id, resume_json_path, resume_json))
+                    if len(short_resumes_group) >= resumes_per_request:
+                        await queue_short_resumes_group()
+                    queued_resumes += 1
+                    continue
                 
                 # Add AI analysis task to queue
                 await ai_task_queue.put(
@@ -1747,7 +1993,8 @@ async def analyze_resume_triggered_by_admin_command(bot_user_id: str) -> None:
                     resume_analysis_prompt,
                     passed_resume_data_path,
                     failed_resume_data_path,
-                    task_id=f"resume_analysis_{bot_user_id}_{target_vacancy_id}_{resume_id}"
+                    task_id=f"resume_analysis_{bot_user_id}_{target_vacancy_id}_{resume_id}",
+                    lane="bulk",
                 )
                 queued_resumes += 1
                 logger.info(f"Added resume {resume_id} to analysis queue. Total queued: {queued_resumes} out of {num_of_new_resumes}")
@@ -1755,9 +2002,11 @@ async def analyze_resume_triggered_by_admin_command(bot_user_id: str) -> None:
                 logger.error(f"Failed to queue resume analysis for '{resume_json_path}': {e}", exc_info=True)
                 failed_resumes += 1
                 continue
+        if short_resumes_group:
+            await queue_short_resumes_group()
 
         # ----- COMMUNICATE RESULT of QUEUING RESUMES -----
-        logger.info(f"analyze_resume_triggered_by_admin_command: Completed for user_id: {bot_user_id}. Success: {queued_resumes}, Failed: {failed_resumes}, Total: {num_of_new_resumes}")
+        logger.info(f"analyze_resume_triggered_by_admin_command: Completed for user_id: {bot_user_id}. Success: {queued_resumes}, Failed: {failed_resumes}, Pre-screened: {prescreened_resumes}, Total: {num_of_new_resumes}")
     
     except Exception as e:
         logger.error(f"analyze_resume_triggered_by_admin_command: Failed. user_id {bot_user_id}: {e}", exc_info=True)
@@ -1779,117 +2028,274 @@ async def resume_analysis_from_ai_to_user_sort_resume(
     """
     Wrapper function to process resume analysis result.
     This function is executed through TaskQueue.
+    Safe to retry: resume already sorted by previous attempt (moved out of "new") is skipped.
     """
+    if not Path(resume_json_path).exists():
+        logger.info(f"Resume {resume_id} is already sorted, analysis is skipped")
+        return
     try:
-        # Call AI analyzer
-        ai_analysis_result = analyze_resume_with_ai(
+        # Call AI analyzer (cheaper model first if tiered scoring is enabled)
+        analyze_resume = analyze_resume_with_tiered_models_async if AI_TIERED_ROUTING_ENABLED else analyze_resume_with_ai_async
+        ai_analysis_result = await analyze_resume(
             vacancy_description=vacancy_description,
             sourcing_criterias=sourcing_criterias,
             resume_data=resume_json,
-            prompt_resume_analysis_text=resume_analysis_prompt
+            prompt_resume_analysis_text=resume_analysis_prompt,
+            vacancy_id=target_vacancy_id,
         )
-        
-        # Update resume records with AI analysis results
-        update_resume_record_with_top_level_key(
+
+        await save_resume_analysis_and_sort_resume(
             bot_user_id=bot_user_id,
-            vacancy_id=target_vacancy_id,
-            resume_record_id=resume_id,
-            key="ai_analysis",
-            value=ai_analysis_result
+            target_vacancy_id=target_vacancy_id,
+            resume_id=resume_id,
+            resume_json_path=resume_json_path,
+            ai_analysis_result=ai_analysis_result,
+            passed_resume_data_path=passed_resume_data_path,
+            failed_resume_data_path=failed_resume_data_path,
         )
-        # If cannot update resume records, ValueError is raised from method: update_resume_record_with_top_level_key()
+    except Exception as e:
+        logger.error(f"Failed to process resume analysis for {resume_id}: {e}", exc_info=True)
+        raise
 
-        # Send message to applicant
-        """
-        await send_message_to_applicant_command(bot_user_id=bot_user_id, resume_id=resume_id)
-        """
-        
-        # Change employer state
-        await change_employer_state_command(bot_user_id=bot_user_id, resume_id=resume_id)
-        
-        # Sort resume based on final score
-        resume_final_score = int(ai_analysis_result.get("final_score", 0))
-        if resume_final_score >= RESUME_PASSED_SCORE:
-            shutil.move(resume_json_path, passed_resume_data_path)
-            update_resume_record_with_top_level_key(
-                bot_user_id=bot_user_id,
-                vacancy_id=target_vacancy_id,
-                resume_record_id=resume_id,
-                key="resume_sorting_status",
-                value="passed"
-            )
-            # If cannot update resume records, ValueError is raised from method: update_resume_record_with_top_level_key()
-        else:
-            shutil.move(resume_json_path, failed_resume_data_path)
-            update_resume_record_with_top_level_key(
+
+async def resumes_group_analysis_from_ai_to_user_sort_resumes(
+    bot_user_id: str,
+    target_vacancy_id: str,
+    vacancy_description: dict,
+    sourcing_criterias: dict,
+    resumes_group: List[Tuple[str, Path, dict]],
+    resume_analysis_prompt: str,
+    passed_resume_data_path: Path,
+    failed_resume_data_path: Path,
+    ) -> None:
+    """
+    Wrapper function to score group of resumes by one AI request and sort each of them.
+    'resumes_group' is list of (resume_id, resume_json_path, resume_json).
+    This function is executed through TaskQueue.
+    Safe to retry: resumes already sorted by previous attempt (moved out of "new") are skipped.
+    """
+    resumes_group = [item for item in resumes_group if Path(item[1]).exists()]
+    if not resumes_group:
+        logger.info("All resumes of the group are already sorted, analysis is skipped")
+        return
+    analyze_resumes = analyze_resumes_with_tiered_models_async if AI_TIERED_ROUTING_ENABLED else analyze_resumes_with_ai_async
+    ai_analysis_results = await analyze_resumes(
+        vacancy_description=vacancy_description,
+        sourcing_criterias=sourcing_criterias,
+        resumes_data={resume_id: resume_json for resume_id, _, resume_json in resumes_group},
+        prompt_resume_analysis_text=resume_analysis_prompt,
+        vacancy_id=target_vacancy_id,
+    )
+    # Resumes whose AI request failed are missing in results, they stay "new" and are retried with the task
+    failed_resume_ids = [resume_id for resume_id, _, _ in resumes_group if resume_id not in ai_analysis_results]
+    for resume_id, resume_json_path, _ in resumes_group:
+        if resume_id not in ai_analysis_results:
+            continue
+        try:
+            await save_resume_analysis_and_sort_resume(
                 bot_user_id=bot_user_id,
-                vacancy_id=target_vacancy_id,
-                resume_record_id=resume_id,
-                key="resume_sorting_status",
-                value="failed"
+                target_vacancy_id=target_vacancy_id,
+                resume_id=resume_id,
+                resume_json_path=resume_json_path,
+                ai_analysis_result=ai_analysis_results[resume_id],
+                passed_resume_data_path=passed_resume_data_path,
+                failed_resume_data_path=failed_resume_data_path,
             )
-            # If cannot update resume records, ValueError is raised from method: update_resume_record_with_top_level_key()
+        except Exception as e:
+            logger.error(f"Failed to process resume analysis for {resume_id}: {e}", exc_info=True)
+            failed_resume_ids.append(resume_id)
+    if failed_resume_ids:
+        raise ValueError(f"Failed to process analysis of resumes {failed_resume_ids} of the group")
+
+
+async def save_resume_analysis_and_sort_resume(
+    bot_user_id: str,
+    target_vacancy_id: str,
+    resume_id: str,
+    resume_json_path: Path,
+    ai_analysis_result: dict,
+    passed_resume_data_path: Path,
+    failed_resume_data_path: Path,
+    ) -> None:
+    # TAGS: [resume_related]
+    """
+    Saves AI analysis result of the resume and sorts resume into "passed" or "failed" based on the final score.
+    Shared by interactive analysis (TaskQueue) and Batch API ingestion.
+    """
+    # Find negotiation of the resume to save AI analysis results
+    negotiation_id = get_column_value_by_fields(db_model=Negotiations, search_values={"resume_id": resume_id, "vacancy_id": target_vacancy_id}, target_field_name="id")
+    if not negotiation_id:
+        raise ValueError(f"save_resume_analysis_and_sort_resume: negotiation not found in DB for resume {resume_id} and vacancy {target_vacancy_id}")
+    update_record_in_db(db_model=Negotiations, record_id=negotiation_id, updates={"resume_ai_analysis": ai_analysis_result})
+
+    # Send message to applicant
+    """
+    await send_message_to_applicant_command(bot_user_id=bot_user_id, resume_id=resume_id)
+    """
+    
+    # Change employer state
+    await change_employer_state_command(bot_user_id=bot_user_id, resume_id=resume_id)
+    
+    # Sort resume based on final score
+    resume_final_score = int(ai_analysis_result.get("final_score", 0))
+    if resume_final_score >= RESUME_PASSED_SCORE:
+        shutil.move(resume_json_path, passed_resume_data_path)
+        resume_sorting_status = "passed"
+    else:
+        shutil.move(resume_json_path, failed_resume_data_path)
+        resume_sorting_status = "failed"
+    update_record_in_db(db_model=Negotiations, record_id=negotiation_id, updates={"resume_sorting_status": resume_sorting_status})
+
+
+# Background tasks of batch ingestion (reference is kept, so tasks are not garbage collected while waiting)
+resume_analysis_batch_ingestion_tasks: Set[asyncio.Task] = set()
+
+
+def start_resume_analysis_batch_ingestion(bot_user_id: str, batch_id: str) -> asyncio.Task:
+    # TAGS: [resume_related]
+    """Start background waiting for the batch and ingestion of its results."""
+    task = asyncio.create_task(ingest_resume_analysis_batch(bot_user_id=bot_user_id, batch_id=batch_id))
+    resume_analysis_batch_ingestion_tasks.add(task)
+    task.add_done_callback(resume_analysis_batch_ingestion_tasks.discard)
+    return task
+
+
+async def ingest_resume_analysis_batch(bot_user_id: str, batch_id: str) -> None:
+    # TAGS: [resume_related]
+    """Waits until OpenAI batch of resume analyses is completed and sorts resumes with its results.
+    Resumes without result (failed requests) stay "new" for the next analysis run.
+    """
+    try:
+        logger.info(f"ingest_resume_analysis_batch: started. User_id: {bot_user_id}, batch_id: {batch_id}")
+
+        # ----- PREPARE paths -----
+
+        target_vacancy_id = get_target_vacancy_id_from_db(bot_user_id=bot_user_id)
+        resume_data_dir = get_vacancy_resumes_directory(vacancy_id=target_vacancy_id)
+        new_resume_data_path = Path(resume_data_dir) / "new"
+        passed_resume_data_path = Path(resume_data_dir) / "passed"
+        failed_resume_data_path = Path(resume_data_dir) / "failed"
+        vacancy_description, sourcing_criterias, resume_analysis_prompt = load_resume_analysis_inputs(target_vacancy_id=target_vacancy_id)
+
+        # ----- WAIT FOR BATCH and DOWNLOAD results -----
+
+        batch = await wait_for_batch_completion(batch_id=batch_id)
+        batch_results = await download_batch_results(batch=batch)
+
+        # ----- SORT RESUMES with batch results -----
+
+        success_count = 0
+        fail_count = 0
+        for resume_id, ai_analysis_result in batch_results.items():
+            try:
+                if "error" in ai_analysis_result:
+                    raise ValueError(f"request failed in batch: {ai_analysis_result['error']}")
+                resume_sorting_status = get_column_value_by_fields(db_model=Negotiations, search_values={"resume_id": resume_id, "vacancy_id": target_vacancy_id}, target_field_name="resume_sorting_status")
+                if resume_sorting_status is None:
+                    raise ValueError(f"negotiation not found in DB for resume {resume_id} and vacancy {target_vacancy_id}")
+                if resume_sorting_status != "new":
+                    logger.warning(f"ingest_resume_analysis_batch: resume {resume_id} is already sorted as '{resume_sorting_status}', skipping")
+                    continue
+                resume_json_path = new_resume_data_path / f"resume_{resume_id}.json"
+                with open(resume_json_path, "r", encoding="utf-8") as rf:
+                    resume_json = json.load(rf)
+                await asyncio.to_thread(
+                    resume_analysis_cache.put,
+                    cache_key=build_resume_analysis_cache_key(
+                        vacancy_description=vacancy_description,
+                        sourcing_criterias=sourcing_criterias,
+                        resume_data=resume_json,
+                        prompt_resume_analysis_text=resume_analysis_prompt,
+                        model=MODEL_NAME,
+                    ),
+                    analysis=ai_analysis_result,
+                    sourcing_criterias=sourcing_criterias,
+                    prompt_resume_analysis_text=resume_analysis_prompt,
+                    model=MODEL_NAME,
+                    vacancy_id=target_vacancy_id,
+                )
+                await save_resume_analysis_and_sort_resume(
+                    bot_user_id=bot_user_id,
+                    target_vacancy_id=target_vacancy_id,
+                    resume_id=resume_id,
+                    resume_json_path=resume_json_path,
+                    ai_analysis_result=ai_analysis_result,
+                    passed_resume_data_path=passed_resume_data_path,
+                    failed_resume_data_path=failed_resume_data_path,
+                )
+                success_count += 1
+            except Exception as e:
+                logger.error(f"ingest_resume_analysis_batch: Failed to ingest result of resume {resume_id}: {e}", exc_info=True)
+                fail_count += 1
+
+        logger.info(f"ingest_resume_analysis_batch: Completed for batch {batch_id} (status '{batch.status}'). Success: {success_count}, Failed: {fail_count}")
+
     except Exception as e:
-        logger.error(f"Failed to process resume analysis for {resume_id}: {e}", exc_info=True)
+        logger.error(f"ingest_resume_analysis_batch: Failed. user_id {bot_user_id}, batch_id {batch_id}: {e}", exc_info=True)
         raise
 
 
 async def send_message_to_applicant_command(bot_user_id: str, resume_id: str) -> None:
     # TAGS: [resume_related]
-    """Sends message to applicant. Triggers 'change_employer_state_command'."""
+    """Records message to applicant in the outbox. Triggers 'change_employer_state_command'.
+    POST request to HH.ru is executed by 'negotiation_message_outbox' workers in the background,
+    the same message is never sent twice to the same negotiation."""
     
     # ----- IDENTIFY USER and pull required data from records -----
     
-    access_token = get_access_token_from_records(bot_user_id=bot_user_id)
-    target_vacancy_id = get_target_vacancy_id_from_records(record_id=bot_user_id)
+    target_vacancy_id = get_column_value_by_field(db_model=Vacancies, search_field_name="manager_id", search_value=bot_user_id, target_field_name="id")
+    negotiation_id = get_column_value_by_fields(db_model=Negotiations, search_values={"resume_id": resume_id, "vacancy_id": target_vacancy_id}, target_field_name="id")
 
-    # ----- SEND MESSAGE TO APPLICANT  -----
+    # ----- ENQUEUE MESSAGE TO APPLICANT  -----
 
-    # Get negotiation ID from resume record
-    negotiation_id = get_negotiation_id_from_resume_record(bot_user_id=bot_user_id, vacancy_id=target_vacancy_id, resume_record_id=resume_id)
     # Create Telegram bot link for applicant
     tg_link = create_tg_bot_link_for_applicant(bot_user_id=bot_user_id, vacancy_id=target_vacancy_id, resume_id=resume_id)
     negotiation_message_text = APPLICANT_MESSAGE_TEXT_WITHOUT_LINK + f"{tg_link}"
-    logger.debug(f"Sending message to applicant for negotiation ID: {negotiation_id}")
+    logger.debug(f"Enqueuing message to applicant for negotiation ID: {negotiation_id}")
     try:
-        send_negotiation_message(access_token=access_token, negotiation_id=negotiation_id, user_message=negotiation_message_text)
-        logger.info(f"Message to applicant for negotiation ID: {negotiation_id} has been successfully sent")
+        if not negotiation_id:
+            raise ValueError(f"Negotiation not found for resume {resume_id} and vacancy {target_vacancy_id}")
+        is_new_message = await negotiation_message_outbox.enqueue(
+            negotiation_id=negotiation_id,
+            manager_id=bot_user_id,
+            template=NEGOTIATION_MESSAGE_TEMPLATE_VIDEO_REQUEST,
+            message_text=negotiation_message_text,
+        )
+        if is_new_message:
+            logger.info(f"Message to applicant for negotiation ID: {negotiation_id} has been enqueued")
+        else:
+            logger.info(f"Message to applicant for negotiation ID: {negotiation_id} has already been enqueued or sent, skipping")
     except Exception as send_err:
-        logger.error(f"Failed to send message for negotiation ID {negotiation_id}: {send_err}", exc_info=True)
-        # stop method execution in this case, because no need to update resume_records and negotiations status
-        return
-
-    # ----- UPDATE RESUME_RECORDS file with new status of request to shoot resume video -----
-
-    new_status_of_request_to_shoot_resume_video = "yes"
-    update_resume_record_with_top_level_key(bot_user_id=bot_user_id, vacancy_id=target_vacancy_id, resume_record_id=resume_id, key="request_to_shoot_resume_video_sent", value=new_status_of_request_to_shoot_resume_video)
-    # If cannot update resume records, ValueError is raised from method: update_resume_record_with_top_level_key()
+        logger.error(f"Failed to enqueue message for negotiation ID {negotiation_id}: {send_err}", exc_info=True)
 
 
 async def change_employer_state_command(bot_user_id: str, resume_id: str) -> None:
     # TAGS: [resume_related]
-    """Trigger send message to applicant command handler - allows users to send message to applicant."""
+    """Submits change of employer state of the negotiation to 'consider'.
+    PUT request to HH.ru is executed by 'employer_state_dispatcher' in the background,
+    so AI analysis task is not blocked by HH.ru latency."""
 
     logger.info(f"change_employer_state_command started. user_id: {bot_user_id}")
     
     # ----- IDENTIFY USER and pull required data from records -----
     
-    access_token = get_access_token_from_records(bot_user_id=bot_user_id)
-    target_vacancy_id = get_target_vacancy_id_from_records(record_id=bot_user_id)
-    negotiation_id = get_negotiation_id_from_resume_record(bot_user_id=bot_user_id, vacancy_id=target_vacancy_id, resume_record_id=resume_id)
+    target_vacancy_id = get_column_value_by_field(db_model=Vacancies, search_field_name="manager_id", search_value=bot_user_id, target_field_name="id")
+    negotiation_id = get_column_value_by_fields(db_model=Negotiations, search_values={"resume_id": resume_id, "vacancy_id": target_vacancy_id}, target_field_name="id")
 
-   # ----- CHANGE EMPLOYER STATE  -----
+   # ----- SUBMIT CHANGE OF EMPLOYER STATE  -----
 
-    #await update.message.reply_text(f"Изменяю статус приглашения кандидата на {NEW_EMPLOYER_STATE}...")
-    logger.debug(f"Changing collection status of negotiation ID: {negotiation_id} to {EMPLOYER_STATE_CONSIDER}")
+    logger.debug(f"Submitting change of collection status of negotiation ID: {negotiation_id} to {EMPLOYER_STATE_CONSIDER}")
     try:
-        change_negotiation_collection_status_to_consider(
-            access_token=access_token,
-            negotiation_id=negotiation_id
+        if not negotiation_id:
+            raise ValueError(f"Negotiation not found for resume {resume_id} and vacancy {target_vacancy_id}")
+        await employer_state_dispatcher.submit(
+            negotiation_id=negotiation_id,
+            manager_id=bot_user_id,
+            target_state=EMPLOYER_STATE_CONSIDER,
         )
-        logger.info(f"Collection status of negotiation ID: {negotiation_id} has been successfully changed to {EMPLOYER_STATE_CONSIDER}")
+        logger.info(f"Change of collection status of negotiation ID: {negotiation_id} to {EMPLOYER_STATE_CONSIDER} has been submitted")
     except Exception as status_err:
-        logger.error(f"Failed to change collection status for negotiation ID {negotiation_id}: {status_err}", exc_info=True)
+        logger.error(f"Failed to submit change of collection status for resume ID {resume_id}: {status_err}", exc_info=True)
 
 
 async def update_resume_records_with_fresh_video_from_applicants_triggered_by_admin_command(bot_user_id: str, vacancy_id: str) -> None:
@@ -5,6 +5,7 @@ import json
 import logging
 import os
 import sys
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import Optional, Any
 
@@ -20,6 +21,11 @@ from telegram.error import TelegramError
 from shared_services.constants import (
     FAIL_TO_IDENTIFY_USER_AS_ADMIN_TEXT,
     FAIL_TECHNICAL_SUPPORT_TEXT,
+    AI_RESUMES_PER_REQUEST,
+    RESUMES_TOP_N_PREVIEW,
+    MODEL_NAME,
+    AI_SCREENING_MODEL_NAME,
+    AI_USAGE_SUMMARY_DAYS,
 )
 
 from shared_services.db_service import (
@@ -41,6 +47,22 @@ from shared_services.data_service import (
 
 from shared_services.questionnaire_service import send_message_to_user
 
+from shared_services.token_service import hh_token_manager
+
+from shared_services.circuit_breaker_service import (
+    ALL_CIRCUIT_BREAKERS,
+    CIRCUIT_STATE_CLOSED,
+    CIRCUIT_STATE_HALF_OPEN,
+    CIRCUIT_STATE_OPEN,
+    get_circuit_breakers_status,
+)
+
+from shared_services.metrics_service import metrics_registry
+
+from shared_services.ai_cache_service import resume_analysis_cache
+from shared_services.ai_service import get_tiered_routing_stats
+from shared_services.ai_usage_service import AI_USAGE_GROUP_BY_COLUMNS, format_ai_usage_summary
+
 from manager_bot.manager_bot import send_message_to_admin
 
 logger = logging.getLogger(__name__)
@@ -86,7 +108,9 @@ async def admin_anazlyze_sourcing_criterais_command(update: Update, context: Con
     #TAGS: [admin]
     """
     Admin command to analyze sourcing criterias for a specific vacancy.
-    Usage: /admin_analyze_sourcing_criterais <vacancy_id>
+    Usage: /admin_analyze_criterias <vacancy_id> [force]
+    Criterias of vacancy with the same description are reused from cache.
+    'force' - regenerate criterias by AI (also if they are already received), the cached ones are replaced.
     Only accessible to users whose ID is in the ADMIN_IDS whitelist.
     """
 
@@ -107,7 +131,8 @@ async def admin_anazlyze_sourcing_criterais_command(update: Update, context: Con
         # ----- PARSE COMMAND ARGUMENTS -----
 
         vacancy_id = None
-        if context.args and len(context.args) == 1:
+        force = bool(context.args) and len(context.args) == 2 and context.args[1].lower() == "force"
+        if context.args and (len(context.args) == 1 or force):
             vacancy_id = context.args[0]
             if vacancy_id:
                 # Verify that the vacancy exists
@@ -116,16 +141,16 @@ async def admin_anazlyze_sourcing_criterais_command(update: Update, context: Con
                     if is_boolean_field_true_in_db(db_model=Vacancies, record_id=vacancy_id, field_name="description_recieved"):
                         # Import here to avoid circular dependency
                         from manager_bot.manager_bot import define_sourcing_criterias_triggered_by_admin_command
-                        await define_sourcing_criterias_triggered_by_admin_command(vacancy_id=vacancy_id)
-                        await send_message_to_user(update, context, text=f"Task for analysing sourcing criterias is in task_queue for vacancy {vacancy_id}.")
+                        await define_sourcing_criterias_triggered_by_admin_command(vacancy_id=vacancy_id, force=force)
+                        await send_message_to_user(update, context, text=f"Task for analysing sourcing criterias is in task_queue for vacancy {vacancy_id}{' (forced regeneration)' if force else ''}.")
                     else:
                         raise ValueError(f"Vacancy {vacancy_id} does not have vacancy description received.")     
                 else:
                     raise ValueError(f"Vacancy {vacancy_id} not found in database.")  
             else:
-                raise ValueError(f"Invalid command arguments. Usage: /admin_analyze_criterias <vacancy_id>")
+                raise ValueError(f"Invalid command arguments. Usage: /admin_analyze_criterias <vacancy_id> [force]")
         else:
-            raise ValueError(f"Invalid number of arguments. Usage: /admin_analyze_criterias <vacancy_id>")
+            raise ValueError(f"Invalid number of arguments. Usage: /admin_analyze_criterias <vacancy_id> [force]")
     
     except Exception as e:
         logger.error(f"admin_anazlyze_sourcing_criterais_command: Failed to execute command: {e}", exc_info=True)
@@ -324,26 +349,45 @@ async def admin_anazlyze_resumes_command(update: Update, context: ContextTypes.D
 
         # ----- PARSE COMMAND ARGUMENTS -----
 
+        # Usage: /admin_analyze_resumes <user_id> [batch [<batch_id>] | multi [<resumes_per_request>]]
+        # 'batch' - submit resumes to OpenAI Batch API, 'batch <batch_id>' - ingest results of already submitted batch (e.g. after restart)
+        # 'multi' - score short resumes in groups by one request (AI_RESUMES_PER_REQUEST resumes by default)
+        usage_text = "Usage: /admin_analyze_resumes <user_id> [batch [<batch_id>] | multi [<resumes_per_request>]]"
         target_user_id = None
-        if context.args and len(context.args) == 1:
+        if context.args and 1 <= len(context.args) <= 3:
             target_user_id = context.args[0]
+            mode = context.args[1].lower() if len(context.args) >= 2 else None
+            use_batch = mode == "batch"
+            batch_id = context.args[2] if use_batch and len(context.args) == 3 else None
+            resumes_per_request = 1
+            if mode == "multi":
+                resumes_per_request = int(context.args[2]) if len(context.args) == 3 else AI_RESUMES_PER_REQUEST
+            if mode not in (None, "batch", "multi") or resumes_per_request < 1:
+                raise ValueError(f"Invalid command arguments. {usage_text}")
             if target_user_id:
                 """if is_user_in_records(record_id=target_user_id):"""
                 if is_value_in_db(db_model=Managers, field_name="id", value=target_user_id):
                     if is_vacany_data_enough_for_resume_analysis(user_id=target_user_id):
-                        await send_message_to_user(update, context, text=f"Start creating tasks for analysis of the fresh resumes for user {target_user_id}.")
                         # Import here to avoid circular dependency
-                        from manager_bot.manager_bot import analyze_resume_triggered_by_admin_command
-                        await analyze_resume_triggered_by_admin_command(bot_user_id=target_user_id)
-                        await send_message_to_user(update, context, text=f"Analysis of fresh resumes is done for user {target_user_id}.")
+                        from manager_bot.manager_bot import analyze_resume_triggered_by_admin_command, start_resume_analysis_batch_ingestion
+                        if batch_id:
+                            start_resume_analysis_batch_ingestion(bot_user_id=target_user_id, batch_id=batch_id)
+                            await send_message_to_user(update, context, text=f"Waiting for batch {batch_id} to ingest resume analysis results for user {target_user_id}.")
+                        elif use_batch:
+                            batch_id = await analyze_resume_triggered_by_admin_command(bot_user_id=target_user_id, use_batch=True)
+                            await send_message_to_user(update, context, text=f"Fresh resumes of user {target_user_id} are submitted in batch {batch_id}. Results will be ingested once the batch is completed.")
+                        else:
+                            await send_message_to_user(update, context, text=f"Start creating tasks for analysis of the fresh resumes for user {target_user_id}.")
+                            await analyze_resume_triggered_by_admin_command(bot_user_id=target_user_id, resumes_per_request=resumes_per_request)
+                            await send_message_to_user(update, context, text=f"Analysis of fresh resumes is done for user {target_user_id}.")
                     else:
                         raise ValueError(f"User {target_user_id} does not have enough vacancy data for resume analysis.")
                 else:
                     raise ValueError(f"User {target_user_id} not found in records.")
             else:
-                raise ValueError(f"Invalid command arguments. Usage: /admin_analyze_resumes <user_id>")
+                raise ValueError(f"Invalid command arguments. {usage_text}")
         else:
-            raise ValueError(f"Invalid number of arguments. Usage: /admin_analyze_resumes <user_id>")
+            raise ValueError(f"Invalid number of arguments. Usage: /admin_analyze_resumes <user_id> [batch [<batch_id>] | multi [<resumes_per_request>]]")
     
     except Exception as e:
         logger.error(f"admin_anazlyze_resumes_command: Failed to execute command: {e}", exc_info=True)
@@ -973,6 +1017,10 @@ async def admin_update_db_command(update: Update, context: ContextTypes.DEFAULT_
                 record_id=record_id,
                 updates={column_name: new_value}
             )
+
+            # Drop cached HH token, so the manually updated one is used for next HH.ru calls
+            if db_model is Managers and column_name in ("access_token", "access_token_expires_at", "refresh_token"):
+                hh_token_manager.invalidate(manager_id=record_id)
             
             # Get updated value to confirm
             updated_value = get_column_value_in_db(db_model=db_model, record_id=record_id, field_name=column_name)
@@ -1006,3 +1054,376 @@ async def admin_update_db_command(update: Update, context: ContextTypes.DEFAULT_
                 application=context.application,
                 text=f"⚠️ Error admin_update_db_command: {e}\nAdmin ID: {bot_user_id if 'bot_user_id' in locals() else 'unknown'}"
             )
+
+
+async def admin_circuit_breakers_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    #TAGS: [admin]
+    """
+    Admin command to show state of circuit breakers of external APIs (HH.ru, callback endpoint).
+    Usage: /admin_circuit_breakers [reset]
+    'reset' closes all circuits manually (e.g. after upstream recovered).
+    Only accessible to users whose ID is in the ADMIN_IDS whitelist.
+    """
+
+    try:
+        # ----- IDENTIFY USER and pull required data from records -----
+
+        bot_user_id = str(get_tg_user_data_attribute_from_update_object(update=update, tg_user_attribute="id"))
+        logger.info(f"admin_circuit_breakers_command: started. User_id: {bot_user_id}")
+
+        #  ----- CHECK IF USER IS NOT AN ADMIN and STOP if it is -----
+
+        admin_id = os.getenv("ADMIN_ID", "")
+        if not admin_id or bot_user_id != admin_id:
+            await send_message_to_user(update, context, text=FAIL_TO_IDENTIFY_USER_AS_ADMIN_TEXT)
+            logger.error(f"Unauthorized for {bot_user_id}")
+            return
+
+        # ----- PARSE COMMAND ARGUMENTS -----
+
+        if context.args:
+            if len(context.args) == 1 and context.args[0] == "reset":
+                for circuit_breaker in ALL_CIRCUIT_BREAKERS:
+                    circuit_breaker.reset()
+                logger.info(f"admin_circuit_breakers_command: all circuits reset by admin {bot_user_id}")
+            else:
+                raise ValueError(f"Invalid command arguments. Usage: /admin_circuit_breakers [reset]")
+
+        # ----- SEND STATE OF CIRCUIT BREAKERS -----
+
+        state_icons = {CIRCUIT_STATE_CLOSED: "🟢", CIRCUIT_STATE_HALF_OPEN: "🟡", CIRCUIT_STATE_OPEN: "🔴"}
+        status_lines = [
+            f"{state_icons.get(status['state'], '')} {status['name']}: {status['state']}, "
+            f"failures in a row: {status['consecutive_failures']}, rejected calls: {status['rejected_calls']}"
+            + (f", open for {status['open_for_secs']}s" if status["state"] != CIRCUIT_STATE_CLOSED else "")
+            for status in get_circuit_breakers_status()
+        ]
+        await send_message_to_user(update, context, text="🔌 Circuit breakers:\n" + "\n".join(status_lines))
+
+    except Exception as e:
+        logger.error(f"admin_circuit_breakers_command: Failed to execute command: {e}", exc_info=True)
+        # Send notification to admin about the error
+        if context.application:
+            await send_message_to_admin(
+                application=context.application,
+                text=f"⚠️ Error admin_circuit_breakers_command: {e}\nAdmin ID: {bot_user_id if 'bot_user_id' in locals() else 'unknown'}"
+            )
+
+
+async def admin_hh_metrics_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    #TAGS: [admin]
+    """
+    Admin command to show HH.ru API metrics: requests by endpoint and status, latency and payload size percentiles.
+    Usage: /admin_hh_metrics
+    Only accessible to users whose ID is in the ADMIN_IDS whitelist.
+    """
+
+    try:
+        # ----- IDENTIFY USER and pull required data from records -----
+
+        bot_user_id = str(get_tg_user_data_attribute_from_update_object(update=update, tg_user_attribute="id"))
+        logger.info(f"admin_hh_metrics_command: started. User_id: {bot_user_id}")
+
+        #  ----- CHECK IF USER IS NOT AN ADMIN and STOP if it is -----
+
+        admin_id = os.getenv("ADMIN_ID", "")
+        if not admin_id or bot_user_id != admin_id:
+            await send_message_to_user(update, context, text=FAIL_TO_IDENTIFY_USER_AS_ADMIN_TEXT)
+            logger.error(f"Unauthorized for {bot_user_id}")
+            return
+
+        # ----- SEND METRICS SUMMARY -----
+
+        summary = metrics_registry.format_summary(name_prefix="hh_") or "no HH.ru requests yet"
+        # Telegram limits message length to 4096 characters
+        await send_message_to_user(update, context, text=f"📊 HH.ru metrics:\n{summary}"[:4000])
+
+    except Exception as e:
+        logger.error(f"admin_hh_metrics_command: Failed to execute command: {e}", exc_info=True)
+        # Send notification to admin about the error
+        if context.application:
+            await send_message_to_admin(
+                application=context.application,
+                text=f"⚠️ Error admin_hh_metrics_command: {e}\nAdmin ID: {bot_user_id if 'bot_user_id' in locals() else 'unknown'}"
+            )
+
+
+async def admin_ai_cache_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    #TAGS: [admin]
+    """
+    Admin command to show hit rate of AI resume analysis cache, tiered scoring stats, AI metrics (including
+    cached prompt tokens per vacancy) and invalidate cached analyses.
+    Usage: /admin_ai_cache [invalidate vacancy <vacancy_id> | invalidate prompt | invalidate all]
+    'vacancy' drops analyses made with current sourcing criterias of the vacancy,
+    'prompt' drops analyses made with any resume analysis prompt except the current one.
+    Only accessible to users whose ID is in the ADMIN_IDS whitelist.
+    """
+
+    try:
+        # ----- IDENTIFY USER and pull required data from records -----
+
+        bot_user_id = str(get_tg_user_data_attribute_from_update_object(update=update, tg_user_attribute="id"))
+        logger.info(f"admin_ai_cache_command: started. User_id: {bot_user_id}")
+
+        #  ----- CHECK IF USER IS NOT AN ADMIN and STOP if it is -----
+
+        admin_id = os.getenv("ADMIN_ID", "")
+        if not admin_id or bot_user_id != admin_id:
+            await send_message_to_user(update, context, text=FAIL_TO_IDENTIFY_USER_AS_ADMIN_TEXT)
+            logger.error(f"Unauthorized for {bot_user_id}")
+            return
+
+        # ----- PARSE COMMAND ARGUMENTS and INVALIDATE if requested -----
+
+        usage_text = "Usage: /admin_ai_cache [invalidate vacancy <vacancy_id> | invalidate prompt | invalidate all]"
+        args = context.args or []
+        if args:
+            if args[0].lower() != "invalidate" or len(args) < 2:
+                raise ValueError(f"Invalid command arguments. {usage_text}")
+            target = args[1].lower()
+            if target == "vacancy" and len(args) == 3:
+                vacancy_id = args[2]
+                sourcing_criterias = get_column_value_in_db(db_model=Vacancies, record_id=vacancy_id, field_name="sourcing_criterias_json")
+                if not sourcing_criterias:
+                    raise ValueError(f"Vacancy {vacancy_id} does not have sourcing criterias in DB.")
+                deleted_count = resume_analysis_cache.invalidate_criterias(sourcing_criterias=sourcing_criterias, vacancy_id=vacancy_id)
+            elif target == "prompt" and len(args) == 2:
+                # Import here to avoid circular dependency
+                from manager_bot.manager_bot import load_resume_analysis_prompt
+                deleted_count = resume_analysis_cache.invalidate_outdated_prompts(current_prompt_resume_analysis_text=load_resume_analysis_prompt())
+            elif target == "all" and len(args) == 2:
+                deleted_count = resume_analysis_cache.invalidate_all()
+            else:
+                raise ValueError(f"Invalid command arguments. {usage_text}")
+            await send_message_to_user(update, context, text=f"{deleted_count} cached analyses invalidated.")
+
+        # ----- SEND CACHE STATS -----
+
+        stats = resume_analysis_cache.stats()
+        await send_message_to_user(
+            update,
+            context,
+            text=(
+                f"🗄 AI resume analysis cache:\n"
+                f"hits: {stats['hits']}, misses: {stats['misses']}, hit rate: {stats['hit_rate']:.0%}\n"
+                f"stored analyses: {stats['entries']}"
+            ),
+        )
+        tiered_routing_stats = get_tiered_routing_stats()
+        await send_message_to_user(
+            update,
+            context,
+            text=(
+                f"🪜 Tiered scoring ({AI_SCREENING_MODEL_NAME} → {MODEL_NAME}):\n"
+                f"resumes: {tiered_routing_stats['resumes']}, escalated: {tiered_routing_stats['escalated']} "
+                f"({tiered_routing_stats['escalation_rate']:.0%})\n"
+                f"pass/fail agreement of escalated resumes: {tiered_routing_stats['agreement_rate']:.0%}"
+            ),
+        )
+        # Prompt tokens and tokens served from OpenAI prompt cache per vacancy, call latency
+        ai_metrics_summary = metrics_registry.format_summary(name_prefix="ai_") or "no AI calls yet"
+        # Telegram limits message length to 4096 characters
+        await send_message_to_user(update, context, text=f"📊 AI metrics:\n{ai_metrics_summary}"[:4000])
+
+    except Exception as e:
+        logger.error(f"admin_ai_cache_command: Failed to execute command: {e}", exc_info=True)
+        # Send notification to admin about the error
+        if context.application:
+            await send_message_to_admin(
+                application=context.application,
+                text=f"⚠️ Error admin_ai_cache_command: {e}\nAdmin ID: {bot_user_id if 'bot_user_id' in locals() else 'unknown'}"
+            )
+
+
+async def admin_top_resumes_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    #TAGS: [admin]
+    """
+    Admin command to preview resumes of the user's target vacancy ranked by embedding similarity to it.
+    Cheap (no AI scoring), so it is available long before AI analysis of all resumes is done.
+    Usage: /admin_top_resumes <user_id> [<top_n>] [send]
+    'send' - also send the preview to the user (manager).
+    Only accessible to users whose ID is in the ADMIN_IDS whitelist.
+    """
+
+    try:
+        # ----- IDENTIFY USER and pull required data from records -----
+
+        bot_user_id = str(get_tg_user_data_attribute_from_update_object(update=update, tg_user_attribute="id"))
+        logger.info(f"admin_top_resumes_command: started. User_id: {bot_user_id}")
+
+        #  ----- CHECK IF USER IS NOT AN ADMIN and STOP if it is -----
+
+        admin_id = os.getenv("ADMIN_ID", "")
+        if not admin_id or bot_user_id != admin_id:
+            await send_message_to_user(update, context, text=FAIL_TO_IDENTIFY_USER_AS_ADMIN_TEXT)
+            logger.error(f"Unauthorized for {bot_user_id}")
+            return
+
+        # ----- PARSE COMMAND ARGUMENTS -----
+
+        usage_text = "Usage: /admin_top_resumes <user_id> [<top_n>] [send]"
+        args = list(context.args or [])
+        if not args or len(args) > 3:
+            raise ValueError(f"Invalid number of arguments. {usage_text}")
+        target_user_id = args.pop(0)
+        send_to_user = bool(args) and args[-1].lower() == "send"
+        if send_to_user:
+            args.pop()
+        top_n = int(args[0]) if args else RESUMES_TOP_N_PREVIEW
+        if top_n < 1:
+            raise ValueError(f"Invalid command arguments. {usage_text}")
+        if not is_value_in_db(db_model=Managers, field_name="id", value=target_user_id):
+            raise ValueError(f"User {target_user_id} not found in records.")
+
+        # ----- BUILD PREVIEW and SEND it -----
+
+        # Import here to avoid circular dependency
+        from manager_bot.manager_bot import build_top_resumes_preview_text
+        preview_text = await build_top_resumes_preview_text(bot_user_id=target_user_id, top_n=top_n)
+        # Telegram limits message length to 4096 characters
+        await send_message_to_user(update, context, text=preview_text[:4000])
+        if send_to_user:
+            if not (context.application and context.application.bot):
+                raise ValueError("Application or bot instance not available")
+            await context.application.bot.send_message(chat_id=int(target_user_id), text=preview_text[:4000])
+            await send_message_to_user(update, context, text=f"✅ Preview sent to user {target_user_id}.")
+
+    except Exception as e:
+        logger.error(f"admin_top_resumes_command: Failed to execute command: {e}", exc_info=True)
+        # Send notification to admin about the error
+        if context.application:
+            await send_message_to_admin(
+                application=context.application,
+                text=f"⚠️ Error admin_top_resumes_command: {e}\nAdmin ID: {bot_user_id if 'bot_user_id' in locals() else 'unknown'}"
+            )
+
+
+async def admin_ai_usage_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    #TAGS: [admin]
+    """
+    Admin command to show AI usage from 'ai_usage_ledger': cost, requests, failures, retries, tokens and latency.
+    Usage: /admin_ai_usage [vacancy | manager | model | prompt | operation] [<days>]
+    Groups by vacancy for the last AI_USAGE_SUMMARY_DAYS days by default.
+    'prompt' groups by prompt hash, so latency and tokens before and after prompt changes can be compared.
+    Only accessible to users whose ID is in the ADMIN_IDS whitelist.
+    """
+
+    try:
+        # ----- IDENTIFY USER and pull required data from records -----
+
+        bot_user_id = str(get_tg_user_data_attribute_from_update_object(update=update, tg_user_attribute="id"))
+        logger.info(f"admin_ai_usage_command: started. User_id: {bot_user_id}")
+
+        #  ----- CHECK IF USER IS NOT AN ADMIN and STOP if it is -----
+
+        admin_id = os.getenv("ADMIN_ID", "")
+        if not admin_id or bot_user_id != admin_id:
+            await send_message_to_user(update, context, text=FAIL_TO_IDENTIFY_USER_AS_ADMIN_TEXT)
+            logger.error(f"Unauthorized for {bot_user_id}")
+            return
+
+        # ----- PARSE COMMAND ARGUMENTS -----
+
+        usage_text = f"Usage: /admin_ai_usage [{' | '.join(AI_USAGE_GROUP_BY_COLUMNS)}] [<days>]"
+        args = list(context.args or [])
+        if len(args) > 2:
+            raise ValueError(f"Invalid number of arguments. {usage_text}")
+        group_by = "vacancy"
+        days = AI_USAGE_SUMMARY_DAYS
+        for arg in args:
+            if arg.isdigit() and int(arg) > 0:
+                days = int(arg)
+            elif arg.lower() in AI_USAGE_GROUP_BY_COLUMNS:
+                group_by = arg.lower()
+            else:
+                raise ValueError(f"Invalid command arguments. {usage_text}")
+
+        # ----- SEND USAGE SUMMARY -----
+
+        summary_text = format_ai_usage_summary(group_by=group_by, days=days)
+        # Telegram limits message length to 4096 characters
+        await send_message_to_user(update, context, text=f"💰 {summary_text}"[:4000])
+
+    except Exception as e:
+        logger.error(f"admin_ai_usage_command: Failed to execute command: {e}", exc_info=True)
+        # Send notification to admin about the error
+        if context.application:
+            await send_message_to_admin(
+                application=context.application,
+                text=f"⚠️ Error admin_ai_usage_command: {e}\nAdmin ID: {bot_user_id if 'bot_user_id' in locals() else 'unknown'}"
+            )
+
+
+async def admin_dead_letters_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    #TAGS: [admin]
+    """
+    Admin command to show AI tasks which failed all attempts (dead letters of 'ai_task_queue') and replay them.
+    Also shows depth of priority lanes of the queue and task wait times.
+    Usage: /admin_dead_letters [replay [<task_id>] | clear]
+    'replay' - put dead letters (all or one) back to the queue, only these tasks are run again.
+    'clear' - forget dead letters.
+    Only accessible to users whose ID is in the ADMIN_IDS whitelist.
+    """
+
+    try:
+        # ----- IDENTIFY USER and pull required data from records -----
+
+        bot_user_id = str(get_tg_user_data_attribute_from_update_object(update=update, tg_user_attribute="id"))
+        logger.info(f"admin_dead_letters_command: started. User_id: {bot_user_id}")
+
+        #  ----- CHECK IF USER IS NOT AN ADMIN and STOP if it is -----
+
+        admin_id = os.getenv("ADMIN_ID", "")
+        if not admin_id or bot_user_id != admin_id:
+            await send_message_to_user(update, context, text=FAIL_TO_IDENTIFY_USER_AS_ADMIN_TEXT)
+            logger.error(f"Unauthorized for {bot_user_id}")
+            return
+
+        # Import here to avoid circular dependency
+        from manager_bot.manager_bot import ai_task_queue
+
+        # ----- PARSE COMMAND ARGUMENTS and REPLAY or CLEAR if requested -----
+
+        usage_text = "Usage: /admin_dead_letters [replay [<task_id>] | clear]"
+        args = context.args or []
+        if args:
+            action = args[0].lower()
+            if action == "replay" and len(args) <= 2:
+                task_keys = [args[1]] if len(args) == 2 else None
+                replayed_count = await ai_task_queue.replay_dead_letters(task_keys=task_keys)
+                await send_message_to_user(update, context, text=f"🔁 {replayed_count} dead letter(s) put back to the queue.")
+            elif action == "clear" and len(args) == 1:
+                cleared_count = ai_task_queue.clear_dead_letters()
+                await send_message_to_user(update, context, text=f"🗑 {cleared_count} dead letter(s) cleared.")
+            else:
+                raise ValueError(f"Invalid command arguments. {usage_text}")
+            return
+
+        # ----- SEND LIST OF DEAD LETTERS -----
+
+        # Depth of priority lanes and wait time metrics show if bulk work delays interactive tasks
+        lane_sizes_text = ", ".join(f"{lane}: {size}" for lane, size in ai_task_queue.lane_sizes().items())
+        queue_metrics_summary = metrics_registry.format_summary(name_prefix="task_queue_wait_secs") or "no tasks yet"
+        queue_text = f"📥 AI task queue lanes: {lane_sizes_text}\n{queue_metrics_summary}"
+        dead_letters = ai_task_queue.get_dead_letters()
+        if not dead_letters:
+            await send_message_to_user(update, context, text=f"{queue_text}\n\n✅ No dead letters.")
+            return
+        lines = [queue_text, "", f"☠️ Dead letters of AI tasks: {len(dead_letters)}"]
+        for task_key, dead_letter in dead_letters.items():
+            failed_at = datetime.fromtimestamp(dead_letter.failed_at, tz=timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
+            lines.append(
+                f"{task_key}: {getattr(dead_letter.task.func, '__name__', 'task')}, "
+                f"{dead_letter.task.attempt} attempt(s), failed at {failed_at}\n  {dead_letter.error[:300]}"
+            )
+        # Telegram limits message length to 4096 characters
+        await send_message_to_user(update, context, text="\n".join(lines)[:4000])
+
+    except Exception as e:
+        logger.error(f"admin_dead_letters_command: Failed to execute command: {e}", exc_info=True)
+        # Send notification to admin about the error
+        if context.application:
+            await send_message_to_admin(
+                application=context.application,
+                text=f"⚠️ Error admin_dead_letters_command: {e}\nAdmin ID: {bot_user_id if 'bot_user_id' in locals() else 'unknown'}"
+            )
@@ -0,0 +1,179 @@
+# TAGS: [rate_limit]
+# Requests-per-minute / tokens-per-minute budget and adaptive concurrency for OpenAI calls
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Deque, Optional
+
+from shared_services.constants import (
+    AI_REQUESTS_PER_MINUTE,
+    AI_TOKENS_PER_MINUTE,
+    AI_ANALYSIS_WORKERS,
+    AI_MIN_CONCURRENCY,
+    AI_CONCURRENCY_INCREASE_AFTER_SUCCESSES,
+    AI_EXPECTED_OUTPUT_TOKENS,
+)
+
+from shared_services.ai_payload_service import count_tokens
+
+logger = logging.getLogger(__name__)
+
+BUDGET_WINDOW_SECS = 60.0
+
+
+def estimate_tokens(text: str, expected_output_tokens: int = AI_EXPECTED_OUTPUT_TOKENS) -> int:
+    """Token estimate of a request: tokens of prompt plus expected answer."""
+    return count_tokens(text) + expected_output_tokens
+
+
+class _BudgetEntry:
+    """Request started inside the current window and tokens charged for it."""
+
+    def __init__(self, started_at: float, tokens: int):
+        self.started_at = started_at
+        self.tokens = tokens
+
+
+class AIRequestBudget:
+    """Keeps OpenAI calls within account quota:
+    - not more than 'requests_per_minute' requests and 'tokens_per_minute' tokens are started in any 60s window
+      (tokens are estimated from prompt size before the call and corrected by actual usage after it)
+    - not more than 'concurrency_limit' calls are in flight; the limit is halved on rate-limit error
+      and grows by one after 'increase_after_successes' successful calls in a row (AIMD), up to 'max_concurrency'
+    Usage:
+        async with ai_budget.reserve(estimated_tokens) as reservation:
+            response = await async_client.chat.completions.create(...)
+            reservation.actual_tokens = response.usage.total_tokens
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int = AI_REQUESTS_PER_MINUTE,
+        tokens_per_minute: int = AI_TOKENS_PER_MINUTE,
+        max_concurrency: int = AI_ANALYSIS_WORKERS,
+        min_concurrency: int = AI_MIN_CONCURRENCY,
+        increase_after_successes: int = AI_CONCURRENCY_INCREASE_AFTER_SUCCESSES,
+    ):
+        if requests_per_minute <= 0 or tokens_per_minute <= 0:
+            raise ValueError(f"requests_per_minute and tokens_per_minute must be positive, got {requests_per_minute}, {tokens_per_minute}")
+        if not 0 < min_concurrency <= max_concurrency:
+            raise ValueError(f"Expected 0 < min_concurrency <= max_concurrency, got {min_concurrency}, {max_concurrency}")
+        self._requests_per_minute = requests_per_minute
+        self._tokens_per_minute = tokens_per_minute
+        self._max_concurrency = max_concurrency
+        self._min_concurrency = min_concurrency
+        self._increase_after_successes = increase_after_successes
+        self._concurrency_limit = max_concurrency
+        self._in_flight = 0
+        self._successes_in_row = 0
+        # Calls are not started before this time (set after rate-limit error)
+        self._paused_until = 0.0
+        self._window: Deque[_BudgetEntry] = deque()
+        self._condition = asyncio.Condition()
+
+
+    @property
+    def concurrency_limit(self) -> int:
+        return self._concurrency_limit
+
+
+    def _drop_expired_entries(self, now: float) -> None:
+        while self._window and now - self._window[0].started_at >= BUDGET_WINDOW_SECS:
+            self._window.popleft()
+
+
+    def _secs_until_allowed(self, tokens: int, now: float) -> float:
+        """0 if call can be started now, otherwise how long to wait before checking again."""
+        if self._in_flight >= self._concurrency_limit:
+            # Slot is freed by 'release', which notifies waiters
+            return BUDGET_WINDOW_SECS
+        if now < self._paused_until:
+            return self._paused_until - now
+        self._drop_expired_entries(now)
+        window_tokens = sum(entry.tokens for entry in self._window)
+        # Single request bigger than the whole budget is let through when the window is empty
+        tokens_fit = window_tokens + tokens <= self._tokens_per_minute or not self._window
+        if len(self._window) < self._requests_per_minute and tokens_fit:
+            return 0.0
+        # Wait until the oldest request leaves the window
+        return max(0.01, BUDGET_WINDOW_SECS - (now - self._window[0].started_at))
+
+
+    async def acquire(self, estimated_tokens: int) -> _BudgetEntry:
+        """Wait until the call fits concurrency, RPM and TPM budget and charge it."""
+        async with self._condition:
+            while True:
+                now = time.monotonic()
+                wait_secs = self._secs_until_allowed(estimated_tokens, now)
+                if wait_secs <= 0:
+                    break
+                logger.debug(f"AIRequestBudget: waiting up to {wait_secs:.2f}s for budget ({estimated_tokens} tokens)")
+                try:
+                    await asyncio.wait_for(self._condition.wait(), timeout=wait_secs)
+                except asyncio.TimeoutError:
+                    pass
+            entry = _BudgetEntry(started_at=now, tokens=estimated_tokens)
+            self._window.append(entry)
+            self._in_flight += 1
+            return entry
+
+
+    async def release(self, entry: _BudgetEntry, actual_tokens: Optional[int] = None) -> None:
+        """Free concurrency slot and correct charged tokens by actual usage."""
+        async with self._condition:
+            if actual_tokens is not None:
+                entry.tokens = actual_tokens
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+
+    async def record_success(self) -> None:
+        async with self._condition:
+            self._successes_in_row += 1
+            if self._successes_in_row >= self._increase_after_successes and self._concurrency_limit < self._max_concurrency:
+                self._concurrency_limit += 1
+                self._successes_in_row = 0
+                logger.info(f"AIRequestBudget: concurrency limit increased to {self._concurrency_limit}")
+                self._condition.notify_all()
+
+
+    async def record_rate_limited(self, retry_after_secs: float) -> None:
+        """Halve concurrency and pause new calls after rate-limit error from OpenAI."""
+        async with self._condition:
+            self._successes_in_row = 0
+            self._concurrency_limit = max(self._min_concurrency, self._concurrency_limit // 2)
+            self._paused_until = max(self._paused_until, time.monotonic() + retry_after_secs)
+            logger.warning(
+                f"AIRequestBudget: rate limited, concurrency limit decreased to {self._concurrency_limit}, "
+                f"new calls paused for {retry_after_secs:.1f}s"
+            )
+
+
+    def reserve(self, estimated_tokens: int) -> "_BudgetReservation":
+        return _BudgetReservation(budget=self, estimated_tokens=estimated_tokens)
+
+
+class _BudgetReservation:
+    """Async context manager returned by 'AIRequestBudget.reserve'."""
+
+    def __init__(self, budget: AIRequestBudget, estimated_tokens: int):
+        self._budget = budget
+        self._estimated_tokens = estimated_tokens
+        self._entry: Optional[_BudgetEntry] = None
+        # Set by caller from 'response.usage.total_tokens'
+        self.actual_tokens: Optional[int] = None
+
+
+    async def __aenter__(self) -> "_BudgetReservation":
+        self._entry = await self._budget.acquire(self._estimated_tokens)
+        return self
+
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self._budget.release(self._entry, actual_tokens=self.actual_tokens)
+
+
+# Global budget shared by all OpenAI calls of the process
+ai_budget = AIRequestBudget()
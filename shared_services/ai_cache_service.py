@@ -0,0 +1,239 @@
+# TAGS: [ai_related]
+# Content-addressed cache of AI resume analyses stored in Postgres
+
+import hashlib
+import json
+import logging
+import re
+from typing import Any, Dict, Optional
+
+from database import AIAnalysisCacheEntries, SourcingCriteriasCacheEntries
+from shared_services.constants import VACANCY_FIELDS_IGNORED_BY_CRITERIAS_CACHE
+from shared_services.db_service import (
+    count_records_by_fields,
+    delete_records_by_fields,
+    get_column_value_in_db,
+    upsert_records_in_db,
+)
+from shared_services.ai_payload_service import project_resume_for_analysis
+from shared_services.metrics_service import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+CACHE_LOOKUPS_METRIC_NAME = "ai_analysis_cache_lookups_total"
+CRITERIAS_CACHE_LOOKUPS_METRIC_NAME = "ai_criterias_cache_lookups_total"
+
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def build_content_hash(content: Any) -> str:
+    """sha256 of normalized content: dicts and lists are serialized with sorted keys, text is stripped.
+    So key order in JSON and trailing whitespace of prompt files do not change the hash."""
+    if isinstance(content, str):
+        normalized_content = content.strip()
+    else:
+        normalized_content = json.dumps(content, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(normalized_content.encode("utf-8")).hexdigest()
+
+
+def build_resume_analysis_cache_key(
+    vacancy_description: dict,
+    sourcing_criterias: dict,
+    resume_data: dict,
+    prompt_resume_analysis_text: str,
+    model: str,
+) -> str:
+    """Cache key of resume analysis. Vacancy ID is not part of it, so the same resume applying to
+    another vacancy with identical description and criterias reuses the analysis.
+    Resume is hashed as it is sent to AI (projection to scoring fields), so changes of other fields
+    (photo links, update time) do not invalidate the analysis."""
+    content_hashes = [
+        build_content_hash(vacancy_description),
+        build_content_hash(sourcing_criterias),
+        build_content_hash(project_resume_for_analysis(resume_data)),
+        build_content_hash(prompt_resume_analysis_text),
+        model,
+    ]
+    return hashlib.sha256("\n".join(content_hashes).encode("utf-8")).hexdigest()
+
+
+def _normalize_text_values(data: Any) -> Any:
+    """Collapse whitespace (including non-breaking spaces) in all strings, so reformatted text has the same hash."""
+    if isinstance(data, str):
+        return _WHITESPACE_PATTERN.sub(" ", data).strip()
+    if isinstance(data, list):
+        return [_normalize_text_values(item) for item in data]
+    if isinstance(data, dict):
+        return {key: _normalize_text_values(value) for key, value in data.items()}
+    return data
+
+
+def build_vacancy_description_hash(vacancy_description: dict) -> str:
+    """Hash of vacancy description without fields of specific publication (IDs, dates, counters, links),
+    see VACANCY_FIELDS_IGNORED_BY_CRITERIAS_CACHE."""
+    description_content = {
+        field_name: value
+        for field_name, value in vacancy_description.items()
+        if field_name not in VACANCY_FIELDS_IGNORED_BY_CRITERIAS_CACHE
+    } if isinstance(vacancy_description, dict) else vacancy_description
+    return build_content_hash(_normalize_text_values(description_content))
+
+
+def build_sourcing_criterias_cache_key(vacancy_description: dict, prompt_vacancy_analysis_text: str, model: str) -> str:
+    content_hashes = [
+        build_vacancy_description_hash(vacancy_description),
+        build_content_hash(prompt_vacancy_analysis_text),
+        model,
+    ]
+    return hashlib.sha256("\n".join(content_hashes).encode("utf-8")).hexdigest()
+
+
+class ResumeAnalysisCache:
+    """Stores AI resume analyses in 'ai_analysis_cache' table by content hash of the inputs.
+    - lookup or DB errors never fail the analysis, they are treated as cache miss
+    - failed analyses (unparsed model output) are not cached
+    - hits and misses are counted in 'metrics_registry'
+    Usage:
+        cache_key = build_resume_analysis_cache_key(...)
+        analysis = resume_analysis_cache.get(cache_key)
+        if analysis is None:
+            analysis = await analyze(...)
+            resume_analysis_cache.put(cache_key, analysis, sourcing_criterias=..., prompt_resume_analysis_text=..., model=...)
+    """
+
+    def get(self, cache_key: str) -> Optional[dict]:
+        try:
+            analysis = get_column_value_in_db(db_model=AIAnalysisCacheEntries, record_id=cache_key, field_name="analysis")
+        except Exception as e:
+            logger.warning(f"ResumeAnalysisCache: lookup of {cache_key} failed, treated as miss: {e}")
+            analysis = None
+        metrics_registry.increment(CACHE_LOOKUPS_METRIC_NAME, labels={"result": "hit" if analysis is not None else "miss"})
+        if analysis is not None:
+            logger.debug(f"ResumeAnalysisCache: hit {cache_key}")
+        return analysis
+
+
+    def put(
+        self,
+        cache_key: str,
+        analysis: dict,
+        sourcing_criterias: dict,
+        prompt_resume_analysis_text: str,
+        model: str,
+        vacancy_id: Optional[str] = None,
+    ) -> None:
+        if not isinstance(analysis, dict) or "raw_output" in analysis or "error" in analysis:
+            logger.debug(f"ResumeAnalysisCache: analysis {cache_key} is not valid, not cached")
+            return
+        try:
+            upsert_records_in_db(
+                db_model=AIAnalysisCacheEntries,
+                records=[{
+                    "id": cache_key,
+                    "criteria_hash": build_content_hash(sourcing_criterias),
+                    "prompt_hash": build_content_hash(prompt_resume_analysis_text),
+                    "model": model,
+                    "vacancy_id": vacancy_id,
+                    "analysis": analysis,
+                }],
+                update_fields=["analysis"],
+            )
+        except Exception as e:
+            logger.warning(f"ResumeAnalysisCache: failed to save {cache_key}: {e}")
+
+
+    def invalidate_criterias(self, sourcing_criterias: dict, vacancy_id: str) -> int:
+        """Drop analyses made for the vacancy with given sourcing criterias (e.g. before criterias of the vacancy are replaced).
+        Analyses of other vacancies with the same criterias are kept."""
+        deleted_count = delete_records_by_fields(
+            db_model=AIAnalysisCacheEntries,
+            search_values={"criteria_hash": build_content_hash(sourcing_criterias), "vacancy_id": vacancy_id},
+        )
+        logger.info(f"ResumeAnalysisCache: {deleted_count} analyses of changed sourcing criterias of vacancy {vacancy_id} invalidated")
+        return deleted_count
+
+
+    def invalidate_outdated_prompts(self, current_prompt_resume_analysis_text: str) -> int:
+        """Drop analyses made with any prompt except the current one (e.g. after prompt file was edited)."""
+        deleted_count = delete_records_by_fields(
+            db_model=AIAnalysisCacheEntries,
+            search_values={},
+            exclude_values={"prompt_hash": build_content_hash(current_prompt_resume_analysis_text)},
+        )
+        logger.info(f"ResumeAnalysisCache: {deleted_count} analyses of outdated prompts invalidated")
+        return deleted_count
+
+
+    def invalidate_all(self) -> int:
+        deleted_count = delete_records_by_fields(db_model=AIAnalysisCacheEntries, search_values={})
+        logger.info(f"ResumeAnalysisCache: all {deleted_count} analyses invalidated")
+        return deleted_count
+
+
+    def stats(self) -> Dict[str, Any]:
+        """Hits, misses and hit rate since start of the process, number of stored analyses."""
+        hits = metrics_registry.get_counter(CACHE_LOOKUPS_METRIC_NAME, labels={"result": "hit"})
+        misses = metrics_registry.get_counter(CACHE_LOOKUPS_METRIC_NAME, labels={"result": "miss"})
+        return {
+            "hits": int(hits),
+            "misses": int(misses),
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "entries": count_records_by_fields(db_model=AIAnalysisCacheEntries, search_values={}),
+        }
+
+
+class SourcingCriteriasCache:
+    """Stores sourcing criterias generated by AI in 'sourcing_criterias_cache' table, so vacancies with the same
+    description (re-posted, cloned, of another manager) are not analyzed again.
+    Like 'ResumeAnalysisCache', lookup or DB errors are treated as cache miss and unparsed answers are not cached.
+    Usage:
+        cache_key = build_sourcing_criterias_cache_key(vacancy_description, prompt_vacancy_analysis_text, model)
+        sourcing_criterias = sourcing_criterias_cache.get(cache_key)
+    """
+
+    def get(self, cache_key: str) -> Optional[dict]:
+        try:
+            sourcing_criterias = get_column_value_in_db(db_model=SourcingCriteriasCacheEntries, record_id=cache_key, field_name="sourcing_criterias")
+        except Exception as e:
+            logger.warning(f"SourcingCriteriasCache: lookup of {cache_key} failed, treated as miss: {e}")
+            sourcing_criterias = None
+        metrics_registry.increment(CRITERIAS_CACHE_LOOKUPS_METRIC_NAME, labels={"result": "hit" if sourcing_criterias is not None else "miss"})
+        if sourcing_criterias is not None:
+            logger.debug(f"SourcingCriteriasCache: hit {cache_key}")
+        return sourcing_criterias
+
+
+    def put(
+        self,
+        cache_key: str,
+        sourcing_criterias: dict,
+        vacancy_description: dict,
+        prompt_vacancy_analysis_text: str,
+        model: str,
+        vacancy_id: Optional[str] = None,
+    ) -> None:
+        """Save criterias, existing entry of the same key is overwritten (forced regeneration replaces it)."""
+        if not isinstance(sourcing_criterias, dict) or "raw_output" in sourcing_criterias or "error" in sourcing_criterias:
+            logger.debug(f"SourcingCriteriasCache: criterias {cache_key} are not valid, not cached")
+            return
+        try:
+            upsert_records_in_db(
+                db_model=SourcingCriteriasCacheEntries,
+                records=[{
+                    "id": cache_key,
+                    "description_hash": build_vacancy_description_hash(vacancy_description),
+                    "prompt_hash": build_content_hash(prompt_vacancy_analysis_text),
+                    "model": model,
+                    "vacancy_id": vacancy_id,
+                    "sourcing_criterias": sourcing_criterias,
+                }],
+                update_fields=["sourcing_criterias", "vacancy_id"],
+            )
+        except Exception as e:
+            logger.warning(f"SourcingCriteriasCache: failed to save {cache_key}: {e}")
+
+
+# Global cache of resume analyses
+resume_analysis_cache = ResumeAnalysisCache()
+# Global cache of sourcing criterias
+sourcing_criterias_cache = SourcingCriteriasCache()
@@ -0,0 +1,71 @@
+# TAGS: [ai_related]
+# Preparation of payloads sent to AI: projection of resume to scoring fields, compact JSON, token counting
+
+import json
+import logging
+from typing import Any, Dict, Optional
+
+from shared_services.constants import (
+    AI_RESUME_FIELDS_FOR_ANALYSIS,
+    AI_TOKENIZER_ENCODING,
+)
+
+logger = logging.getLogger(__name__)
+
+# Tokenizer is loaded on first use; False means it is not available and estimate is used instead
+_tokenizer: Any = None
+
+
+def project_fields(data: Any, fields: Dict[str, Any]) -> Any:
+    """Keep only listed fields of the dict (of every dict in the list) recursively.
+    Args:
+        data: Dict, list of dicts or any other value (returned as is)
+        fields: {field_name: True (keep value as is) or nested fields dict}
+    Returns:
+        Projection of the data. Empty values (None, "", [], {}) are dropped, they do not help scoring.
+    """
+    if isinstance(data, list):
+        projected_items = [project_fields(item, fields) for item in data]
+        return [item for item in projected_items if item not in (None, "", [], {})]
+    if not isinstance(data, dict):
+        return data
+    projection = {}
+    for field_name, subfields in fields.items():
+        value = data.get(field_name)
+        if isinstance(subfields, dict):
+            value = project_fields(value, subfields)
+        if value not in (None, "", [], {}):
+            projection[field_name] = value
+    return projection
+
+
+def project_resume_for_analysis(resume_data: dict, fields: Optional[Dict[str, Any]] = None) -> dict:
+    """Projection of HH.ru resume to fields relevant for scoring (see AI_RESUME_FIELDS_FOR_ANALYSIS)."""
+    return project_fields(resume_data, fields or AI_RESUME_FIELDS_FOR_ANALYSIS)
+
+
+def to_compact_json(data: Any, sort_keys: bool = False) -> str:
+    """JSON without indentation and spaces after separators (every space is a token for the model).
+    'sort_keys' makes the text byte-stable for equal data (needed for prompt prefix caching)."""
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), sort_keys=sort_keys)
+
+
+def _get_tokenizer() -> Any:
+    global _tokenizer
+    if _tokenizer is None:
+        try:
+            import tiktoken
+            _tokenizer = tiktoken.get_encoding(AI_TOKENIZER_ENCODING)
+        except Exception as e:
+            # Not installed or encoding could not be downloaded
+            logger.warning(f"Tokenizer '{AI_TOKENIZER_ENCODING}' is not available, tokens are estimated from text length: {e}")
+            _tokenizer = False
+    return _tokenizer
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens in the text by model tokenizer ('tiktoken'), ~4 characters per token if it is not available."""
+    tokenizer = _get_tokenizer()
+    if tokenizer:
+        return len(tokenizer.encode(text, disallowed_special=()))
+    return len(text) // 4
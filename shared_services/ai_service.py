@@ -1,10 +1,12 @@
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI, RateLimitError
+import asyncio
 import json
 import logging
 import os
+import re
 import sys
 import time
-from typing import List, Dict
+from typing import Any, List, Dict, Optional
 from pathlib import Path
 
 from database import Vacancies
@@ -14,11 +16,206 @@ from shared_services.db_service import get_column_value_in_db
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
-from shared_services.constants import MODEL_NAME
+from shared_services.constants import (
+    MODEL_NAME,
+    AI_REQUEST_TIMEOUT_SECS,
+    AI_RATE_LIMIT_MAX_RETRIES,
+    AI_RATE_LIMIT_RETRY_DELAY_SECS,
+    AI_BATCH_COMPLETION_WINDOW,
+    AI_BATCH_POLL_INTERVAL_SECS,
+    AI_EXPECTED_OUTPUT_TOKENS,
+    AI_SCREENING_MODEL_NAME,
+    AI_ESCALATION_SCORE_BAND,
+    RESUME_PASSED_SCORE,
+)
+from shared_services.ai_budget_service import ai_budget
+from shared_services.ai_payload_service import count_tokens, project_resume_for_analysis, to_compact_json
+from shared_services.metrics_service import metrics_registry
+from shared_services.ai_cache_service import (
+    build_content_hash,
+    build_resume_analysis_cache_key,
+    build_sourcing_criterias_cache_key,
+    resume_analysis_cache,
+    sourcing_criterias_cache,
+)
+from shared_services.ai_usage_service import record_ai_usage
 
 logger = logging.getLogger(__name__)
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Async client is used by TaskQueue tasks, so waiting for the model does not block event loop of the bots.
+# Rate-limit retries are done by '_create_json_chat_completion_async' to adapt concurrency, not by SDK.
+async_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+# Client for Batch API (files and batches), uses default SDK retries.
+# Like other clients it can be pointed to local stand-in (see local_openai_api/) via OPENAI_BASE_URL.
+batch_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
+SYSTEM_MESSAGE_TEXT = "Ты — профессиональный сорсер резюме."
+
+# 'custom_id' of batch result line which is not valid JSON
+_CUSTOM_ID_PATTERN = re.compile(r'"custom_id"\s*:\s*"([^"]+)"')
+
+
+def _build_vacancy_analysis_user_message(vacancy_data: dict, prompt_vacancy_analysis_text: str) -> str:
+    return f"""
+    Вакансия:
+    {json.dumps(vacancy_data, ensure_ascii=False, indent=2)}
+    Задача анализа:
+    {prompt_vacancy_analysis_text}
+    """
+
+
+def _build_resume_analysis_prompt_prefix(vacancy_description: dict, sourcing_criterias: dict, prompt_resume_analysis_text: str) -> str:
+    """Part of resume analysis prompt shared by all resumes of the vacancy.
+    It goes first and is byte-stable (sorted keys, stripped prompt), so OpenAI caches it across resumes
+    and charges cached tokens at a discount."""
+    return "\n".join([
+        "Задача анализа:",
+        prompt_resume_analysis_text.strip(),
+        "Вакансия:",
+        to_compact_json(vacancy_description, sort_keys=True),
+        "Критерии отбора:",
+        to_compact_json(sourcing_criterias, sort_keys=True),
+    ])
+
+
+def _build_resume_analysis_user_message(vacancy_description: dict, sourcing_criterias: dict, resume_data: dict, prompt_resume_analysis_text: str) -> str:
+    # Resume (the only part that differs between requests) is appended last, after the cacheable prefix.
+    # Resume is reduced to scoring fields and all JSON is compact, it is the biggest part of the prompt
+    prompt_prefix = _build_resume_analysis_prompt_prefix(
+        vacancy_description=vacancy_description,
+        sourcing_criterias=sourcing_criterias,
+        prompt_resume_analysis_text=prompt_resume_analysis_text,
+    )
+    return f"{prompt_prefix}\nРезюме кандидата:\n{to_compact_json(project_resume_for_analysis(resume_data))}"
+
+
+def _build_prompt_cache_key(vacancy_description: dict, sourcing_criterias: dict, prompt_resume_analysis_text: str) -> str:
+    """Routing hint for OpenAI prompt caching: requests with the same prefix are sent to the same cache."""
+    prompt_prefix = _build_resume_analysis_prompt_prefix(
+        vacancy_description=vacancy_description,
+        sourcing_criterias=sourcing_criterias,
+        prompt_resume_analysis_text=prompt_resume_analysis_text,
+    )
+    return f"resume_analysis_{build_content_hash(prompt_prefix)[:16]}"
+
+
+def record_prompt_cache_usage(prompt_tokens: int, cached_tokens: int, vacancy_id: Optional[str]) -> None:
+    """Count prompt tokens and tokens served from OpenAI prompt cache per vacancy."""
+    labels = {"vacancy_id": vacancy_id or "unknown"}
+    metrics_registry.increment("ai_prompt_tokens_total", amount=prompt_tokens, labels=labels)
+    metrics_registry.increment("ai_cached_prompt_tokens_total", amount=cached_tokens, labels=labels)
+
+
+def _parse_json_response_content(content: str) -> dict:
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError:
+        logger.warning("Response is not valid JSON, returning raw text instead.")
+        return {"raw_output": content}
+
+
+async def _create_json_chat_completion_async(
+    user_message: str,
+    model: str,
+    timeout_secs: float,
+    prompt_cache_key: Optional[str] = None,
+    vacancy_id: Optional[str] = None,
+    response_format: Optional[dict] = None,
+    expected_output_tokens: int = AI_EXPECTED_OUTPUT_TOKENS,
+    operation: str = "chat_completion",
+    resume_ids: Optional[List[str]] = None,
+    prompt_hash: Optional[str] = None,
+) -> dict:
+    """Send chat completion request with JSON output via async client within RPM/TPM budget.
+    Rate-limit errors are retried here (not by SDK), so the budget can reduce concurrency on each of them.
+    Prompt tokens and cached prompt tokens are recorded per 'vacancy_id'.
+    Every call (including failed ones) is recorded to 'ai_usage_ledger' with 'operation', 'resume_ids' and 'prompt_hash'
+    (in a thread, DB write does not block event loop).
+    Raises:
+        asyncio.TimeoutError: if model did not answer within 'timeout_secs' (request is cancelled)
+        openai.RateLimitError: if request is still rate limited after AI_RATE_LIMIT_MAX_RETRIES retries
+    """
+    # Tokenizing of long prompt is CPU-bound, it is done in a thread so event loop is not blocked
+    prompt_tokens = await asyncio.to_thread(count_tokens, SYSTEM_MESSAGE_TEXT + user_message)
+    estimated_tokens = prompt_tokens + expected_output_tokens
+    usage_context = {"operation": operation, "model": model, "vacancy_id": vacancy_id, "resume_ids": resume_ids, "prompt_hash": prompt_hash}
+    attempt = 0
+    started_at = None
+    try:
+        for attempt in range(AI_RATE_LIMIT_MAX_RETRIES + 1):
+            try:
+                async with ai_budget.reserve(estimated_tokens=estimated_tokens) as reservation:
+                    started_at = time.monotonic()
+                    response = await asyncio.wait_for(
+                        async_client.chat.completions.create(
+                            model=model,
+                            messages=[
+                                {"role": "system", "content": SYSTEM_MESSAGE_TEXT},
+                                {"role": "user", "content": user_message}
+                            ],
+                            response_format=response_format or {"type": "json_object"},  # ensures valid JSON output
+                            # Passed as extra body, so older SDK versions without the parameter work too
+                            extra_body={"prompt_cache_key": prompt_cache_key} if prompt_cache_key else None,
+                        ),
+                        timeout=timeout_secs,
+                    )
+                    duration_secs = time.monotonic() - started_at
+                    if response.usage is not None:
+                        reservation.actual_tokens = response.usage.total_tokens
+            except RateLimitError as e:
+                if attempt >= AI_RATE_LIMIT_MAX_RETRIES:
+                    raise
+                retry_after_header = e.response.headers.get("retry-after") if e.response is not None else None
+                try:
+                    retry_after_secs = float(retry_after_header)
+                except (TypeError, ValueError):
+                    retry_after_secs = AI_RATE_LIMIT_RETRY_DELAY_SECS * 2 ** attempt
+                await ai_budget.record_rate_limited(retry_after_secs=retry_after_secs)
+                logger.warning(f"OpenAI rate limit hit, retry {attempt + 1}/{AI_RATE_LIMIT_MAX_RETRIES} in {retry_after_secs:.1f}s")
+                continue
+            await ai_budget.record_success()
+            actual_prompt_tokens = response.usage.prompt_tokens if response.usage is not None else None
+            completion_tokens = response.usage.completion_tokens if response.usage is not None else 0
+            prompt_tokens_details = getattr(response.usage, "prompt_tokens_details", None)
+            cached_tokens = (prompt_tokens_details.cached_tokens or 0) if prompt_tokens_details is not None else 0
+            logger.info(
+                f"OpenAI call to '{model}' done in {duration_secs:.1f}s. "
+                f"Prompt tokens: estimated {prompt_tokens}, actual {actual_prompt_tokens}, cached {cached_tokens}"
+            )
+            if actual_prompt_tokens is not None:
+                record_prompt_cache_usage(prompt_tokens=actual_prompt_tokens, cached_tokens=cached_tokens, vacancy_id=vacancy_id)
+            metrics_registry.observe("ai_request_duration_secs", duration_secs, labels={"model": model})
+            metrics_registry.observe("ai_prompt_tokens", actual_prompt_tokens if actual_prompt_tokens is not None else prompt_tokens, labels={"model": model})
+            result = _parse_json_response_content(response.choices[0].message.content)
+            await asyncio.to_thread(
+                record_ai_usage,
+                **usage_context,
+                outcome="invalid_json" if "raw_output" in result else "success",
+                prompt_tokens=actual_prompt_tokens if actual_prompt_tokens is not None else prompt_tokens,
+                completion_tokens=completion_tokens or 0,
+                cached_tokens=cached_tokens,
+                duration_secs=duration_secs,
+                retries=attempt,
+            )
+            return result
+    except Exception as e:
+        if isinstance(e, asyncio.TimeoutError):
+            outcome = "timeout"
+        elif isinstance(e, RateLimitError):
+            outcome = "rate_limited"
+        else:
+            outcome = "error"
+        # Failed request is recorded with estimated prompt tokens, it may still be billed
+        await asyncio.to_thread(
+            record_ai_usage,
+            **usage_context,
+            outcome=outcome,
+            prompt_tokens=prompt_tokens,
+            duration_secs=time.monotonic() - started_at if started_at is not None else None,
+            retries=attempt,
+            error=f"{type(e).__name__}: {e}",
+        )
+        raise
 
 
 def analyze_vacancy_with_ai(vacancy_data: json, prompt_vacancy_analysis_text: str, model: str = MODEL_NAME) -> dict:
@@ -79,6 +276,67 @@ def analyze_vacancy_with_ai(vacancy_data: json, prompt_vacancy_analysis_text: st
     # !!! FOR TESTING ONLY !!!  
 
 
+async def analyze_vacancy_with_ai_async(
+    vacancy_data: dict,
+    prompt_vacancy_analysis_text: str,
+    model: str = MODEL_NAME,
+    timeout_secs: float = AI_REQUEST_TIMEOUT_SECS,
+    vacancy_id: Optional[str] = None,
+    use_cache: bool = True,
+) -> dict:
+    """
+    Awaitable version of 'analyze_vacancy_with_ai', does not block event loop while waiting for the model.
+    Criterias of the same (normalized) description and prompt are taken from 'sourcing_criterias_cache'
+    without calling the model, also when they were generated for another vacancy or manager.
+    Args:
+        vacancy_data (dict): Vacancy description as a dictionary.
+        prompt_vacancy_analysis_text (str): Instruction for the model.
+        model (str): Model name.
+        timeout_secs (float): Hard deadline of the call, request is cancelled after it.
+        vacancy_id (str): Vacancy the usage of the call is recorded for.
+        use_cache (bool): If False, the model is always called and its result replaces the cached one.
+    Returns:
+        dict: Parsed JSON response from the model.
+    Raises:
+        asyncio.TimeoutError: if model did not answer within 'timeout_secs'
+    """
+    cache_key = build_sourcing_criterias_cache_key(
+        vacancy_description=vacancy_data,
+        prompt_vacancy_analysis_text=prompt_vacancy_analysis_text,
+        model=model,
+    )
+    if use_cache:
+        cached_sourcing_criterias = await asyncio.to_thread(sourcing_criterias_cache.get, cache_key)
+        if cached_sourcing_criterias is not None:
+            logger.debug("Vacancy analysis is taken from cache.")
+            return cached_sourcing_criterias
+
+    user_message = _build_vacancy_analysis_user_message(
+        vacancy_data=vacancy_data,
+        prompt_vacancy_analysis_text=prompt_vacancy_analysis_text,
+    )
+    logger.debug(f"Sending vacancy analysis request to OpenAI model='{model}'. Waiting for response…")
+    result = await _create_json_chat_completion_async(
+        user_message=user_message,
+        model=model,
+        timeout_secs=timeout_secs,
+        vacancy_id=vacancy_id,
+        operation="vacancy_analysis",
+        prompt_hash=build_content_hash(prompt_vacancy_analysis_text),
+    )
+    await asyncio.to_thread(
+        sourcing_criterias_cache.put,
+        cache_key=cache_key,
+        sourcing_criterias=result,
+        vacancy_description=vacancy_data,
+        prompt_vacancy_analysis_text=prompt_vacancy_analysis_text,
+        model=model,
+        vacancy_id=vacancy_id,
+    )
+    logger.debug("Vacancy analysis completed.")
+    return result
+
+
 def format_sourcing_criterias_analysis_result_for_markdown(vacancy_id: str) -> str:
     """Load sourcing criteria JSON and format requirements for Markdown output.
 
@@ -137,31 +395,577 @@ def analyze_resume_with_ai(vacancy_description: json, sourcing_criterias: json,
     Returns:
         dict: Parsed JSON response from the model.
     """
-    user_message = f"""
-    Вакансия:
-    {json.dumps(vacancy_description, ensure_ascii=False, indent=2)}
-    Критерии отбора:
-    {json.dumps(sourcing_criterias, ensure_ascii=False, indent=2)}
-    Резюме кандидата:
-    {json.dumps(resume_data, ensure_ascii=False, indent=2)}
-    Задача анализа:
-    {prompt_resume_analysis_text}
-    """
+    user_message = _build_resume_analysis_user_message(
+        vacancy_description=vacancy_description,
+        sourcing_criterias=sourcing_criterias,
+        resume_data=resume_data,
+        prompt_resume_analysis_text=prompt_resume_analysis_text,
+    )
     response = client.chat.completions.create(
         model=model,
         messages=[
-            {"role": "system", "content": "Ты — профессиональный сорсер резюме."},
+            {"role": "system", "content": SYSTEM_MESSAGE_TEXT},
             {"role": "user", "content": user_message}
         ],
         response_format={"type": "json_object"}  # ensures valid JSON output
     )
-    try:
-        result = json.loads(response.choices[0].message.content)
-    except json.JSONDecodeError:
-        logger.warning("Response is not valid JSON, returning raw text instead.")
-        result = {"raw_output": response.choices[0].message.content}
+    return _parse_json_response_content(response.choices[0].message.content)
+
+
+async def analyze_resume_with_ai_async(
+    vacancy_description: dict,
+    sourcing_criterias: dict,
+    resume_data: dict,
+    prompt_resume_analysis_text: str,
+    model: str = MODEL_NAME,
+    timeout_secs: float = AI_REQUEST_TIMEOUT_SECS,
+    vacancy_id: Optional[str] = None,
+    use_cache: bool = True,
+) -> dict:
+    """
+    Awaitable version of 'analyze_resume_with_ai', does not block event loop while waiting for the model.
+    Analysis of the same inputs is taken from 'resume_analysis_cache' without calling the model.
+    Args:
+        vacancy_description (dict): Vacancy description as a dictionary.
+        sourcing_criterias (dict): Sourcing criterias of the vacancy.
+        resume_data (dict): Resume as a dictionary.
+        prompt_resume_analysis_text (str): Instruction for the model.
+        model (str): Model name.
+        timeout_secs (float): Hard deadline of the call, request is cancelled after it.
+        vacancy_id (str): Vacancy the analysis is made for (stored with cached analysis for reference).
+        use_cache (bool): If False, the model is always called (result is still cached).
+    Returns:
+        dict: Parsed JSON response from the model.
+    Raises:
+        asyncio.TimeoutError: if model did not answer within 'timeout_secs'
+    """
+    cache_key = build_resume_analysis_cache_key(
+        vacancy_description=vacancy_description,
+        sourcing_criterias=sourcing_criterias,
+        resume_data=resume_data,
+        prompt_resume_analysis_text=prompt_resume_analysis_text,
+        model=model,
+    )
+    if use_cache:
+        cached_analysis = await asyncio.to_thread(resume_analysis_cache.get, cache_key)
+        if cached_analysis is not None:
+            logger.debug("Resume analysis is taken from cache.")
+            return cached_analysis
+
+    user_message = _build_resume_analysis_user_message(
+        vacancy_description=vacancy_description,
+        sourcing_criterias=sourcing_criterias,
+        resume_data=resume_data,
+        prompt_resume_analysis_text=prompt_resume_analysis_text,
+    )
+    logger.debug(f"Sending resume analysis request to OpenAI model='{model}'. Waiting for response…")
+    prompt_cache_key = _build_prompt_cache_key(
+        vacancy_description=vacancy_description,
+        sourcing_criterias=sourcing_criterias,
+        prompt_resume_analysis_text=prompt_resume_analysis_text,
+    )
+    result = await _create_json_chat_completion_async(
+        user_message=user_message,
+        model=model,
+        timeout_secs=timeout_secs,
+        prompt_cache_key=prompt_cache_key,
+        vacancy_id=vacancy_id,
+        operation="resume_analysis",
+        resume_ids=[str(resume_data["id"])] if resume_data.get("id") else None,
+        prompt_hash=build_content_hash(prompt_resume_analysis_text),
+    )
+    await asyncio.to_thread(
+        resume_analysis_cache.put,
+        cache_key=cache_key,
+        analysis=result,
+        sourcing_criterias=sourcing_criterias,
+        prompt_resume_analysis_text=prompt_resume_analysis_text,
+        model=model,
+        vacancy_id=vacancy_id,
+    )
     return result
 
+# ----- MULTI-RESUME SCORING functions -----
+
+MULTI_RESUME_INSTRUCTION_TEXT = (
+    "Ниже несколько резюме кандидатов в виде JSON объекта {resume_id: резюме}. "
+    "Оцени каждое резюме отдельно по задаче анализа выше. "
+    "Верни JSON {\"results\": [{\"resume_id\": \"<resume_id>\", \"analysis\": <результат по структуре выше>}]} "
+    "строго по одному элементу на каждое резюме."
+)
+
+# Structured output of multi-resume request. Not strict: 'requirements_compliance' has criteria texts as keys
+MULTI_RESUME_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "resume_analyses",
+        "strict": False,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "results": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "resume_id": {"type": "string"},
+                            "analysis": {
+                                "type": "object",
+                                "properties": {
+                                    "final_score": {"type": "number"},
+                                    "recommendation": {"type": "string"},
+                                    "requirements_compliance": {"type": "object"},
+                                },
+                                "required": ["final_score", "recommendation", "requirements_compliance"],
+                            },
+                        },
+                        "required": ["resume_id", "analysis"],
+                    },
+                },
+            },
+            "required": ["results"],
+        },
+    },
+}
+
+
+def is_valid_resume_analysis(analysis: Any) -> bool:
+    """Check that analysis has the fields resume sorting relies on (final score 0..10 and recommendation)."""
+    if not isinstance(analysis, dict) or not isinstance(analysis.get("recommendation"), str):
+        return False
+    try:
+        final_score = float(analysis.get("final_score"))
+    except (TypeError, ValueError):
+        return False
+    return 0 <= final_score <= 10
+
+
+def _build_multi_resume_analysis_user_message(
+    vacancy_description: dict,
+    sourcing_criterias: dict,
+    resumes_data: Dict[str, dict],
+    prompt_resume_analysis_text: str,
+) -> str:
+    # The same cacheable prefix as single resume request, resumes go last
+    prompt_prefix = _build_resume_analysis_prompt_prefix(
+        vacancy_description=vacancy_description,
+        sourcing_criterias=sourcing_criterias,
+        prompt_resume_analysis_text=prompt_resume_analysis_text,
+    )
+    projected_resumes = {resume_id: project_resume_for_analysis(resume_data) for resume_id, resume_data in resumes_data.items()}
+    return f"{prompt_prefix}\n{MULTI_RESUME_INSTRUCTION_TEXT}\nРезюме кандидатов:\n{to_compact_json(projected_resumes)}"
+
+
+def _split_multi_resume_analysis_result(result: dict, resume_ids: List[str]) -> Dict[str, dict]:
+    """Valid analyses of requested resumes from multi-resume response. Unknown, duplicated and invalid items are dropped."""
+    analyses = {}
+    items = result.get("results") if isinstance(result, dict) else None
+    if not isinstance(items, list):
+        return analyses
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        resume_id = str(item.get("resume_id"))
+        if resume_id not in resume_ids or resume_id in analyses:
+            continue
+        if is_valid_resume_analysis(item.get("analysis")):
+            analyses[resume_id] = item["analysis"]
+    return analyses
+
+
+async def analyze_resumes_with_ai_async(
+    vacancy_description: dict,
+    sourcing_criterias: dict,
+    resumes_data: Dict[str, dict],
+    prompt_resume_analysis_text: str,
+    model: str = MODEL_NAME,
+    timeout_secs: float = AI_REQUEST_TIMEOUT_SECS,
+    vacancy_id: Optional[str] = None,
+    use_cache: bool = True,
+) -> Dict[str, dict]:
+    """
+    Score several resumes of the vacancy in one request, so vacancy description and criterias are paid once.
+    Resumes found in cache are not sent, resumes missing or invalid in the response are scored by concurrent
+    single resume requests with 'analyze_resume_with_ai_async'.
+    Failure of one single resume request does not fail the others: their analyses are returned (and cached),
+    resume whose request failed is logged and missing in the result.
+    Args:
+        resumes_data (dict): {resume_id: resume as a dictionary}
+        Other args are the same as in 'analyze_resume_with_ai_async'.
+    Returns:
+        dict: {resume_id: parsed analysis}
+    """
+    analyses = {}
+    cache_keys = {}
+    for resume_id, resume_data in resumes_data.items():
+        cache_keys[resume_id] = build_resume_analysis_cache_key(
+            vacancy_description=vacancy_description,
+            sourcing_criterias=sourcing_criterias,
+            resume_data=resume_data,
+            prompt_resume_analysis_text=prompt_resume_analysis_text,
+            model=model,
+        )
+        cached_analysis = await asyncio.to_thread(resume_analysis_cache.get, cache_keys[resume_id]) if use_cache else None
+        if cached_analysis is not None:
+            analyses[resume_id] = cached_analysis
+
+    resume_ids_to_score = [resume_id for resume_id in resumes_data if resume_id not in analyses]
+    if len(resume_ids_to_score) > 1:
+        user_message = _build_multi_resume_analysis_user_message(
+            vacancy_description=vacancy_description,
+            sourcing_criterias=sourcing_criterias,
+            resumes_data={resume_id: resumes_data[resume_id] for resume_id in resume_ids_to_score},
+            prompt_resume_analysis_text=prompt_resume_analysis_text,
+        )
+        logger.debug(f"Sending analysis request of {len(resume_ids_to_score)} resumes to OpenAI model='{model}'. Waiting for response…")
+        try:
+            result = await _create_json_chat_completion_async(
+                user_message=user_message,
+                model=model,
+                timeout_secs=timeout_secs,
+                prompt_cache_key=_build_prompt_cache_key(
+                    vacancy_description=vacancy_description,
+                    sourcing_criterias=sourcing_criterias,
+                    prompt_resume_analysis_text=prompt_resume_analysis_text,
+                ),
+                vacancy_id=vacancy_id,
+                response_format=MULTI_RESUME_RESPONSE_FORMAT,
+                expected_output_tokens=AI_EXPECTED_OUTPUT_TOKENS * len(resume_ids_to_score),
+                operation="multi_resume_analysis",
+                resume_ids=resume_ids_to_score,
+                prompt_hash=build_content_hash(prompt_resume_analysis_text),
+            )
+            multi_resume_analyses = _split_multi_resume_analysis_result(result=result, resume_ids=resume_ids_to_score)
+        except Exception as e:
+            # Rate limit errors are already retried, other failures are retried per resume below
+            logger.warning(f"Multi-resume analysis of {len(resume_ids_to_score)} resumes failed, falling back to single resume requests: {e}")
+            multi_resume_analyses = {}
+        for resume_id, analysis in multi_resume_analyses.items():
+            analyses[resume_id] = analysis
+            await asyncio.to_thread(
+                resume_analysis_cache.put,
+                cache_key=cache_keys[resume_id],
+                analysis=analysis,
+                sourcing_criterias=sourcing_criterias,
+                prompt_resume_analysis_text=prompt_resume_analysis_text,
+                model=model,
+                vacancy_id=vacancy_id,
+            )
+        metrics_registry.increment("ai_multi_resume_results_total", amount=len(multi_resume_analyses), labels={"result": "scored"})
+        metrics_registry.increment("ai_multi_resume_results_total", amount=len(resume_ids_to_score) - len(multi_resume_analyses), labels={"result": "fallback"})
+
+    # Single resume requests for resumes missing in multi-resume response, sent concurrently (limited by 'ai_budget')
+    fallback_resume_ids = [resume_id for resume_id in resume_ids_to_score if resume_id not in analyses]
+    fallback_analyses = await asyncio.gather(*(
+        analyze_resume_with_ai_async(
+            vacancy_description=vacancy_description,
+            sourcing_criterias=sourcing_criterias,
+            resume_data=resumes_data[resume_id],
+            prompt_resume_analysis_text=prompt_resume_analysis_text,
+            model=model,
+            timeout_secs=timeout_secs,
+            vacancy_id=vacancy_id,
+            use_cache=False,
+        )
+        for resume_id in fallback_resume_ids
+    ), return_exceptions=True)
+    failed_resume_ids = []
+    for resume_id, fallback_analysis in zip(fallback_resume_ids, fallback_analyses):
+        if isinstance(fallback_analysis, BaseException):
+            logger.error(f"Single resume analysis of resume {resume_id} failed: {fallback_analysis!r}")
+            failed_resume_ids.append(resume_id)
+        else:
+            analyses[resume_id] = fallback_analysis
+    if failed_resume_ids:
+        logger.warning(f"Analysis of {len(failed_resume_ids)} of {len(resumes_data)} resumes failed: {failed_resume_ids}")
+    return analyses
+
+
+# ----- TIERED MODEL ROUTING functions -----
+
+def needs_escalation(analysis: Any, score_band: float = AI_ESCALATION_SCORE_BAND) -> bool:
+    """Analysis of screening model is not trusted if it is invalid or its score is close to the pass/fail boundary."""
+    if not is_valid_resume_analysis(analysis):
+        return True
+    return abs(float(analysis["final_score"]) - RESUME_PASSED_SCORE) <= score_band
+
+
+def _is_passed(analysis: dict) -> bool:
+    # The same rule as resume sorting uses
+    return int(analysis.get("final_score", 0)) >= RESUME_PASSED_SCORE
+
+
+async def analyze_resumes_with_tiered_models_async(
+    vacancy_description: dict,
+    sourcing_criterias: dict,
+    resumes_data: Dict[str, dict],
+    prompt_resume_analysis_text: str,
+    screening_model: str = AI_SCREENING_MODEL_NAME,
+    escalation_model: str = MODEL_NAME,
+    escalation_score_band: float = AI_ESCALATION_SCORE_BAND,
+    timeout_secs: float = AI_REQUEST_TIMEOUT_SECS,
+    vacancy_id: Optional[str] = None,
+    use_cache: bool = True,
+) -> Dict[str, dict]:
+    """
+    Two-tier scoring: all resumes are scored by cheaper 'screening_model', resumes which need escalation
+    (see 'needs_escalation') are re-scored by 'escalation_model' and its analysis is used.
+    Both tiers go through 'analyze_resumes_with_ai_async' (cache, multi-resume requests).
+    Recorded metrics:
+        - ai_tier_resumes_total{route}: resumes decided by screening model or escalated
+        - ai_tier_duration_secs{tier}: time of each tier per call
+        - ai_tier_agreement_total{result}: whether screening and escalation models agree on pass/fail
+        - ai_tier_score_delta: absolute score difference of escalated resumes
+    Returns:
+        dict: {resume_id: analysis}, analysis has "scored_by_model" field. Resumes whose analysis failed are missing
+    """
+    started_at = time.monotonic()
+    screening_analyses = await analyze_resumes_with_ai_async(
+        vacancy_description=vacancy_description,
+        sourcing_criterias=sourcing_criterias,
+        resumes_data=resumes_data,
+        prompt_resume_analysis_text=prompt_resume_analysis_text,
+        model=screening_model,
+        timeout_secs=timeout_secs,
+        vacancy_id=vacancy_id,
+        use_cache=use_cache,
+    )
+    metrics_registry.observe("ai_tier_duration_secs", time.monotonic() - started_at, labels={"tier": "screening"})
+
+    analyses = {}
+    escalated_resume_ids = []
+    for resume_id, analysis in screening_analyses.items():
+        if needs_escalation(analysis, score_band=escalation_score_band):
+            escalated_resume_ids.append(resume_id)
+        else:
+            analyses[resume_id] = {**analysis, "scored_by_model": screening_model}
+    metrics_registry.increment("ai_tier_resumes_total", amount=len(analyses), labels={"route": "screening"})
+    metrics_registry.increment("ai_tier_resumes_total", amount=len(escalated_resume_ids), labels={"route": "escalated"})
+    if not escalated_resume_ids:
+        return analyses
+
+    logger.debug(f"Tiered scoring: {len(escalated_resume_ids)} of {len(resumes_data)} resumes escalated to model='{escalation_model}'")
+    started_at = time.monotonic()
+    escalation_analyses = await analyze_resumes_with_ai_async(
+        vacancy_description=vacancy_description,
+        sourcing_criterias=sourcing_criterias,
+        resumes_data={resume_id: resumes_data[resume_id] for resume_id in escalated_resume_ids},
+        prompt_resume_analysis_text=prompt_resume_analysis_text,
+        model=escalation_model,
+        timeout_secs=timeout_secs,
+        vacancy_id=vacancy_id,
+        use_cache=use_cache,
+    )
+    metrics_registry.observe("ai_tier_duration_secs", time.monotonic() - started_at, labels={"tier": "escalation"})
+
+    for resume_id in escalated_resume_ids:
+        screening_analysis = screening_analyses[resume_id]
+        escalation_analysis = escalation_analyses.get(resume_id)
+        if escalation_analysis is None:
+            # Screening analysis is not trusted, so resume is left without analysis
+            continue
+        if is_valid_resume_analysis(screening_analysis) and is_valid_resume_analysis(escalation_analysis):
+            agrees = _is_passed(screening_analysis) == _is_passed(escalation_analysis)
+            metrics_registry.increment("ai_tier_agreement_total", labels={"result": "agree" if agrees else "disagree"})
+            metrics_registry.observe(
+                "ai_tier_score_delta",
+                abs(float(screening_analysis["final_score"]) - float(escalation_analysis["final_score"])),
+            )
+        analyses[resume_id] = {**escalation_analysis, "scored_by_model": escalation_model} if isinstance(escalation_analysis, dict) else escalation_analysis
+    return analyses
+
+
+async def analyze_resume_with_tiered_models_async(
+    vacancy_description: dict,
+    sourcing_criterias: dict,
+    resume_data: dict,
+    prompt_resume_analysis_text: str,
+    timeout_secs: float = AI_REQUEST_TIMEOUT_SECS,
+    vacancy_id: Optional[str] = None,
+    use_cache: bool = True,
+) -> dict:
+    """'analyze_resumes_with_tiered_models_async' for one resume, drop-in replacement of 'analyze_resume_with_ai_async'."""
+    analyses = await analyze_resumes_with_tiered_models_async(
+        vacancy_description=vacancy_description,
+        sourcing_criterias=sourcing_criterias,
+        resumes_data={"resume": resume_data},
+        prompt_resume_analysis_text=prompt_resume_analysis_text,
+        timeout_secs=timeout_secs,
+        vacancy_id=vacancy_id,
+        use_cache=use_cache,
+    )
+    if "resume" not in analyses:
+        raise ValueError("Tiered resume analysis failed, see log for the error of AI request")
+    return analyses["resume"]
+
+
+def get_tiered_routing_stats() -> Dict[str, Any]:
+    """Escalation and agreement rates of tiered scoring since start of the process."""
+    screened = metrics_registry.get_counter("ai_tier_resumes_total", labels={"route": "screening"})
+    escalated = metrics_registry.get_counter("ai_tier_resumes_total", labels={"route": "escalated"})
+    agreed = metrics_registry.get_counter("ai_tier_agreement_total", labels={"result": "agree"})
+    disagreed = metrics_registry.get_counter("ai_tier_agreement_total", labels={"result": "disagree"})
+    return {
+        "resumes": int(screened + escalated),
+        "escalated": int(escalated),
+        "escalation_rate": escalated / (screened + escalated) if screened + escalated else 0.0,
+        "agreement_rate": agreed / (agreed + disagreed) if agreed + disagreed else 0.0,
+    }
+
+
+# ----- OPENAI BATCH API functions -----
+
+# Final statuses of the batch, see https://platform.openai.com/docs/guides/batch
+BATCH_FINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+def build_resume_analysis_batch_request(
+    custom_id: str,
+    vacancy_description: dict,
+    sourcing_criterias: dict,
+    resume_data: dict,
+    prompt_resume_analysis_text: str,
+    model: str = MODEL_NAME,
+) -> dict:
+    """Build one line of Batch API input file with the same request as 'analyze_resume_with_ai_async' sends.
+    Args:
+        custom_id (str): ID to match the result with the resume (e.g. resume ID)
+    Returns:
+        dict: {"custom_id", "method", "url", "body"}
+    """
+    user_message = _build_resume_analysis_user_message(
+        vacancy_description=vacancy_description,
+        sourcing_criterias=sourcing_criterias,
+        resume_data=resume_data,
+        prompt_resume_analysis_text=prompt_resume_analysis_text,
+    )
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": "/v1/chat/completions",
+        "body": {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": SYSTEM_MESSAGE_TEXT},
+                {"role": "user", "content": user_message}
+            ],
+            "response_format": {"type": "json_object"},
+            "prompt_cache_key": _build_prompt_cache_key(
+                vacancy_description=vacancy_description,
+                sourcing_criterias=sourcing_criterias,
+                prompt_resume_analysis_text=prompt_resume_analysis_text,
+            ),
+        },
+    }
+
+
+async def submit_chat_completions_batch(batch_requests: List[Dict], metadata: Optional[Dict[str, str]] = None) -> str:
+    """Upload requests as JSONL file and create batch of chat completions.
+    Args:
+        batch_requests (list): Lines built by 'build_resume_analysis_batch_request'
+        metadata (dict): Optional batch metadata (e.g. {"vacancy_id": "..."})
+    Returns:
+        str: Batch ID
+    """
+    jsonl_content = "\n".join(json.dumps(batch_request, ensure_ascii=False) for batch_request in batch_requests)
+    input_file = await batch_client.files.create(
+        file=("resume_analysis_batch.jsonl", jsonl_content.encode("utf-8")),
+        purpose="batch",
+    )
+    batch = await batch_client.batches.create(
+        input_file_id=input_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window=AI_BATCH_COMPLETION_WINDOW,
+        metadata=metadata,
+    )
+    logger.info(f"Batch {batch.id} with {len(batch_requests)} requests submitted (input file {input_file.id})")
+    return batch.id
+
+
+async def wait_for_batch_completion(batch_id: str, poll_interval_secs: float = AI_BATCH_POLL_INTERVAL_SECS) -> Any:
+    """Poll batch status until it reaches one of final statuses.
+    Returns:
+        Batch object in final status
+    """
+    while True:
+        batch = await batch_client.batches.retrieve(batch_id)
+        if batch.status in BATCH_FINAL_STATUSES:
+            logger.info(f"Batch {batch_id} finished with status '{batch.status}'. Request counts: {batch.request_counts}")
+            return batch
+        logger.debug(f"Batch {batch_id} status: '{batch.status}'. Next check in {poll_interval_secs}s")
+        await asyncio.sleep(poll_interval_secs)
+
+
+def _extract_custom_id_from_raw_line(line: str) -> Optional[str]:
+    """'custom_id' of batch result line that is not valid JSON (e.g. truncated), None if it cannot be found."""
+    match = _CUSTOM_ID_PATTERN.search(line)
+    return match.group(1) if match else None
+
+
+async def download_batch_results(batch: Any) -> Dict[str, dict]:
+    """Download results of finished batch and parse model answers.
+    Malformed result line is logged and its request is recorded as failed, other results of the batch are kept.
+    Returns:
+        dict: {custom_id: parsed JSON answer of the model or {"error": ...} if request failed}
+    """
+    results = {}
+    if batch.output_file_id:
+        output_content = await batch_client.files.content(batch.output_file_id)
+        for line_number, line in enumerate(output_content.text.splitlines(), start=1):
+            if not line.strip():
+                continue
+            custom_id = None
+            try:
+                result_line = json.loads(line)
+                custom_id = result_line["custom_id"]
+                response = result_line.get("response") or {}
+                if result_line.get("error") or response.get("status_code") != 200:
+                    results[custom_id] = {"error": result_line.get("error") or response.get("body")}
+                    continue
+                content = response["body"]["choices"][0]["message"]["content"]
+            except (ValueError, KeyError, IndexError, TypeError, AttributeError) as e:
+                custom_id = custom_id or _extract_custom_id_from_raw_line(line)
+                logger.error(f"download_batch_results: Malformed line {line_number} in output of batch {batch.id} (custom_id: {custom_id}): {e}")
+                if custom_id:
+                    results[custom_id] = {"error": f"malformed batch result line: {e}"}
+                continue
+            results[custom_id] = _parse_json_response_content(content)
+            usage = response["body"].get("usage") or {}
+            if usage.get("prompt_tokens") is not None:
+                cached_tokens = (usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0
+                record_prompt_cache_usage(
+                    prompt_tokens=usage["prompt_tokens"],
+                    cached_tokens=cached_tokens,
+                    vacancy_id=(batch.metadata or {}).get("vacancy_id"),
+                )
+                await asyncio.to_thread(
+                    record_ai_usage,
+                    operation="batch_resume_analysis",
+                    model=response["body"].get("model") or MODEL_NAME,
+                    outcome="invalid_json" if "raw_output" in results[custom_id] else "success",
+                    vacancy_id=(batch.metadata or {}).get("vacancy_id"),
+                    resume_ids=[custom_id],
+                    prompt_tokens=usage["prompt_tokens"],
+                    completion_tokens=usage.get("completion_tokens") or 0,
+                    cached_tokens=cached_tokens,
+                    is_batch=True,
+                )
+    if batch.error_file_id:
+        error_content = await batch_client.files.content(batch.error_file_id)
+        for line_number, line in enumerate(error_content.text.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                error_line = json.loads(line)
+                results[error_line["custom_id"]] = {"error": error_line.get("error") or error_line.get("response")}
+            except (ValueError, KeyError, TypeError) as e:
+                custom_id = _extract_custom_id_from_raw_line(line)
+                logger.error(f"download_batch_results: Malformed line {line_number} in errors of batch {batch.id} (custom_id: {custom_id}): {e}")
+                if custom_id:
+                    results[custom_id] = {"error": f"malformed batch error line: {e}"}
+    return results
+
+
 # ----- OPENAI ASSISTANT functions -----
 """
 def wait_for_run_completion(thread_id: str, run_id: str, timeout_s: int = 120, poll_s: float = 1.2):
@@ -0,0 +1,181 @@
+# TAGS: [ai_related]
+# Ledger of OpenAI usage (tokens, cost, latency, retries, outcome) per vacancy and negotiation
+
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import case, func
+
+from database import SessionLocal, AIUsageLedger, Negotiations, Vacancies
+from shared_services.constants import (
+    AI_MODEL_PRICES_USD_PER_1M_TOKENS,
+    AI_BATCH_PRICE_FACTOR,
+    AI_USAGE_SUMMARY_DAYS,
+    AI_USAGE_SUMMARY_MAX_ROWS,
+)
+from shared_services.db_service import upsert_records_in_db
+
+logger = logging.getLogger(__name__)
+
+# Fields /admin_ai_usage can group by
+AI_USAGE_GROUP_BY_COLUMNS = {
+    "vacancy": AIUsageLedger.vacancy_id,
+    "manager": Vacancies.manager_id,
+    "model": AIUsageLedger.model,
+    "prompt": AIUsageLedger.prompt_hash,
+    "operation": AIUsageLedger.operation,
+}
+
+
+def estimate_cost_usd(model: str, prompt_tokens: int, cached_tokens: int, completion_tokens: int, is_batch: bool = False) -> float:
+    """Cost of one request by AI_MODEL_PRICES_USD_PER_1M_TOKENS, 0 for models without known price."""
+    prices = AI_MODEL_PRICES_USD_PER_1M_TOKENS.get(model)
+    if prices is None:
+        return 0.0
+    cost_usd = (
+        (prompt_tokens - cached_tokens) * prices["input"]
+        + cached_tokens * prices["cached_input"]
+        + completion_tokens * prices["output"]
+    ) / 1_000_000
+    return cost_usd * AI_BATCH_PRICE_FACTOR if is_batch else cost_usd
+
+
+def _find_negotiation_ids(vacancy_id: Optional[str], resume_ids: Optional[List[str]]) -> List[str]:
+    if not vacancy_id or not resume_ids:
+        return []
+    db = SessionLocal()
+    try:
+        rows = db.query(Negotiations.id).filter(Negotiations.vacancy_id == vacancy_id, Negotiations.resume_id.in_(resume_ids)).all()
+        return [row[0] for row in rows]
+    finally:
+        db.close()
+
+
+def record_ai_usage(
+    operation: str,
+    model: str,
+    outcome: str,
+    vacancy_id: Optional[str] = None,
+    resume_ids: Optional[List[str]] = None,
+    prompt_hash: Optional[str] = None,
+    prompt_tokens: int = 0,
+    completion_tokens: int = 0,
+    cached_tokens: int = 0,
+    duration_secs: Optional[float] = None,
+    retries: int = 0,
+    error: Optional[str] = None,
+    is_batch: bool = False,
+) -> None:
+    """Save one request to 'ai_usage_ledger'. Failures are only logged, they never fail the AI call.
+    Args:
+        operation: Kind of request ("vacancy_analysis", "resume_analysis", "multi_resume_analysis", ...)
+        outcome: "success", "invalid_json", "timeout", "rate_limited" or "error"
+        resume_ids: Resumes of the request, stored as IDs of their negotiations with the vacancy
+    """
+    try:
+        upsert_records_in_db(
+            db_model=AIUsageLedger,
+            records=[{
+                "id": uuid.uuid4().hex,
+                "operation": operation,
+                "model": model,
+                "vacancy_id": vacancy_id,
+                "negotiation_ids": _find_negotiation_ids(vacancy_id=vacancy_id, resume_ids=resume_ids),
+                "prompt_hash": prompt_hash,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "cached_tokens": cached_tokens,
+                "cost_usd": estimate_cost_usd(
+                    model=model,
+                    prompt_tokens=prompt_tokens,
+                    cached_tokens=cached_tokens,
+                    completion_tokens=completion_tokens,
+                    is_batch=is_batch,
+                ),
+                "duration_secs": duration_secs,
+                "retries": retries,
+                "outcome": outcome,
+                "error": error[:1000] if error else None,
+            }],
+        )
+    except Exception as e:
+        logger.warning(f"record_ai_usage: failed to save usage of '{operation}' ({model}, vacancy {vacancy_id}): {e}")
+
+
+def summarize_ai_usage(
+    group_by: str = "vacancy",
+    since: Optional[datetime] = None,
+    limit: int = AI_USAGE_SUMMARY_MAX_ROWS,
+) -> List[Dict[str, Any]]:
+    """Aggregated usage per group since given time, the most expensive groups first.
+    Args:
+        group_by: One of AI_USAGE_GROUP_BY_COLUMNS keys ("vacancy", "manager", "model", "prompt", "operation")
+        since: Start of the period (all records if not provided)
+    Returns:
+        list: [{"key", "requests", "failed", "retries", "prompt_tokens", "cached_tokens", "completion_tokens",
+                "cost_usd", "avg_duration_secs", "max_duration_secs"}]
+    """
+    group_column = AI_USAGE_GROUP_BY_COLUMNS.get(group_by)
+    if group_column is None:
+        raise ValueError(f"Unknown group '{group_by}', expected one of {', '.join(AI_USAGE_GROUP_BY_COLUMNS)}")
+
+    cost_sum = func.coalesce(func.sum(AIUsageLedger.cost_usd), 0)
+    db = SessionLocal()
+    try:
+        query = db.query(
+            group_column,
+            func.count(AIUsageLedger.id),
+            func.sum(case((AIUsageLedger.outcome != "success", 1), else_=0)),
+            func.sum(AIUsageLedger.retries),
+            func.sum(AIUsageLedger.prompt_tokens),
+            func.sum(AIUsageLedger.cached_tokens),
+            func.sum(AIUsageLedger.completion_tokens),
+            cost_sum,
+            func.avg(AIUsageLedger.duration_secs),
+            func.max(AIUsageLedger.duration_secs),
+        )
+        if group_by == "manager":
+            query = query.outerjoin(Vacancies, Vacancies.id == AIUsageLedger.vacancy_id)
+        if since is not None:
+            query = query.filter(AIUsageLedger.created_at >= since)
+        rows = query.group_by(group_column).order_by(cost_sum.desc()).limit(limit).all()
+    finally:
+        db.close()
+
+    return [
+        {
+            "key": key,
+            "requests": int(requests or 0),
+            "failed": int(failed or 0),
+            "retries": int(retries or 0),
+            "prompt_tokens": int(prompt_tokens or 0),
+            "cached_tokens": int(cached_tokens or 0),
+            "completion_tokens": int(completion_tokens or 0),
+            "cost_usd": float(cost_usd or 0),
+            "avg_duration_secs": float(avg_duration_secs) if avg_duration_secs is not None else None,
+            "max_duration_secs": float(max_duration_secs) if max_duration_secs is not None else None,
+        }
+        for key, requests, failed, retries, prompt_tokens, cached_tokens, completion_tokens, cost_usd, avg_duration_secs, max_duration_secs in rows
+    ]
+
+
+def format_ai_usage_summary(group_by: str = "vacancy", days: int = AI_USAGE_SUMMARY_DAYS) -> str:
+    """Human readable 'summarize_ai_usage' for the last 'days' days (for admin)."""
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    rows = summarize_ai_usage(group_by=group_by, since=since)
+    if not rows:
+        return f"No AI requests in the last {days} days."
+    lines = [f"AI usage by {group_by} for the last {days} days:"]
+    for row in rows:
+        avg_duration = f"{row['avg_duration_secs']:.1f}s" if row["avg_duration_secs"] is not None else "-"
+        max_duration = f"{row['max_duration_secs']:.1f}s" if row["max_duration_secs"] is not None else "-"
+        # Prompt hashes are shortened, the prefix is enough to tell prompt versions apart
+        key = (row["key"][:12] if group_by == "prompt" else row["key"]) if row["key"] else "unknown"
+        lines.append(
+            f"{key}: ${row['cost_usd']:.4f}, {row['requests']} requests "
+            f"({row['failed']} failed, {row['retries']} retries), tokens in/cached/out "
+            f"{row['prompt_tokens']}/{row['cached_tokens']}/{row['completion_tokens']}, latency avg {avg_duration} max {max_duration}"
+        )
+    return "\n".join(lines)
@@ -12,6 +12,7 @@ project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
 from shared_services.constants import BASE_URL
+from shared_services.circuit_breaker_service import callback_endpoint_circuit_breaker
 
 logger = logging.getLogger(__name__)
 
@@ -20,12 +21,27 @@ ADMIN_TOKEN  = os.getenv("ADMIN_TOKEN")
 BOT_SHARED_SECRET = os.getenv("BOT_SHARED_SECRET")
 USER_AGENT = os.getenv("USER_AGENT")
 
+
+def _send_callback_endpoint_request(method: str, url: str, **kwargs) -> requests.Response:
+    """Send request to the callback endpoint through the circuit breaker.
+    While the endpoint is down, raises 'CircuitOpenError' (a 'requests.RequestException') without waiting for timeout."""
+    callback_endpoint_circuit_breaker.before_call()
+    try:
+        response = requests.request(method, url, **kwargs)
+    except Exception:
+        # Any error without response (not only connection errors) releases the half-open trial call
+        callback_endpoint_circuit_breaker.record_failure()
+        raise
+    callback_endpoint_circuit_breaker.record_response(response)
+    return response
+
+
 def callback_endpoint_healthcheck() -> bool:
     """
     Check API health endpoint. Returns True if endpoint is available, False otherwise.
     """
     try:
-        response = requests.get(f"{BASE_URL}/", timeout=10, headers={"User-Agent": USER_AGENT})
+        response = _send_callback_endpoint_request("GET", f"{BASE_URL}/", timeout=10, headers={"User-Agent": USER_AGENT})
         if response.status_code == 200:
             logger.info(f"Callback endpoint health check passed: {response.text}")
             return True
@@ -52,7 +68,7 @@ def get_token_by_state(state: str, bot_shared_secret: str): # returns a dictiona
     payload = {"state": state}  # server expects a string in StatePayload
 
     try:
-        response = requests.post(f"{BASE_URL}/token/by-state", headers=headers, json=payload, timeout=15)
+        response = _send_callback_endpoint_request("POST", f"{BASE_URL}/token/by-state", headers=headers, json=payload, timeout=15)
         if response.status_code == 200:
             logger.debug(f"callback endpoint request successful: {response.text}")
             return response.json()
@@ -0,0 +1,154 @@
+# TAGS: [rate_limit]
+# Circuit breakers for calls to external APIs (HH.ru, callback endpoint)
+
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+import requests
+
+from shared_services.constants import (
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+    CIRCUIT_BREAKER_RECOVERY_TIMEOUT_SECS,
+)
+
+logger = logging.getLogger(__name__)
+
+CIRCUIT_STATE_CLOSED = "closed"
+CIRCUIT_STATE_OPEN = "open"
+CIRCUIT_STATE_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of calling upstream while its circuit is open.
+    Subclass of 'requests.RequestException', so existing error handling of HTTP calls covers it."""
+
+
+class CircuitBreaker:
+    """Stops calling an upstream after consecutive failures:
+    - closed: calls pass, 'failure_threshold' consecutive failures open the circuit
+    - open: calls fail fast with 'CircuitOpenError' for 'recovery_timeout_secs'
+    - half-open: one trial call passes, its success closes the circuit, its failure opens it again
+    Thread-safe, because HTTP calls are blocking and are executed in threads ('asyncio.to_thread').
+    Usage:
+        hh_circuit_breaker.before_call()
+        response = requests.get(...)
+        hh_circuit_breaker.record_success()  # or record_failure()
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+        recovery_timeout_secs: float = CIRCUIT_BREAKER_RECOVERY_TIMEOUT_SECS,
+    ):
+        if failure_threshold <= 0:
+            raise ValueError(f"failure_threshold must be positive, got {failure_threshold}")
+        self.name = name
+        self._failure_threshold = failure_threshold
+        self._recovery_timeout_secs = recovery_timeout_secs
+        self._lock = threading.Lock()
+        self._state = CIRCUIT_STATE_CLOSED
+        self._consecutive_failures = 0
+        self._opened_at: Optional[float] = None
+        self._half_open_call_in_flight = False
+        self._rejected_calls = 0
+
+
+    @property
+    def state(self) -> str:
+        """Current state. Open circuit becomes half-open once recovery timeout is over."""
+        with self._lock:
+            return self._current_state()
+
+
+    def _current_state(self) -> str:
+        # Must be called under 'self._lock'
+        if self._state == CIRCUIT_STATE_OPEN and time.monotonic() - self._opened_at >= self._recovery_timeout_secs:
+            self._state = CIRCUIT_STATE_HALF_OPEN
+            self._half_open_call_in_flight = False
+            logger.info(f"{self.name}: recovery timeout is over, circuit is half-open")
+        return self._state
+
+
+    def is_open(self) -> bool:
+        """True if calls are currently rejected (open circuit or half-open circuit with trial call in flight)."""
+        with self._lock:
+            state = self._current_state()
+            return state == CIRCUIT_STATE_OPEN or (state == CIRCUIT_STATE_HALF_OPEN and self._half_open_call_in_flight)
+
+
+    def before_call(self) -> None:
+        """Check that upstream may be called. Raises 'CircuitOpenError' otherwise."""
+        with self._lock:
+            state = self._current_state()
+            if state == CIRCUIT_STATE_CLOSED:
+                return
+            if state == CIRCUIT_STATE_HALF_OPEN and not self._half_open_call_in_flight:
+                # Let exactly one trial call through
+                self._half_open_call_in_flight = True
+                return
+            self._rejected_calls += 1
+            retry_in_secs = max(0.0, self._recovery_timeout_secs - (time.monotonic() - self._opened_at)) if self._opened_at else 0.0
+        raise CircuitOpenError(f"{self.name}: circuit is {state}, call rejected (retry in {retry_in_secs:.0f}s)")
+
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != CIRCUIT_STATE_CLOSED:
+                logger.info(f"{self.name}: call succeeded, circuit is closed")
+            self._state = CIRCUIT_STATE_CLOSED
+            self._consecutive_failures = 0
+            self._opened_at = None
+            self._half_open_call_in_flight = False
+
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._consecutive_failures += 1
+            if self._state == CIRCUIT_STATE_HALF_OPEN or self._consecutive_failures >= self._failure_threshold:
+                if self._state != CIRCUIT_STATE_OPEN:
+                    logger.warning(f"{self.name}: circuit is open after {self._consecutive_failures} consecutive failures")
+                self._state = CIRCUIT_STATE_OPEN
+                self._opened_at = time.monotonic()
+                self._half_open_call_in_flight = False
+
+
+    def record_response(self, response: requests.Response) -> None:
+        """Count response as failure only if upstream itself is unhealthy (5xx, 429).
+        Client errors (401, 403, 404, ...) mean the upstream is up."""
+        if response.status_code >= 500 or response.status_code == 429:
+            self.record_failure()
+        else:
+            self.record_success()
+
+
+    def reset(self) -> None:
+        """Close the circuit manually (e.g. by admin after upstream recovered)."""
+        self.record_success()
+
+
+    def status(self) -> Dict:
+        """State of the breaker for admin and logs."""
+        with self._lock:
+            state = self._current_state()
+            return {
+                "name": self.name,
+                "state": state,
+                "consecutive_failures": self._consecutive_failures,
+                "rejected_calls": self._rejected_calls,
+                "open_for_secs": round(time.monotonic() - self._opened_at) if self._opened_at else 0,
+            }
+
+
+# Global circuit breakers, one per upstream
+hh_circuit_breaker = CircuitBreaker(name="hh_api")
+callback_endpoint_circuit_breaker = CircuitBreaker(name="callback_endpoint")
+
+ALL_CIRCUIT_BREAKERS: List[CircuitBreaker] = [hh_circuit_breaker, callback_endpoint_circuit_breaker]
+
+
+def get_circuit_breakers_status() -> List[Dict]:
+    """Status of all circuit breakers."""
+    return [circuit_breaker.status() for circuit_breaker in ALL_CIRCUIT_BREAKERS]
@@ -15,6 +15,43 @@ VACANCY_STATUS_TO_FILTER = "open"
 EMPLOYER_STATE_RESPONSE = "response"
 EMPLOYER_STATE_CONSIDER = "consider"
 
+# ----- HH ACCESS TOKEN CONSTANTS -----
+# Access token is refreshed when it expires in less than this number of seconds
+HH_ACCESS_TOKEN_REFRESH_MARGIN_SECS = 600
+
+# ----- HH API RATE LIMIT CONSTANTS -----
+HH_API_MAX_REQUESTS_PER_SECOND = 5
+HH_API_MAX_CONCURRENT_REQUESTS = 5
+# Result of identical HH.ru GET call is reused by callers within this number of seconds
+HH_SINGLE_FLIGHT_RESULT_TTL_SECS = 3
+
+# ----- CIRCUIT BREAKER CONSTANTS -----
+# Consecutive failures (connection errors, timeouts, 5xx, 429) that open the circuit
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = 5
+# While circuit is open calls fail fast, then one trial call is let through
+CIRCUIT_BREAKER_RECOVERY_TIMEOUT_SECS = 60
+
+# ----- METRICS CONSTANTS -----
+# Percentiles are calculated over this number of the latest observations (per metric and labels)
+METRICS_HISTOGRAM_WINDOW_SIZE = 1000
+METRICS_SUMMARY_INTERVAL_SECS = 600
+
+# ----- NEGOTIATIONS COLLECTION CONSTANTS -----
+NEGOTIATIONS_PAGE_SIZE = 50
+NEGOTIATIONS_ITEMS_CHUNK_SIZE = 50
+NEGOTIATIONS_PAGE_STREAMING_THRESHOLD_BYTES = 1024 * 1024
+
+# ----- EMPLOYER STATE DISPATCHER CONSTANTS -----
+EMPLOYER_STATE_DISPATCH_INTERVAL_SECS = 5
+EMPLOYER_STATE_DISPATCH_MAX_ATTEMPTS = 3
+EMPLOYER_STATE_DISPATCH_RETRY_DELAY_SECS = 2
+
+# ----- NEGOTIATION MESSAGES OUTBOX CONSTANTS -----
+NEGOTIATION_MESSAGE_TEMPLATE_VIDEO_REQUEST = "applicant_video_request"
+NEGOTIATION_MESSAGES_WORKERS = 5
+NEGOTIATION_MESSAGES_MAX_ATTEMPTS = 3
+NEGOTIATION_MESSAGES_RETRY_DELAY_SECS = 2
+
 # ----- BASE URL CONSTANTS -----
 BASE_URL = "https://hrvibe-hh-callback-endpoint.onrender.com"
 
@@ -31,6 +68,121 @@ RESUME_SUBDIRECTORIES_LIST = ["new", "passed", "failed"]
 
 # ----- AI SERVICE CONSTANTS -----
 MODEL_NAME = "gpt-5"
+# Hard deadline of one AI analysis call (including SDK retries), the call is cancelled after it
+AI_REQUEST_TIMEOUT_SECS = 180
+# Concurrent AI analysis tasks (workers of 'ai_task_queue') and upper bound of adaptive concurrency
+AI_ANALYSIS_WORKERS = 8
+AI_MIN_CONCURRENCY = 1
+# Concurrency grows by one after this number of successful calls in a row
+AI_CONCURRENCY_INCREASE_AFTER_SUCCESSES = 10
+# Account quota of the model (requests and tokens per minute)
+AI_REQUESTS_PER_MINUTE = 500
+AI_TOKENS_PER_MINUTE = 500000
+# Expected answer size, added to prompt size when estimating tokens of a request
+AI_EXPECTED_OUTPUT_TOKENS = 2000
+AI_RATE_LIMIT_MAX_RETRIES = 5
+AI_RATE_LIMIT_RETRY_DELAY_SECS = 2
+# Failed AI tasks of 'ai_task_queue' are retried with exponential backoff, then kept as dead letters
+AI_TASK_MAX_ATTEMPTS = 3
+AI_TASK_RETRY_BASE_DELAY_SECS = 30
+AI_TASK_RETRY_MAX_DELAY_SECS = 600
+# Priority lanes of 'ai_task_queue' with weights: a manager waiting for the answer (sourcing criterias) is served
+# 8 times more often than bulk resume analyses, and one extra worker takes only interactive tasks
+AI_TASK_QUEUE_LANES = {"interactive": 8, "bulk": 1}
+AI_TASK_QUEUE_DEFAULT_LANE = "bulk"
+AI_TASK_QUEUE_RESERVED_WORKERS = {"interactive": 1}
+# Backend of 'ai_task_queue' (TASK_QUEUE_BACKEND env var): "memory" - asyncio queue of the process,
+# "postgres" - 'tasks' table drained by workers of all processes, tasks survive restarts
+TASK_QUEUE_BACKEND = "memory"
+# Worker holds claimed task for this long and extends the lease while the task runs, expired task is claimed again
+TASK_QUEUE_LEASE_SECS = 300
+TASK_QUEUE_POLL_INTERVAL_SECS = 1
+# Batch API mode of resume analysis (cheaper, results within completion window)
+AI_BATCH_COMPLETION_WINDOW = "24h"
+AI_BATCH_POLL_INTERVAL_SECS = 60
+# Multi-resume scoring: up to this number of short resumes are scored in one request (vacancy context is paid once)
+AI_RESUMES_PER_REQUEST = 5
+# Only resumes not longer than this (tokens of the resume sent to AI) are grouped, longer ones are scored one by one
+AI_MULTI_RESUME_MAX_RESUME_TOKENS = 1500
+# Tiered scoring: cheaper model scores every resume first, only resumes whose score is within
+# AI_ESCALATION_SCORE_BAND of RESUME_PASSED_SCORE (or invalid answers) are re-scored by MODEL_NAME
+AI_TIERED_ROUTING_ENABLED = True
+AI_SCREENING_MODEL_NAME = "gpt-5-mini"
+AI_ESCALATION_SCORE_BAND = 1
+# Fields of HH.ru vacancy which differ between re-posted or cloned vacancies with the same text,
+# they are ignored by the hash of vacancy description in sourcing criterias cache
+VACANCY_FIELDS_IGNORED_BY_CRITERIAS_CACHE = [
+    "id", "previous_id", "code", "manager", "relations", "counters", "archived", "approved", "hidden",
+    "created_at", "initial_created_at", "published_at", "expires_at",
+    "alternate_url", "apply_alternate_url", "negotiations_url", "suitable_resumes_url", "response_url",
+    "premium", "billing_type", "can_upgrade_billing_type", "vacancy_properties", "show_logo_in_search",
+    "closed_for_applicants", "response_notifications",
+]
+# Prices of models in USD per 1M tokens (input, cached input, output), used to estimate cost in 'ai_usage_ledger'
+AI_MODEL_PRICES_USD_PER_1M_TOKENS = {
+    "gpt-5": {"input": 1.25, "cached_input": 0.125, "output": 10.0},
+    "gpt-5-mini": {"input": 0.25, "cached_input": 0.025, "output": 2.0},
+}
+# Batch API requests are billed at this share of the price
+AI_BATCH_PRICE_FACTOR = 0.5
+# Default period and number of rows of /admin_ai_usage summary
+AI_USAGE_SUMMARY_DAYS = 7
+AI_USAGE_SUMMARY_MAX_ROWS = 20
+# Tokenizer used to count prompt tokens (falls back to ~4 characters per token if 'tiktoken' is not available)
+AI_TOKENIZER_ENCODING = "o200k_base"
+# Fields of HH.ru resume sent to AI for scoring: True - keep value as is, dict - keep only listed subfields
+# (applied to every item of a list). Names, contacts, photo, links and ids are not sent.
+_NAME_ONLY = {"name": True}
+_EDUCATION_ITEM_FIELDS = {"name": True, "organization": True, "result": True, "year": True}
+AI_RESUME_FIELDS_FOR_ANALYSIS = {
+    "title": True,
+    "age": True,
+    "gender": _NAME_ONLY,
+    "area": _NAME_ONLY,
+    "salary": True,
+    "total_experience": True,
+    "skills": True,
+    "skill_set": True,
+    "professional_roles": _NAME_ONLY,
+    "experience": {
+        "start": True,
+        "end": True,
+        "company": True,
+        "industries": _NAME_ONLY,
+        "area": _NAME_ONLY,
+        "position": True,
+        "description": True,
+    },
+    "education": {
+        "level": _NAME_ONLY,
+        "primary": _EDUCATION_ITEM_FIELDS,
+        "additional": _EDUCATION_ITEM_FIELDS,
+        "attestation": _EDUCATION_ITEM_FIELDS,
+    },
+    "certificate": {"title": True, "achieved_at": True},
+    "language": {"name": True, "level": _NAME_ONLY},
+    "citizenship": _NAME_ONLY,
+    "work_ticket": _NAME_ONLY,
+    "relocation": {"type": _NAME_ONLY, "area": _NAME_ONLY},
+    "business_trip_readiness": _NAME_ONLY,
+    "employment_form": _NAME_ONLY,
+    "work_format": _NAME_ONLY,
+    "schedules": _NAME_ONLY,
+    "driver_license_types": {"id": True},
+    "has_vehicle": True,
+}
+
+# ----- EMBEDDING SERVICE CONSTANTS -----
+# Embedder used for ranking resumes against vacancy: "hashing" (local stand-in, no API calls) or "openai"
+EMBEDDER_NAME = "hashing"
+OPENAI_EMBEDDING_MODEL = "text-embedding-3-small"
+HASHING_EMBEDDER_DIMENSIONS = 1024
+# Texts per embeddings request
+EMBEDDING_BATCH_SIZE = 100
+# Longer texts are cut before embedding (embedding models have input limit of ~8k tokens)
+EMBEDDING_MAX_TEXT_CHARS = 20000
+# Number of best ranked resumes in preview for manager
+RESUMES_TOP_N_PREVIEW = 10
 
 # ----- VIDEO SERVICE CONSTANTS -----
 MAX_DURATION_SECS = 90
@@ -21,6 +21,7 @@ from shared_services.constants import (
     USERS_RECORDS_FILENAME, 
     RESUME_RECORDS_FILENAME,
     BOT_FOR_APPLICANTS_USERNAME,
+    RESUME_SUBDIRECTORIES_LIST,
     )
 from shared_services.db_service import (
     is_value_in_db,
@@ -159,6 +160,16 @@ def get_data_subdirectory_path(subdirectory_name: str) -> Path:
         return None
 
 
+def get_vacancy_resumes_directory(vacancy_id: str) -> Path:
+    # TAGS: [get_data],[directory_path]
+    """Get the directory with resume files of the vacancy ('resumes/<vacancy_id>').
+    Resume files are sorted into RESUME_SUBDIRECTORIES_LIST subdirectories, created if missing."""
+    resumes_dir = get_data_directory() / "resumes" / str(vacancy_id)
+    for resume_subdirectory in RESUME_SUBDIRECTORIES_LIST:
+        (resumes_dir / resume_subdirectory).mkdir(parents=True, exist_ok=True)
+    return resumes_dir
+
+
 def get_decision_status_from_selected_callback_code(selected_callback_code: str) -> str:
     #TAGS: [get_data]
     """Extract the meaningful part of a callback code.
@@ -192,6 +203,14 @@ def get_expires_at_from_callback_endpoint_resp(endpoint_response: dict) -> Optio
         logger.debug(f"'endpoint_response' is not a dictionary: {endpoint_response}")
         return None
 
+def get_refresh_token_from_callback_endpoint_resp(endpoint_response: dict) -> Optional[str]:
+    """Get refresh_token from endpoint response. TAGS: [get_data]"""
+    if isinstance(endpoint_response, dict):
+        return endpoint_response.get("refresh_token", None)
+    else:
+        logger.debug(f"'endpoint_response' is not a dictionary: {endpoint_response}")
+        return None
+
 def get_reply_from_update_object(update: Update):
     """ Get user reply to from the update object if user did one of below. TAGS: [get_data].
     1. sent message (text, photo, video, etc.) - update.message OR
@@ -15,7 +15,8 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from telegram import Update
-from sqlalchemy import select, Boolean, String
+from sqlalchemy import select, func, Boolean, String
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from config import *
 from database import SessionLocal, Managers, Vacancies, Negotiations, Base
@@ -99,6 +100,50 @@ def create_new_record_in_db(
         db.close()
 
 
+def upsert_records_in_db(
+    db_model: Type[Base],
+    records: List[Dict[str, Any]],
+    update_fields: Optional[List[str]] = None,
+) -> int:
+    """Insert many records with one statement (Postgres 'INSERT ... ON CONFLICT').
+
+    Args:
+        db_model: The database model class (Managers, Vacancies, Negotiations, etc.)
+        records: List of dicts with column values, each dict must contain "id"
+        update_fields: Columns to overwrite if record with the same id exists.
+                       If not provided, existing records are left untouched.
+    Returns:
+        Number of inserted or updated records
+    """
+    method_name_for_logging = f"upsert_records_in_db: {db_model.__name__}"
+
+    if not records:
+        logger.debug(f"{method_name_for_logging} no records provided")
+        return 0
+
+    statement = pg_insert(db_model.__table__).values(records)
+    if update_fields:
+        statement = statement.on_conflict_do_update(
+            index_elements=["id"],
+            set_={field_name: statement.excluded[field_name] for field_name in update_fields},
+        )
+    else:
+        statement = statement.on_conflict_do_nothing(index_elements=["id"])
+
+    db = SessionLocal()
+    try:
+        result = db.execute(statement)
+        db.commit()
+        logger.debug(f"{method_name_for_logging} {result.rowcount} of {len(records)} record(s) inserted or updated")
+        return result.rowcount
+    except Exception as e:
+        db.rollback()
+        logger.error(f"{method_name_for_logging} error: {e}")
+        raise
+    finally:
+        db.close()
+
+
 # ****** [status_validation] ******
 
 
@@ -185,6 +230,38 @@ def get_column_value_in_db(db_model: Type[Base], record_id: str, field_name: str
     return value
 
 
+def get_column_values_in_db(db_model: Type[Base], record_id: str, field_names: List[str]) -> Dict[str, Any]:
+    """Get several column values of one record with one query.
+    Args:
+        db_model: The database model class (Managers, Vacancies, Negotiations, etc.)
+        record_id: Id of the record
+        field_names: Names of the columns to get
+    Returns:
+        Dict {field_name: value}, empty dict if record is not found
+    """
+    method_name_for_logging = f"get_column_values_in_db: {db_model.__name__}.{field_names}"
+
+    id_column = db_model.__table__.columns.get("id")
+    if id_column is None:
+        logger.warning(f"{method_name_for_logging} does not have id column")
+        return {}
+
+    columns = []
+    for field_name in field_names:
+        column = db_model.__table__.columns.get(field_name)
+        if column is None:
+            logger.warning(f"{method_name_for_logging} does not have column {field_name}")
+            return {}
+        columns.append(column)
+
+    with SessionLocal() as db:
+        row = db.execute(select(*columns).where(id_column == record_id)).one_or_none()
+
+    if row is None:
+        return {}
+    return dict(zip(field_names, row))
+
+
 def get_column_value_by_field(db_model: Type[Base], search_field_name: str, search_value: Any, target_field_name: str) -> Any:
     """Get a column value from a record found by a field other than id.
     Args:
@@ -215,6 +292,119 @@ def get_column_value_by_field(db_model: Type[Base], search_field_name: str, sear
     return value
 
 
+def get_column_value_by_fields(db_model: Type[Base], search_values: Dict[str, Any], target_field_name: str) -> Any:
+    """Get a column value from a record found by several fields at once.
+    Args:
+        db_model: The database model class (Managers, Vacancies, Negotiations, etc.)
+        search_values: Dict of field names and values to search by (e.g., {"resume_id": "...", "vacancy_id": "..."})
+        target_field_name: The field name to get the value from (e.g., "id")
+    Returns:
+        The value of the target field, or None if not found
+    """
+    method_name_for_logging = f"get_column_value_by_fields: {db_model.__name__}.{search_values}.{target_field_name}"
+
+    target_column = db_model.__table__.columns.get(target_field_name)
+    if target_column is None:
+        logger.warning(f"{method_name_for_logging} does not have target column {target_field_name}")
+        return None
+
+    conditions = []
+    for search_field_name, search_value in search_values.items():
+        search_column = db_model.__table__.columns.get(search_field_name)
+        if search_column is None:
+            logger.warning(f"{method_name_for_logging} does not have search column {search_field_name}")
+            return None
+        conditions.append(search_column == search_value)
+
+    with SessionLocal() as db:
+        value = db.execute(
+            select(target_column).where(*conditions)
+        ).scalar_one_or_none()
+
+    return value
+
+
+def get_record_ids_by_fields(db_model: Type[Base], search_values: Dict[str, Any], limit: Optional[int] = None) -> List[str]:
+    """Get ids of all records matching several fields at once.
+    Args:
+        db_model: The database model class (Managers, Vacancies, Negotiations, etc.)
+        search_values: Dict of field names and values to search by (e.g., {"status": "pending"})
+        limit: Maximum number of ids to return (all if not provided)
+    Returns:
+        List of ids ordered by creation time (if model has 'created_at'), empty list if nothing found
+    """
+    method_name_for_logging = f"get_record_ids_by_fields: {db_model.__name__}.{search_values}"
+
+    id_column = db_model.__table__.columns.get("id")
+    if id_column is None:
+        logger.error(f"{method_name_for_logging} does not have id column")
+        return []
+
+    conditions = []
+    for search_field_name, search_value in search_values.items():
+        search_column = db_model.__table__.columns.get(search_field_name)
+        if search_column is None:
+            logger.warning(f"{method_name_for_logging} does not have search column {search_field_name}")
+            return []
+        conditions.append(search_column == search_value)
+
+    query = select(id_column).where(*conditions)
+    created_at_column = db_model.__table__.columns.get("created_at")
+    if created_at_column is not None:
+        query = query.order_by(created_at_column)
+    if limit is not None:
+        query = query.limit(limit)
+
+    with SessionLocal() as db:
+        return list(db.execute(query).scalars().all())
+
+
+def count_records_by_fields(db_model: Type[Base], search_values: Dict[str, Any]) -> int:
+    """Count records matching several fields at once without loading them.
+    Args:
+        db_model: The database model class (Managers, Vacancies, Negotiations, etc.)
+        search_values: Dict of field names and values to search by (empty dict counts all records)
+    Returns:
+        Number of matching records
+    """
+    method_name_for_logging = f"count_records_by_fields: {db_model.__name__}.{search_values}"
+
+    conditions = []
+    for search_field_name, search_value in search_values.items():
+        search_column = db_model.__table__.columns.get(search_field_name)
+        if search_column is None:
+            logger.warning(f"{method_name_for_logging} does not have search column {search_field_name}")
+            return 0
+        conditions.append(search_column == search_value)
+
+    with SessionLocal() as db:
+        return db.execute(select(func.count()).select_from(db_model.__table__).where(*conditions)).scalar_one()
+
+
+def get_column_values_by_ids(db_model: Type[Base], record_ids: List[str], field_name: str) -> Dict[str, Any]:
+    """Get a column value of many records with one query.
+    Args:
+        db_model: The database model class (Managers, Vacancies, Negotiations, etc.)
+        record_ids: Ids of records
+        field_name: Name of the column to get
+    Returns:
+        Dict {record_id: value} of found records (missing ids are not included)
+    """
+    method_name_for_logging = f"get_column_values_by_ids: {db_model.__name__}.{field_name}"
+
+    column = db_model.__table__.columns.get(field_name)
+    id_column = db_model.__table__.columns.get("id")
+    if column is None or id_column is None:
+        logger.warning(f"{method_name_for_logging} does not have column {field_name} or id column")
+        return {}
+    if not record_ids:
+        return {}
+
+    with SessionLocal() as db:
+        rows = db.execute(select(id_column, column).where(id_column.in_(record_ids))).all()
+    return {record_id: value for record_id, value in rows}
+
+
 def update_column_value_by_field(
     db_model: Type[Base], 
     search_field_name: str, 
@@ -295,6 +485,52 @@ def update_record_in_db(db_model: Type[Base], record_id: str, updates: Dict[str,
         db.close()
 
 
+def update_record_in_db_if_matches(
+    db_model: Type[Base],
+    record_id: str,
+    expected_values: Dict[str, Any],
+    updates: Dict[str, Any],
+) -> bool:
+    """Update record only if it still has expected values (single 'UPDATE ... WHERE', atomic compare-and-set).
+    Used to claim a record by exactly one worker, e.g. {"status": "pending"} -> {"status": "sending"}.
+    Args:
+        db_model: The database model class (Managers, Vacancies, Negotiations, etc.)
+        record_id: The ID of the record to update
+        expected_values: Dict of field names and values the record must have
+        updates: Dict of field names and new values
+    Returns:
+        True if record was updated, False if it was not found or has other values
+    """
+    method_name_for_logging = f"update_record_in_db_if_matches: {db_model.__name__}.{record_id}"
+
+    id_column = db_model.__table__.columns.get("id")
+    if id_column is None:
+        logger.error(f"{method_name_for_logging} does not have id column")
+        return False
+
+    conditions = [id_column == record_id]
+    for field_name, expected_value in expected_values.items():
+        column = db_model.__table__.columns.get(field_name)
+        if column is None:
+            logger.warning(f"{method_name_for_logging} does not have column {field_name}")
+            return False
+        conditions.append(column == expected_value)
+
+    db = SessionLocal()
+    try:
+        result = db.query(db_model).filter(*conditions).update(updates, synchronize_session=False)
+        db.commit()
+        if result == 0:
+            logger.debug(f"{method_name_for_logging} not updated, values differ from {expected_values}")
+        return result > 0
+    except Exception as e:
+        db.rollback()
+        logger.error(f"{method_name_for_logging} error: {e}")
+        raise
+    finally:
+        db.close()
+
+
 def clear_column_value_in_db(db_model: Type[Base], record_id: str, field_name: str) -> None:
     
     method_name_for_logging = f"clear_column_value_in_db: {db_model.__name__}.{record_id}.{field_name}"
@@ -325,3 +561,43 @@ def clear_column_value_in_db(db_model: Type[Base], record_id: str, field_name: s
     finally:
         db.close()
 
+
+# ****** [delete_data] ******
+
+
+def delete_records_by_fields(
+    db_model: Type[Base],
+    search_values: Dict[str, Any],
+    exclude_values: Optional[Dict[str, Any]] = None,
+) -> int:
+    """Delete all records matching several fields at once.
+    Args:
+        db_model: The database model class (Managers, Vacancies, Negotiations, etc.)
+        search_values: Dict of field names and values records must have (empty dict matches all records)
+        exclude_values: Dict of field names and values records must not have
+    Returns:
+        Number of deleted records
+    """
+    method_name_for_logging = f"delete_records_by_fields: {db_model.__name__}.{search_values} excluding {exclude_values}"
+
+    conditions = []
+    for field_values, is_excluded in ((search_values, False), (exclude_values or {}, True)):
+        for field_name, value in field_values.items():
+            column = db_model.__table__.columns.get(field_name)
+            if column is None:
+                logger.warning(f"{method_name_for_logging} does not have column {field_name}")
+                return 0
+            conditions.append(column != value if is_excluded else column == value)
+
+    db = SessionLocal()
+    try:
+        result = db.query(db_model).filter(*conditions).delete(synchronize_session=False)
+        db.commit()
+        logger.debug(f"{method_name_for_logging} {result} record(s) deleted")
+        return result
+    except Exception as e:
+        db.rollback()
+        logger.error(f"{method_name_for_logging} error: {e}")
+        raise
+    finally:
+        db.close()
@@ -0,0 +1,168 @@
+# TAGS: [ai_related]
+# Embedding similarity ranking of resumes against vacancy (cheap pre-ordering before AI scoring)
+
+import hashlib
+import logging
+import math
+import os
+import re
+from collections import Counter
+from typing import Dict, List, Tuple
+
+import numpy as np
+from openai import AsyncOpenAI
+
+from database import TextEmbeddings
+from shared_services.ai_payload_service import project_resume_for_analysis, to_compact_json
+from shared_services.constants import (
+    EMBEDDER_NAME,
+    OPENAI_EMBEDDING_MODEL,
+    HASHING_EMBEDDER_DIMENSIONS,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_MAX_TEXT_CHARS,
+)
+from shared_services.db_service import get_column_values_by_ids, upsert_records_in_db
+
+logger = logging.getLogger(__name__)
+
+_WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+class Embedder:
+    """Turns texts into vectors. 'name' identifies the model, vectors of different embedders are not comparable."""
+
+    name: str = ""
+    dimensions: int = 0
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        """Returns:
+            np.ndarray: float32 matrix (len(texts) x dimensions) of L2-normalized vectors
+        """
+        raise NotImplementedError
+
+
+class HashingEmbedder(Embedder):
+    """Local stand-in model: bag of words hashed into fixed number of dimensions (signed feature hashing)
+    with sublinear term frequency. Deterministic and free, catches lexical overlap of resume and vacancy,
+    used for tests and as fallback when embeddings API should not be called."""
+
+    def __init__(self, dimensions: int = HASHING_EMBEDDER_DIMENSIONS):
+        self.dimensions = dimensions
+        self.name = f"hashing_{dimensions}"
+
+
+    def _embed_one(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for word, count in Counter(_WORD_PATTERN.findall(text.lower())).items():
+            # Python 'hash' is salted per process, so stable hash is used
+            word_hash = int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "little")
+            sign = 1.0 if word_hash >> 63 else -1.0
+            vector[word_hash % self.dimensions] += sign * (1.0 + math.log(count))
+        return vector
+
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        matrix = np.stack([self._embed_one(text) for text in texts]) if texts else np.zeros((0, self.dimensions), dtype=np.float32)
+        return _normalize_rows(matrix)
+
+
+class OpenAIEmbedder(Embedder):
+    """Embeddings API of OpenAI."""
+
+    def __init__(self, model: str = OPENAI_EMBEDDING_MODEL):
+        self.model = model
+        self.name = f"openai_{model}"
+        self._client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        rows = []
+        for start in range(0, len(texts), EMBEDDING_BATCH_SIZE):
+            response = await self._client.embeddings.create(model=self.model, input=texts[start:start + EMBEDDING_BATCH_SIZE])
+            rows.extend(item.embedding for item in sorted(response.data, key=lambda item: item.index))
+        if not rows:
+            return np.zeros((0, 0), dtype=np.float32)
+        self.dimensions = len(rows[0])
+        return _normalize_rows(np.asarray(rows, dtype=np.float32))
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32)
+
+
+def build_embedder(embedder_name: str = EMBEDDER_NAME) -> Embedder:
+    if embedder_name == "openai":
+        return OpenAIEmbedder()
+    if embedder_name == "hashing":
+        return HashingEmbedder()
+    raise ValueError(f"Unknown embedder '{embedder_name}', expected 'hashing' or 'openai'")
+
+
+def build_vacancy_text(vacancy_description: dict, sourcing_criterias: dict) -> str:
+    """Text of the vacancy for embedding: description and sourcing criterias."""
+    return f"{to_compact_json(vacancy_description, sort_keys=True)}\n{to_compact_json(sourcing_criterias, sort_keys=True)}"
+
+
+def build_resume_text(resume_data: dict) -> str:
+    """Text of the resume for embedding: the same scoring fields as sent to AI."""
+    return to_compact_json(project_resume_for_analysis(resume_data))
+
+
+class ResumeRanker:
+    """Ranks resumes of the vacancy by cosine similarity of embeddings.
+    - each text is embedded once: vectors are stored as float32 bytes in 'text_embeddings' by text hash
+    - all resumes are scored by one matrix-vector product (vectors are L2-normalized, so dot product is cosine)
+    Usage:
+        ranking = await resume_ranker.rank_resumes(vacancy_text, {resume_id: resume_text})
+    """
+
+    def __init__(self, embedder: Embedder):
+        self.embedder = embedder
+
+
+    def _embedding_id(self, text: str) -> str:
+        return f"{self.embedder.name}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+
+    async def embed_texts(self, texts: List[str]) -> np.ndarray:
+        """Vectors of texts (matrix in the same order), only texts not embedded before are sent to embedder."""
+        texts = [text[:EMBEDDING_MAX_TEXT_CHARS] for text in texts]
+        embedding_ids = [self._embedding_id(text) for text in texts]
+        stored_vectors = get_column_values_by_ids(db_model=TextEmbeddings, record_ids=list(set(embedding_ids)), field_name="vector")
+        vectors = {embedding_id: np.frombuffer(vector, dtype=np.float32) for embedding_id, vector in stored_vectors.items()}
+
+        missing_texts = {embedding_id: text for embedding_id, text in zip(embedding_ids, texts) if embedding_id not in vectors}
+        if missing_texts:
+            new_matrix = await self.embedder.embed(list(missing_texts.values()))
+            records = []
+            for embedding_id, vector in zip(missing_texts.keys(), new_matrix):
+                vectors[embedding_id] = vector
+                records.append({
+                    "id": embedding_id,
+                    "embedder": self.embedder.name,
+                    "dimensions": int(vector.shape[0]),
+                    "vector": vector.astype(np.float32).tobytes(),
+                })
+            upsert_records_in_db(db_model=TextEmbeddings, records=records)
+        logger.debug(f"ResumeRanker: {len(texts)} texts, {len(missing_texts)} embedded, {len(texts) - len(missing_texts)} taken from DB")
+        return np.stack([vectors[embedding_id] for embedding_id in embedding_ids])
+
+
+    async def rank_resumes(self, vacancy_text: str, resume_texts: Dict[str, str]) -> List[Tuple[str, float]]:
+        """Returns:
+            list: [(resume_id, similarity)] sorted from the most similar resume
+        """
+        if not resume_texts:
+            return []
+        resume_ids = list(resume_texts.keys())
+        matrix = await self.embed_texts([vacancy_text] + [resume_texts[resume_id] for resume_id in resume_ids])
+        vacancy_vector, resume_matrix = matrix[0], matrix[1:]
+        similarities = resume_matrix @ vacancy_vector
+        order = np.argsort(-similarities, kind="stable")
+        return [(resume_ids[index], float(similarities[index])) for index in order]
+
+
+# Global ranker of resumes
+resume_ranker = ResumeRanker(embedder=build_embedder())
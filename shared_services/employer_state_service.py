@@ -0,0 +1,181 @@
+# TAGS: [negotiations_related]
+# Background dispatcher of employer state transitions (HH.ru negotiations collections)
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from database import Negotiations
+from shared_services.constants import (
+    EMPLOYER_STATE_CONSIDER,
+    EMPLOYER_STATE_DISPATCH_INTERVAL_SECS,
+    EMPLOYER_STATE_DISPATCH_MAX_ATTEMPTS,
+    EMPLOYER_STATE_DISPATCH_RETRY_DELAY_SECS,
+)
+from shared_services.db_service import update_record_in_db
+from shared_services.hh_service import change_negotiation_collection_status
+from shared_services.rate_limiter_service import AsyncRateLimiter, hh_rate_limiter
+from shared_services.token_service import hh_token_manager
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class EmployerStateTransition:
+    """Pending move of a negotiation to the target collection (employer state)."""
+    negotiation_id: str
+    manager_id: str
+    target_state: str = EMPLOYER_STATE_CONSIDER
+
+
+class EmployerStateDispatcher:
+    """Collects employer state transitions and executes them in batches in the background.
+    - 'submit' only records the transition, so AI analysis tasks are not blocked by HH.ru PUT latency
+    - each batch is executed concurrently under the shared HH.ru rate limiter
+    - failed transitions are retried with growing delay
+    - final state of each negotiation is saved to 'Negotiations' table
+    """
+
+    def __init__(
+        self,
+        rate_limiter: AsyncRateLimiter,
+        dispatch_interval_secs: float = EMPLOYER_STATE_DISPATCH_INTERVAL_SECS,
+        max_attempts: int = EMPLOYER_STATE_DISPATCH_MAX_ATTEMPTS,
+        retry_delay_secs: float = EMPLOYER_STATE_DISPATCH_RETRY_DELAY_SECS,
+    ):
+        self._rate_limiter = rate_limiter
+        self._dispatch_interval_secs = dispatch_interval_secs
+        self._max_attempts = max_attempts
+        self._retry_delay_secs = retry_delay_secs
+        # Pending transitions keyed by negotiation_id (the latest submitted target state wins)
+        self._pending: Dict[str, EmployerStateTransition] = {}
+        self._dispatcher_running = False
+        self._dispatcher_task: Optional[asyncio.Task] = None
+
+
+    async def submit(self, negotiation_id: str, manager_id: str, target_state: str = EMPLOYER_STATE_CONSIDER) -> None:
+        """Record transition to be executed by the next batch. Does not call HH.ru.
+        Access token of the manager is taken right before the PUT request, so it is valid even for late batches.
+        'pending' status is saved to DB (in a thread) before the transition is added to the batch,
+        so it never overwrites the final status saved by the batch."""
+        await asyncio.to_thread(update_record_in_db, db_model=Negotiations, record_id=negotiation_id, updates={"employer_state_transition_status": "pending"})
+        self._pending[negotiation_id] = EmployerStateTransition(
+            negotiation_id=negotiation_id,
+            manager_id=manager_id,
+            target_state=target_state,
+        )
+        logger.debug(f"EmployerStateDispatcher: transition of negotiation {negotiation_id} to '{target_state}' submitted. Pending: {len(self._pending)}")
+
+
+    def pending_count(self) -> int:
+        """Number of transitions waiting for the next batch."""
+        return len(self._pending)
+
+
+    async def flush(self) -> Dict[str, bool]:
+        """Execute all pending transitions concurrently.
+        Returns:
+            dict: {negotiation_id: True if transition succeeded, False otherwise}
+        """
+        if not self._pending:
+            return {}
+
+        batch = list(self._pending.values())
+        self._pending.clear()
+        logger.info(f"EmployerStateDispatcher: executing batch of {len(batch)} transitions")
+
+        try:
+            results = await asyncio.gather(*(self._execute_transition(transition) for transition in batch))
+        except asyncio.CancelledError:
+            # Return interrupted batch to pending (repeated PUT to the same collection is harmless)
+            for transition in batch:
+                self._pending.setdefault(transition.negotiation_id, transition)
+            raise
+        batch_results = {transition.negotiation_id: result for transition, result in zip(batch, results)}
+
+        logger.info(
+            f"EmployerStateDispatcher: batch completed. "
+            f"Success: {sum(batch_results.values())}, Failed: {len(batch_results) - sum(batch_results.values())}"
+        )
+        return batch_results
+
+
+    async def _execute_transition(self, transition: EmployerStateTransition) -> bool:
+        """Execute single transition with retries and save its final state to DB."""
+        for attempt in range(1, self._max_attempts + 1):
+            access_token = await hh_token_manager.get_access_token(manager_id=transition.manager_id)
+            async with self._rate_limiter:
+                # 'requests' is blocking, so the call is executed in a separate thread
+                response = await asyncio.to_thread(
+                    change_negotiation_collection_status,
+                    access_token=access_token,
+                    negotiation_id=transition.negotiation_id,
+                    target_collection_name=transition.target_state,
+                )
+            if response is not None:
+                await asyncio.to_thread(
+                    update_record_in_db,
+                    db_model=Negotiations,
+                    record_id=transition.negotiation_id,
+                    updates={"employer_state": transition.target_state, "employer_state_transition_status": "completed"},
+                )
+                logger.debug(f"EmployerStateDispatcher: negotiation {transition.negotiation_id} moved to '{transition.target_state}' on attempt {attempt}")
+                return True
+
+            logger.warning(f"EmployerStateDispatcher: attempt {attempt}/{self._max_attempts} failed for negotiation {transition.negotiation_id}")
+            if attempt < self._max_attempts:
+                await asyncio.sleep(self._retry_delay_secs * 2 ** (attempt - 1))
+
+        await asyncio.to_thread(update_record_in_db, db_model=Negotiations, record_id=transition.negotiation_id, updates={"employer_state_transition_status": "failed"})
+        logger.error(f"EmployerStateDispatcher: failed to move negotiation {transition.negotiation_id} to '{transition.target_state}' after {self._max_attempts} attempts")
+        return False
+
+
+    async def _dispatcher(self) -> None:
+        """Executes pending transitions every 'dispatch_interval_secs' until stopped."""
+        logger.info("Employer state dispatcher started")
+        while self._dispatcher_running:
+            try:
+                await asyncio.sleep(self._dispatch_interval_secs)
+                await self.flush()
+            except asyncio.CancelledError:
+                logger.info("Employer state dispatcher cancelled")
+                break
+            except Exception as e:
+                # Continue dispatching even on unexpected error
+                logger.error(f"Unexpected error in employer state dispatcher: {e}", exc_info=True)
+                continue
+        logger.info("Employer state dispatcher stopped")
+
+
+    def start(self) -> None:
+        """Start background dispatching of pending transitions."""
+        if self._dispatcher_running:
+            logger.warning("Employer state dispatcher is already running")
+            return
+        self._dispatcher_running = True
+        self._dispatcher_task = asyncio.create_task(self._dispatcher())
+
+
+    async def stop(self, wait: bool = True) -> None:
+        """Stop background dispatching.
+        Args:
+            wait: If True, execute transitions that are still pending before stopping
+        """
+        if not self._dispatcher_running:
+            logger.warning("Employer state dispatcher is not running")
+            return
+        self._dispatcher_running = False
+        if self._dispatcher_task:
+            self._dispatcher_task.cancel()
+            try:
+                await self._dispatcher_task
+            except asyncio.CancelledError:
+                pass
+        if wait:
+            await self.flush()
+
+
+# Global dispatcher of employer state transitions
+employer_state_dispatcher = EmployerStateDispatcher(rate_limiter=hh_rate_limiter)
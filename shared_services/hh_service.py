@@ -1,10 +1,14 @@
 # exchange_code.py
 import os, requests, json
 import sys
+import asyncio
 import logging
-from typing import Optional
+import time
+from typing import Optional, List, Iterator, AsyncIterator
 from pathlib import Path
 
+import ijson
+
 # Add project root to path to access shared_services
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
@@ -12,8 +16,17 @@ sys.path.insert(0, str(project_root))
 from telegram._passport.passportdata import PassportData
 
 from shared_services.data_service import create_json_file_with_dictionary_content
-
-from shared_services.constants import EMPLOYER_STATE_RESPONSE, EMPLOYER_STATE_CONSIDER
+from shared_services.single_flight_service import hh_single_flight, single_flight
+from shared_services.circuit_breaker_service import CircuitOpenError, hh_circuit_breaker
+from shared_services.metrics_service import metrics_registry
+
+from shared_services.constants import (
+    EMPLOYER_STATE_RESPONSE,
+    EMPLOYER_STATE_CONSIDER,
+    NEGOTIATIONS_PAGE_SIZE,
+    NEGOTIATIONS_ITEMS_CHUNK_SIZE,
+    NEGOTIATIONS_PAGE_STREAMING_THRESHOLD_BYTES,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -21,10 +34,60 @@ HH_CLIENT_ID     = os.getenv("HH_CLIENT_ID")
 HH_CLIENT_SECRET = os.getenv("HH_CLIENT_SECRET")
 REDIRECT_URI     = os.getenv("OAUTH_REDIRECT_URL")
 USER_AGENT       = os.getenv("USER_AGENT")
+# Base URL of HH.ru API. Can be pointed to local stub server (see local_hh_api/) for load testing
+HH_API_BASE_URL  = os.getenv("HH_API_BASE_URL", "https://api.hh.ru").rstrip("/")
+
+
+def _send_hh_request(method: str, url: str, endpoint: str, **kwargs) -> requests.Response:
+    """Send request to HH.ru API through the circuit breaker and record its metrics.
+    While HH.ru is down, raises 'CircuitOpenError' (a 'requests.RequestException') without waiting for timeout.
+    Args:
+        method: HTTP method
+        url: Full URL of the request
+        endpoint: Endpoint template used as metrics label, e.g. "/resumes/{resume_id}"
+    """
+    labels = {"method": method, "endpoint": endpoint}
+    try:
+        hh_circuit_breaker.before_call()
+    except CircuitOpenError:
+        metrics_registry.increment("hh_requests_total", labels={**labels, "status": "circuit_open"})
+        raise
+
+    started_at = time.monotonic()
+    try:
+        response = requests.request(method, url, **kwargs)
+    except Exception as e:
+        # Any error without response (not only connection errors) releases the half-open trial call
+        hh_circuit_breaker.record_failure()
+        metrics_registry.increment("hh_requests_total", labels={**labels, "status": type(e).__name__})
+        metrics_registry.observe("hh_request_duration_secs", time.monotonic() - started_at, labels=labels)
+        raise
+    # For streamed responses it is time to headers, body is read by the caller
+    duration_secs = time.monotonic() - started_at
+    hh_circuit_breaker.record_response(response)
+
+    metrics_registry.increment("hh_requests_total", labels={**labels, "status": str(response.status_code)})
+    metrics_registry.observe("hh_request_duration_secs", duration_secs, labels=labels)
+    # Do not read body of streamed response here, size is known only from header then
+    content_length = response.headers.get("Content-Length")
+    if content_length is not None and content_length.isdigit():
+        metrics_registry.observe("hh_response_size_bytes", int(content_length), labels=labels)
+    elif not kwargs.get("stream"):
+        metrics_registry.observe("hh_response_size_bytes", len(response.content), labels=labels)
+    return response
+
+
+def is_transient_hh_error(error: Exception) -> bool:
+    """Request to HH.ru is worth retrying: network error, open circuit, rate limit (429) or server error (5xx).
+    Other HTTP errors (400, 403, 404, ...) will repeat on retry."""
+    if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+        return error.response.status_code == 429 or error.response.status_code >= 500
+    return isinstance(error, requests.RequestException)
 
 
 # ------------------------------ USER related calls ------------------------------
 
+@single_flight(hh_single_flight)
 def get_user_info_from_hh(access_token: str) -> Optional[dict]:
     """Get user info from HH.ru API
     Args:
@@ -33,8 +96,10 @@ def get_user_info_from_hh(access_token: str) -> Optional[dict]:
         dict: User info from HH.ru API or None if request failed
     """
     try:
-        r = requests.get(
-            "https://api.hh.ru/me",
+        r = _send_hh_request(
+            "GET",
+            f"{HH_API_BASE_URL}/me",
+            endpoint="/me",
             headers={
                 "Authorization": f"Bearer {access_token}",
                 "User-Agent": USER_AGENT,
@@ -55,6 +120,41 @@ def get_user_info_from_hh(access_token: str) -> Optional[dict]:
         return None
 
 
+def refresh_access_token_from_hh(refresh_token: str) -> Optional[dict]:
+    """Get new pair of access and refresh tokens from HH.ru API using refresh token.
+    Args:
+        refresh_token (str): Refresh token received together with the current access token
+    Returns:
+        dict: {"access_token", "token_type", "refresh_token", "expires_in"} or None if request failed
+    More info on the HH API: Обновление пары access и refresh токенов
+    https://api.hh.ru/openapi/redoc#tag/Avtorizaciya-rabotodatelya/operation/authorize"""
+    try:
+        r = _send_hh_request(
+            "POST",
+            f"{HH_API_BASE_URL}/token",
+            endpoint="/token",
+            headers={"User-Agent": USER_AGENT},
+            data={
+                "grant_type": "refresh_token",
+                "refresh_token": refresh_token,
+            },
+            timeout=10,
+        )
+        r.raise_for_status()
+        if r.status_code == 200:
+            logger.debug("refresh_access_token_from_hh: request successful")
+            return r.json()
+        else:
+            logger.error(f"refresh_access_token_from_hh: request failed: {r.status_code} {r.text}")
+            return None
+    except Exception as e:
+        if isinstance(e, requests.exceptions.HTTPError):
+            logger.error(f"HTTP error refreshing access token: {e.response.status_code} - {e.response.text}")
+        else:
+            logger.error(f"Error refreshing access token: {e}", exc_info=True)
+        return None
+
+
 def clean_user_info_received_from_hh(user_info: dict) -> dict:
     """Clean user info recieved from HH.ru API
     Args:
@@ -77,32 +177,16 @@ def clean_user_info_received_from_hh(user_info: dict) -> dict:
 
 # ------------------------------ VACANCY related calls ------------------------------
 
-def _get_fake_vacancies_data() -> Optional[dict]:
-    """Load fake vacancies data from JSON file for testing when HH API is unavailable."""
-    try:
-        # Get project root (go up from shared_services to project root)
-        project_root = Path(__file__).parent.parent
-        fake_data_path = project_root / "test_data" / "fake_vacancies.json"
-        
-        if fake_data_path.exists():
-            with open(fake_data_path, "r", encoding="utf-8") as f:
-                fake_data = json.load(f)
-            logger.info(f"Loaded fake vacancies data from {fake_data_path}")
-            return fake_data
-        else:
-            logger.warning(f"Fake vacancies file not found at {fake_data_path}")
-            return None
-    except Exception as e:
-        logger.error(f"Error loading fake vacancies data: {e}", exc_info=True)
-        return None
-
-
+@single_flight(hh_single_flight)
 def get_employer_vacancies_from_hh(access_token: str, employer_id: str) -> Optional[dict]:
-    '''
-    url = f"https://api.hh.ru/employers/{employer_id}/vacancies/active"
+    """Get active vacancies of the employer from HH.ru API.
+    For local testing point HH_API_BASE_URL to the stub server (see local_hh_api/), it serves fake vacancies."""
+    url = f"{HH_API_BASE_URL}/employers/{employer_id}/vacancies/active"
     try:
-        r = requests.get(
+        r = _send_hh_request(
+            "GET",
             url,
+            endpoint="/employers/{employer_id}/vacancies/active",
             headers={
                 "Authorization": f"Bearer {access_token}",
                 "User-Agent": USER_AGENT,
@@ -122,18 +206,7 @@ def get_employer_vacancies_from_hh(access_token: str, employer_id: str) -> Optio
         else:
             logger.error(f"Error getting employer vacancies: {e}", exc_info=True)
         return None
-        '''
 
-    #  !!!!!!! DELETE AFTER TESTING !!!!!!!
-    #  !!!!!!! DELETE AFTER TESTING !!!!!!!
-    #  !!!!!!! DELETE AFTER TESTING !!!!!!!
-
-    # Fallback to fake data when HH API is unavailable
-    return _get_fake_vacancies_data()
-
-    #  !!!!!!! DELETE AFTER TESTING !!!!!!!
-    #  !!!!!!! DELETE AFTER TESTING !!!!!!!
-    #  !!!!!!! DELETE AFTER TESTING !!!!!!!
 
 def filter_open_employer_vacancies(vacancies_json: dict, status_to_filter: str) -> dict:
     """
@@ -164,11 +237,14 @@ def filter_open_employer_vacancies(vacancies_json: dict, status_to_filter: str)
     return result
 
 
+@single_flight(hh_single_flight)
 def get_vacancy_description_from_hh(access_token: str, vacancy_id: str) -> Optional[dict]:
     """Get vacancy description from HH.ru API and return it as a dictionary"""
     try:
-        r = requests.get(
-            f"https://api.hh.ru/vacancies/{vacancy_id}",
+        r = _send_hh_request(
+            "GET",
+            f"{HH_API_BASE_URL}/vacancies/{vacancy_id}",
+            endpoint="/vacancies/{vacancy_id}",
             headers={
                 "Authorization": f"Bearer {access_token}",
                 "User-Agent": USER_AGENT,
@@ -191,11 +267,14 @@ def get_vacancy_description_from_hh(access_token: str, vacancy_id: str) -> Optio
 
 # ------------------------------ NEGOTIATIONS related calls ------------------------------
 
+@single_flight(hh_single_flight)
 def get_available_employer_states_and_collections_negotiations(access_token: str, vacancy_id: str) -> Optional[dict]:
     """Returns the list of negotiations for a vacancy"""
     try:
-        r = requests.get(
-            "https://api.hh.ru/negotiations",
+        r = _send_hh_request(
+            "GET",
+            f"{HH_API_BASE_URL}/negotiations",
+            endpoint="/negotiations",
             headers={
                 "Authorization": f"Bearer {access_token}",
                 "User-Agent": USER_AGENT,
@@ -220,11 +299,14 @@ def get_available_employer_states_and_collections_negotiations(access_token: str
         return None
 
 
+@single_flight(hh_single_flight)
 def get_negotiations_by_collection(access_token: str, vacancy_id: str, collection: str) -> Optional[dict]:
     try:
-        url = f"https://api.hh.ru/negotiations/{collection}?vacancy_id={vacancy_id}"
-        r = requests.get(
+        url = f"{HH_API_BASE_URL}/negotiations/{collection}?vacancy_id={vacancy_id}"
+        r = _send_hh_request(
+            "GET",
             url,
+            endpoint="/negotiations/{collection}",
             headers={"Authorization": f"Bearer {access_token}", "User-Agent": USER_AGENT},
             timeout=15
         )
@@ -251,71 +333,28 @@ def get_negotiations_collection_with_status_response(access_token: str, vacancy_
     - found: total number of items
     - pages: total number of pages
     - per_page: number of items per page
+    The whole collection is kept in memory. For big collections use 'stream_negotiations_collection_items'.
     More info on the HH API: Список откликов/приглашений коллекции
     https://api.hh.ru/openapi/redoc#tag/Otklikipriglasheniya-rabotodatelya/operation/get-collection-negotiations-list"""
     try:
-        page = 0
-        per_page = 50
+        collection_meta = {}
         all_items = []
-        collection = EMPLOYER_STATE_RESPONSE
-
-        url = f"https://api.hh.ru/negotiations/{collection}"
-        headers={"Authorization": f"Bearer {access_token}", "User-Agent": USER_AGENT}
-        params = {
-                "vacancy_id": vacancy_id,
-                "per_page": per_page,
-                "page": page,   # не page_number!
-            }
-        
-        # Fetch first page
-        r = requests.get(
-            url,
-            headers=headers,
-            timeout=15,
-            params=params
-        )
-        r.raise_for_status()
-        
-        if r.status_code == 200:
-            data = r.json()
-            total_pages = data.get("pages", 1)
-            found = data.get("found", 0)
-            
-            # Collect items from first page
-            items = data.get("items", [])
-            all_items.extend(items)
-            logger.debug(f"get_negotiations_collection_with_status_response: page {page} fetched successfully ({len(items)} items)")
-            
-            # Fetch remaining pages
-            while page + 1 < total_pages:
-                page += 1
-                r = requests.get(
-                    url,
-                    headers={"Authorization": f"Bearer {access_token}", "User-Agent": USER_AGENT},
-                    timeout=15,
-                    params={"vacancy_id": vacancy_id, "per_page": 50, "page": page}
-                )
-                r.raise_for_status()
-                
-                if r.status_code == 200:
-                    data = r.json()
-                    items = data.get("items", [])
-                    all_items.extend(items)
-                    logger.debug(f"get_negotiations_collection_with_status_response: page {page} fetched successfully ({len(items)} items)")
-                else:
-                    logger.error(f"get_negotiations_collection_with_status_response: request failed for page {page}: {r.status_code} {r.text}")
-            # Combine all pages into a single structure
-            combined_data = {
-                "items": all_items,
-                "found": found,
-                "pages": total_pages,
-                "per_page": per_page
-            }            
-            logger.debug(f"get_negotiations_collection_with_status_response: Returning combined data")
-            return combined_data
-        else:
-            logger.error(f"get_negotiations_collection_with_status_response: request failed: {r.status_code} {r.text}. Returning None.")
-            return None
+        for items_chunk in iter_negotiations_collection_items(
+            access_token=access_token,
+            vacancy_id=vacancy_id,
+            collection=EMPLOYER_STATE_RESPONSE,
+            collection_meta=collection_meta,
+        ):
+            all_items.extend(items_chunk)
+        # Combine all pages into a single structure
+        combined_data = {
+            "items": all_items,
+            "found": collection_meta.get("found", 0),
+            "pages": collection_meta.get("pages", 1),
+            "per_page": NEGOTIATIONS_PAGE_SIZE
+        }
+        logger.debug(f"get_negotiations_collection_with_status_response: Returning combined data")
+        return combined_data
     except Exception as e:
         if isinstance(e, requests.exceptions.HTTPError):
             logger.error(f"HTTP error get_negotiations_collection_with_status_response: {e.response.status_code} - {e.response.text}")
@@ -324,12 +363,122 @@ def get_negotiations_collection_with_status_response(access_token: str, vacancy_
         return None
 
 
+def iter_negotiations_collection_items(
+    access_token: str,
+    vacancy_id: str,
+    collection: str = EMPLOYER_STATE_RESPONSE,
+    collection_meta: Optional[dict] = None,
+) -> Iterator[List[dict]]:
+    """
+    Fetch negotiations collection page by page and yield items in chunks.
+    Only one page is kept in memory. Pages bigger than NEGOTIATIONS_PAGE_STREAMING_THRESHOLD_BYTES
+    are parsed incrementally with 'ijson', so even a single page is not materialized.
+    Args:
+        collection_meta: Optional dict, filled with "found" and "pages" values from HH.ru response
+    Raises:
+        requests.exceptions.HTTPError: if any page request fails
+    """
+    if collection_meta is None:
+        collection_meta = {}
+    url = f"{HH_API_BASE_URL}/negotiations/{collection}"
+    headers = {"Authorization": f"Bearer {access_token}", "User-Agent": USER_AGENT}
+    page = 0
+    total_pages = 1
+
+    while page < total_pages:
+        params = {
+            "vacancy_id": vacancy_id,
+            "per_page": NEGOTIATIONS_PAGE_SIZE,
+            "page": page,   # не page_number!
+        }
+        with _send_hh_request("GET", url, endpoint="/negotiations/{collection}", headers=headers, timeout=15, params=params, stream=True) as r:
+            r.raise_for_status()
+            page_meta = {}
+            items_count = 0
+            for items_chunk in _iter_negotiations_page_items(response=r, page_meta=page_meta):
+                items_count += len(items_chunk)
+                yield items_chunk
+        total_pages = page_meta.get("pages", total_pages)
+        collection_meta["found"] = page_meta.get("found", collection_meta.get("found", 0))
+        collection_meta["pages"] = total_pages
+        logger.debug(f"iter_negotiations_collection_items: page {page} of {total_pages} fetched successfully ({items_count} items)")
+        page += 1
+
+
+def _iter_negotiations_page_items(response: requests.Response, page_meta: dict) -> Iterator[List[dict]]:
+    """Parse one page of negotiations collection and yield its items in chunks.
+    Fills page_meta with "found" and "pages" values of the page."""
+    content_length = int(response.headers.get("Content-Length") or 0)
+    # Chunked responses have no Content-Length, so they are treated as big ones
+    is_big_page = content_length == 0 or content_length > NEGOTIATIONS_PAGE_STREAMING_THRESHOLD_BYTES
+
+    if not is_big_page:
+        data = response.json()
+        page_meta["found"] = data.get("found", 0)
+        page_meta["pages"] = data.get("pages", 1)
+        items = data.get("items", [])
+        for chunk_start in range(0, len(items), NEGOTIATIONS_ITEMS_CHUNK_SIZE):
+            yield items[chunk_start:chunk_start + NEGOTIATIONS_ITEMS_CHUNK_SIZE]
+        return
+
+    # ----- STREAMING PARSING of big page -----
+
+    # decode gzip/deflate on the fly when reading raw stream
+    response.raw.decode_content = True
+    items_chunk = []
+    item_builder = None
+    for prefix, event, value in ijson.parse(response.raw, use_float=True):
+        if item_builder is not None:
+            item_builder.event(event, value)
+            if prefix == "items.item" and event == "end_map":
+                items_chunk.append(item_builder.value)
+                item_builder = None
+                if len(items_chunk) >= NEGOTIATIONS_ITEMS_CHUNK_SIZE:
+                    yield items_chunk
+                    items_chunk = []
+        elif prefix == "items.item" and event == "start_map":
+            item_builder = ijson.ObjectBuilder()
+            item_builder.event(event, value)
+        elif prefix in ("found", "pages") and event == "number":
+            page_meta[prefix] = int(value)
+    if items_chunk:
+        yield items_chunk
+
+
+async def stream_negotiations_collection_items(
+    access_token: str,
+    vacancy_id: str,
+    collection: str = EMPLOYER_STATE_RESPONSE,
+    collection_meta: Optional[dict] = None,
+) -> AsyncIterator[List[dict]]:
+    """Async version of 'iter_negotiations_collection_items'.
+    Each chunk is fetched and parsed in a separate thread, so the event loop is not blocked,
+    and the next page is requested only when the consumer has processed the previous chunks."""
+    items_chunks = iter_negotiations_collection_items(
+        access_token=access_token,
+        vacancy_id=vacancy_id,
+        collection=collection,
+        collection_meta=collection_meta,
+    )
+    try:
+        while True:
+            items_chunk = await asyncio.to_thread(next, items_chunks, None)
+            if items_chunk is None:
+                break
+            yield items_chunk
+    finally:
+        items_chunks.close()
+
+
+@single_flight(hh_single_flight)
 def get_negotiations_by_state(access_token: str, vacancy_id: str, state_id: str) -> Optional[dict]:
     """Get negotiations by state to see what collections are available"""
     try:
-        url = f"https://api.hh.ru/negotiations/?vacancy_id={vacancy_id}&state={state_id}"
-        r = requests.get(
+        url = f"{HH_API_BASE_URL}/negotiations/?vacancy_id={vacancy_id}&state={state_id}"
+        r = _send_hh_request(
+            "GET",
             url,
+            endpoint="/negotiations",
             headers={"Authorization": f"Bearer {access_token}", "User-Agent": USER_AGENT},
             timeout=15
         )
@@ -348,11 +497,15 @@ def get_negotiations_by_state(access_token: str, vacancy_id: str, state_id: str)
         return None
 
 
+# Messages change after each sent message, so only in-flight calls are shared
+@single_flight(hh_single_flight, ttl_secs=0)
 def get_negotiations_messages(access_token: str, negotiation_id: str) -> Optional[dict]:
     try:
-        url = f"https://api.hh.ru/negotiations/{negotiation_id}/messages"
-        r = requests.get(
+        url = f"{HH_API_BASE_URL}/negotiations/{negotiation_id}/messages"
+        r = _send_hh_request(
+            "GET",
             url,
+            endpoint="/negotiations/{negotiation_id}/messages",
             headers={"Authorization": f"Bearer {access_token}", "User-Agent": USER_AGENT},
             timeout=15
         )
@@ -375,17 +528,34 @@ def change_negotiation_collection_status_to_consider(
     access_token: str, 
     negotiation_id: str,
     ):
+    return change_negotiation_collection_status(
+        access_token=access_token,
+        negotiation_id=negotiation_id,
+        target_collection_name=EMPLOYER_STATE_CONSIDER,
+    )
+
+
+def change_negotiation_collection_status(
+    access_token: str,
+    negotiation_id: str,
+    target_collection_name: str,
+    ):
+    """Move negotiation to the target collection (employer state), e.g. "consider".
+    Returns:
+        dict: Response JSON or {"status": "success", "code": <code>} on success, None if request failed
+    """
     try:
-        target_collection_name = EMPLOYER_STATE_CONSIDER
-        url = f"https://api.hh.ru/negotiations/{target_collection_name}/{negotiation_id}"
-        r = requests.put(
+        url = f"{HH_API_BASE_URL}/negotiations/{target_collection_name}/{negotiation_id}"
+        r = _send_hh_request(
+            "PUT",
             url,
+            endpoint="/negotiations/{collection}/{negotiation_id}",
             headers={"Authorization": f"Bearer {access_token}", "User-Agent": USER_AGENT},
             timeout=15,
         )
         r.raise_for_status()
         if r.status_code in (200, 201, 204):
-            logger.debug(f"change_negotiation_collection_status_to_consider: request successful: {r.text}")
+            logger.debug(f"change_negotiation_collection_status: request successful: {r.text}")
             # Some HH endpoints return 204 No Content or empty body on success
             if r.text and r.headers.get("Content-Type", "").startswith("application/json"):
                 try:
@@ -394,22 +564,27 @@ def change_negotiation_collection_status_to_consider(
                     pass
             return {"status": "success", "code": r.status_code}
         else:
-            logger.error(f"change_negotiation_collection_status_to_consider: request failed: {r.status_code} {r.text}")
+            logger.error(f"change_negotiation_collection_status: request failed: {r.status_code} {r.text}")
             return None
     except Exception as e:
         if isinstance(e, requests.exceptions.HTTPError):
-            logger.error(f"HTTP error change_negotiation_collection_status_to_consider: {e.response.status_code} - {e.response.text}")
+            logger.error(f"HTTP error change_negotiation_collection_status: {e.response.status_code} - {e.response.text}")
         else:
-            logger.error(f"Error change_negotiation_collection_status_to_consider: {e}", exc_info=True)
+            logger.error(f"Error change_negotiation_collection_status: {e}", exc_info=True)
         return None
 
 
 def send_negotiation_message(access_token: str, negotiation_id: str, user_message: str):
+    """Send message to applicant in HH.ru negotiation.
+    Raises 'requests.RequestException' if request failed, so the caller can decide whether to retry ('is_transient_hh_error').
+    """
     try:
         user_message_formatted = user_message.strip()
-        url = f"https://api.hh.ru/negotiations/{negotiation_id}/messages"
-        r = requests.post(
+        url = f"{HH_API_BASE_URL}/negotiations/{negotiation_id}/messages"
+        r = _send_hh_request(
+            "POST",
             url,
+            endpoint="/negotiations/{negotiation_id}/messages",
             headers={"Authorization": f"Bearer {access_token}", "User-Agent": USER_AGENT, "Content-Type": "application/json"},
             timeout=15,
             params={"message": f"{user_message_formatted}"}
@@ -432,14 +607,17 @@ def send_negotiation_message(access_token: str, negotiation_id: str, user_messag
             logger.error(f"HTTP error sending negotiation message: {e.response.status_code} - {e.response.text}")
         else:
             logger.error(f"Error sending negotiation message: {e}", exc_info=True)
-        return None
+        raise
 
 
+@single_flight(hh_single_flight)
 def get_negotiations_history(access_token: str, resume_id: str):
     try:
-        url = f"https://api.hh.ru/resumes/{resume_id}/negotiations_history"
-        r = requests.get(
+        url = f"{HH_API_BASE_URL}/resumes/{resume_id}/negotiations_history"
+        r = _send_hh_request(
+            "GET",
             url,
+            endpoint="/resumes/{resume_id}/negotiations_history",
             headers={"Authorization": f"Bearer {access_token}", "User-Agent": USER_AGENT},
             timeout=15,
         )
@@ -460,11 +638,14 @@ def get_negotiations_history(access_token: str, resume_id: str):
 
 # ------------------------------ RESUME related calls ------------------------------
 
+@single_flight(hh_single_flight)
 def get_resume_info(access_token: str, resume_id: str):
     try:
-        url = f"https://api.hh.ru/resumes/{resume_id}"
-        r = requests.get(
+        url = f"{HH_API_BASE_URL}/resumes/{resume_id}"
+        r = _send_hh_request(
+            "GET",
             url,
+            endpoint="/resumes/{resume_id}",
             headers={"Authorization": f"Bearer {access_token}", "User-Agent": USER_AGENT},
             timeout=15
         )
@@ -488,8 +669,10 @@ def get_resume_info(access_token: str, resume_id: str):
 def get_dictionary_from_hh(access_token: str):
     """Get dictionary from HH.ru API and write it to a JSON file"""
     try:
-        r = requests.get(
-            "https://api.hh.ru/dictionaries",
+        r = _send_hh_request(
+            "GET",
+            f"{HH_API_BASE_URL}/dictionaries",
+            endpoint="/dictionaries",
             headers={
                 "Authorization": f"Bearer {access_token}",
                 "User-Agent": USER_AGENT,
@@ -0,0 +1,167 @@
+# TAGS: [metrics]
+# In-process metrics registry (histograms and counters) with periodic log summary
+
+import asyncio
+import logging
+import math
+import threading
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from shared_services.constants import (
+    METRICS_HISTOGRAM_WINDOW_SIZE,
+    METRICS_SUMMARY_INTERVAL_SECS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Labels are stored as sorted tuple of (name, value) pairs, so they can be used as dict keys
+LabelsKey = Tuple[Tuple[str, str], ...]
+
+
+def _labels_key(labels: Optional[Dict[str, str]]) -> LabelsKey:
+    return tuple(sorted((name, str(value)) for name, value in (labels or {}).items()))
+
+
+def _format_labels(labels_key: LabelsKey) -> str:
+    return " ".join(f"{name}={value}" for name, value in labels_key)
+
+
+def _percentile(sorted_values: List[float], percentile: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(percentile / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class _Histogram:
+    """Count and sum of all observations plus the latest 'window_size' values for percentiles."""
+
+    def __init__(self, window_size: int):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent_values: Deque[float] = deque(maxlen=window_size)
+
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.recent_values.append(value)
+
+
+    def summary(self) -> Dict[str, float]:
+        sorted_values = sorted(self.recent_values)
+        return {
+            "count": self.count,
+            "avg": self.total / self.count if self.count else 0.0,
+            "p50": _percentile(sorted_values, 50),
+            "p95": _percentile(sorted_values, 95),
+            "p99": _percentile(sorted_values, 99),
+            "max": self.max,
+        }
+
+
+class MetricsRegistry:
+    """Thread-safe registry of labelled counters and histograms.
+    HTTP calls are executed in threads ('asyncio.to_thread'), so metrics are recorded from many threads.
+    Usage:
+        metrics_registry.increment("hh_requests_total", labels={"endpoint": "/resumes/{resume_id}", "status": "200"})
+        metrics_registry.observe("hh_request_duration_secs", 0.35, labels={"endpoint": "/resumes/{resume_id}"})
+    """
+
+    def __init__(self, histogram_window_size: int = METRICS_HISTOGRAM_WINDOW_SIZE):
+        self._histogram_window_size = histogram_window_size
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelsKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelsKey, _Histogram]] = {}
+
+
+    def increment(self, name: str, amount: float = 1, labels: Optional[Dict[str, str]] = None) -> None:
+        labels_key = _labels_key(labels)
+        with self._lock:
+            counter = self._counters.setdefault(name, {})
+            counter[labels_key] = counter.get(labels_key, 0) + amount
+
+
+    def observe(self, name: str, value: float, labels: Optional[Dict[str, str]] = None) -> None:
+        labels_key = _labels_key(labels)
+        with self._lock:
+            histogram = self._histograms.setdefault(name, {})
+            if labels_key not in histogram:
+                histogram[labels_key] = _Histogram(window_size=self._histogram_window_size)
+            histogram[labels_key].observe(value)
+
+
+    def get_counter(self, name: str, labels: Optional[Dict[str, str]] = None) -> float:
+        with self._lock:
+            return self._counters.get(name, {}).get(_labels_key(labels), 0)
+
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Current values of all metrics.
+        Returns:
+            dict: {"counters": {name: {labels: value}}, "histograms": {name: {labels: {count, avg, p50, p95, p99, max}}}}
+        """
+        with self._lock:
+            return {
+                "counters": {
+                    name: {_format_labels(labels_key): value for labels_key, value in counter.items()}
+                    for name, counter in self._counters.items()
+                },
+                "histograms": {
+                    name: {_format_labels(labels_key): histogram.summary() for labels_key, histogram in histograms.items()}
+                    for name, histograms in self._histograms.items()
+                },
+            }
+
+
+    def format_summary(self, name_prefix: str = "") -> str:
+        """Human readable summary of metrics whose name starts with 'name_prefix' (for logs and admin)."""
+        snapshot = self.snapshot()
+        lines = []
+        for name, values in sorted(snapshot["counters"].items()):
+            if not name.startswith(name_prefix):
+                continue
+            for labels, value in sorted(values.items()):
+                lines.append(f"{name} {labels}: {value:g}")
+        for name, values in sorted(snapshot["histograms"].items()):
+            if not name.startswith(name_prefix):
+                continue
+            for labels, summary in sorted(values.items()):
+                lines.append(
+                    f"{name} {labels}: count={summary['count']} avg={summary['avg']:.3f} "
+                    f"p50={summary['p50']:.3f} p95={summary['p95']:.3f} p99={summary['p99']:.3f} max={summary['max']:.3f}"
+                )
+        return "\n".join(lines)
+
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+# Global metrics registry of the process
+metrics_registry = MetricsRegistry()
+
+
+async def run_periodic_metrics_summary(
+    interval_seconds: int = METRICS_SUMMARY_INTERVAL_SECS,
+    shutdown_flag: Optional[Callable[[], bool]] = None,
+) -> None:
+    """Write summary of all metrics to log every 'interval_seconds' until cancelled."""
+    while not (shutdown_flag and shutdown_flag()):
+        try:
+            await asyncio.sleep(interval_seconds)
+            summary = metrics_registry.format_summary()
+            if summary:
+                logger.info(f"Metrics summary:\n{summary}")
+        except asyncio.CancelledError:
+            logger.info("Periodic metrics summary cancelled")
+            break
+        except Exception as e:
+            # Continue even on unexpected error
+            logger.error(f"Error writing metrics summary: {e}", exc_info=True)
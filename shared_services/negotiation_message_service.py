@@ -0,0 +1,246 @@
+# TAGS: [negotiations_related]
+# Outbox of messages to applicants in HH.ru negotiations, delivered by concurrent background workers
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from database import NegotiationMessages, Negotiations
+from shared_services.constants import (
+    NEGOTIATION_MESSAGES_WORKERS,
+    NEGOTIATION_MESSAGES_MAX_ATTEMPTS,
+    NEGOTIATION_MESSAGES_RETRY_DELAY_SECS,
+)
+from shared_services.db_service import (
+    get_column_values_in_db,
+    get_record_ids_by_fields,
+    update_record_in_db,
+    update_record_in_db_if_matches,
+    upsert_records_in_db,
+)
+from shared_services.hh_service import is_transient_hh_error, send_negotiation_message
+from shared_services.rate_limiter_service import AsyncRateLimiter, hh_rate_limiter
+from shared_services.token_service import hh_token_manager
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_STATUS_PENDING = "pending"
+MESSAGE_STATUS_SENDING = "sending"
+MESSAGE_STATUS_SENT = "sent"
+MESSAGE_STATUS_FAILED = "failed"
+
+
+def build_negotiation_message_id(negotiation_id: str, template: str) -> str:
+    """Dedup key of the message: the same template is sent to the negotiation only once."""
+    return f"{negotiation_id}:{template}"
+
+
+class NegotiationMessageOutbox:
+    """Records messages to applicants in 'negotiation_messages' table before sending and delivers them in the background.
+    - 'enqueue' ignores a message which was already recorded for the same (negotiation_id, template)
+    - message is claimed by one worker ('pending' -> 'sending' in one UPDATE), so it is sent and marked 'sent' exactly once
+    - workers send concurrently under the shared HH.ru rate limiter, transient failures (network, 429, 5xx) are retried
+      with growing delay, other HH.ru errors (e.g. closed negotiation) mark the message 'failed' at once
+    - DB calls are blocking, so they are executed in a separate thread
+    - message interrupted in 'sending' state (e.g. by restart) is marked 'failed' instead of being resent,
+      because HH.ru could have received it already
+    """
+
+    def __init__(
+        self,
+        rate_limiter: AsyncRateLimiter,
+        worker_count: int = NEGOTIATION_MESSAGES_WORKERS,
+        max_attempts: int = NEGOTIATION_MESSAGES_MAX_ATTEMPTS,
+        retry_delay_secs: float = NEGOTIATION_MESSAGES_RETRY_DELAY_SECS,
+    ):
+        self._rate_limiter = rate_limiter
+        self._worker_count = worker_count
+        self._max_attempts = max_attempts
+        self._retry_delay_secs = retry_delay_secs
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._workers_running = False
+        self._worker_tasks: List[asyncio.Task] = []
+
+
+    async def enqueue(self, negotiation_id: str, manager_id: str, template: str, message_text: str) -> bool:
+        """Record message in outbox and schedule its delivery. Does not call HH.ru.
+        Returns:
+            bool: True if message is new, False if it was already recorded for this negotiation and template
+        """
+        message_id = build_negotiation_message_id(negotiation_id=negotiation_id, template=template)
+        inserted_count = await asyncio.to_thread(
+            upsert_records_in_db,
+            db_model=NegotiationMessages,
+            records=[{
+                "id": message_id,
+                "negotiation_id": negotiation_id,
+                "manager_id": manager_id,
+                "template": template,
+                "message_text": message_text,
+                "status": MESSAGE_STATUS_PENDING,
+                "attempts": 0,
+            }],
+        )
+        if not inserted_count:
+            logger.info(f"NegotiationMessageOutbox: message {message_id} already recorded, skipping")
+            return False
+        self._queue.put_nowait(message_id)
+        logger.debug(f"NegotiationMessageOutbox: message {message_id} enqueued. Queue size: {self._queue.qsize()}")
+        return True
+
+
+    def queue_size(self) -> int:
+        """Number of messages waiting for delivery in this process."""
+        return self._queue.qsize()
+
+
+    async def _deliver(self, message_id: str) -> Optional[bool]:
+        """Claim message and send it with retries.
+        Returns:
+            True if sent, False if failed, None if message was claimed by someone else or is already sent
+        """
+        if not await asyncio.to_thread(
+            update_record_in_db_if_matches,
+            db_model=NegotiationMessages,
+            record_id=message_id,
+            expected_values={"status": MESSAGE_STATUS_PENDING},
+            updates={"status": MESSAGE_STATUS_SENDING},
+        ):
+            logger.debug(f"NegotiationMessageOutbox: message {message_id} is not pending anymore, skipping")
+            return None
+
+        message = await asyncio.to_thread(
+            get_column_values_in_db,
+            db_model=NegotiationMessages,
+            record_id=message_id,
+            field_names=["negotiation_id", "manager_id", "message_text"],
+        )
+        if not message:
+            logger.warning(f"NegotiationMessageOutbox: message {message_id} not found in DB, skipping")
+            return None
+        negotiation_id = message["negotiation_id"]
+
+        last_error = None
+        for attempt in range(1, self._max_attempts + 1):
+            access_token = await hh_token_manager.get_access_token(manager_id=message["manager_id"])
+            if not access_token:
+                # Token can be missing only for a while (e.g. refresh request to HH.ru failed)
+                last_error = "No valid HH.ru access token"
+            else:
+                try:
+                    async with self._rate_limiter:
+                        # 'requests' is blocking, so the call is executed in a separate thread
+                        await asyncio.to_thread(
+                            send_negotiation_message,
+                            access_token=access_token,
+                            negotiation_id=negotiation_id,
+                            user_message=message["message_text"],
+                        )
+                except Exception as e:
+                    if not is_transient_hh_error(e):
+                        await self._mark_failed(message_id=message_id, attempts=attempt, last_error=str(e))
+                        logger.error(f"NegotiationMessageOutbox: message {message_id} rejected by HH.ru, not retried: {e}")
+                        return False
+                    last_error = str(e)
+                else:
+                    await asyncio.to_thread(
+                        update_record_in_db_if_matches,
+                        db_model=NegotiationMessages,
+                        record_id=message_id,
+                        expected_values={"status": MESSAGE_STATUS_SENDING},
+                        updates={"status": MESSAGE_STATUS_SENT, "attempts": attempt, "last_error": None, "sent_at": datetime.now(timezone.utc)},
+                    )
+                    await asyncio.to_thread(update_record_in_db, db_model=Negotiations, record_id=negotiation_id, updates={"link_to_tg_bot_sent": True})
+                    logger.info(f"NegotiationMessageOutbox: message {message_id} sent on attempt {attempt}")
+                    return True
+
+            logger.warning(f"NegotiationMessageOutbox: attempt {attempt}/{self._max_attempts} failed for message {message_id}: {last_error}")
+            if attempt < self._max_attempts:
+                await asyncio.sleep(self._retry_delay_secs * 2 ** (attempt - 1))
+
+        await self._mark_failed(message_id=message_id, attempts=self._max_attempts, last_error=last_error)
+        logger.error(f"NegotiationMessageOutbox: failed to send message {message_id} after {self._max_attempts} attempts")
+        return False
+
+
+    async def _mark_failed(self, message_id: str, attempts: int, last_error: Optional[str]) -> None:
+        await asyncio.to_thread(
+            update_record_in_db_if_matches,
+            db_model=NegotiationMessages,
+            record_id=message_id,
+            expected_values={"status": MESSAGE_STATUS_SENDING},
+            updates={"status": MESSAGE_STATUS_FAILED, "attempts": attempts, "last_error": last_error},
+        )
+
+
+    async def _worker(self, worker_number: int) -> None:
+        """Delivers messages from the queue until stopped."""
+        logger.info(f"Negotiation messages worker {worker_number} started")
+        while self._workers_running:
+            try:
+                message_id = await self._queue.get()
+            except asyncio.CancelledError:
+                break
+            try:
+                await self._deliver(message_id)
+            except asyncio.CancelledError:
+                logger.info(f"Negotiation messages worker {worker_number} cancelled while delivering {message_id}")
+                self._queue.task_done()
+                break
+            except Exception as e:
+                # Continue delivering even on unexpected error
+                logger.error(f"Unexpected error delivering negotiation message {message_id}: {e}", exc_info=True)
+            self._queue.task_done()
+        logger.info(f"Negotiation messages worker {worker_number} stopped")
+
+
+    def _recover(self) -> List[str]:
+        """Mark messages interrupted while sending as failed and return ids of undelivered messages of the previous run."""
+        for message_id in get_record_ids_by_fields(db_model=NegotiationMessages, search_values={"status": MESSAGE_STATUS_SENDING}):
+            update_record_in_db_if_matches(
+                db_model=NegotiationMessages,
+                record_id=message_id,
+                expected_values={"status": MESSAGE_STATUS_SENDING},
+                updates={"status": MESSAGE_STATUS_FAILED, "last_error": "Interrupted while sending, not resent to avoid duplicate"},
+            )
+            logger.warning(f"NegotiationMessageOutbox: message {message_id} was interrupted while sending, marked as failed")
+        return get_record_ids_by_fields(db_model=NegotiationMessages, search_values={"status": MESSAGE_STATUS_PENDING})
+
+
+    async def start(self) -> None:
+        """Start background delivery workers."""
+        if self._workers_running:
+            logger.warning("Negotiation messages workers are already running")
+            return
+        try:
+            pending_message_ids = await asyncio.to_thread(self._recover)
+            for message_id in pending_message_ids:
+                self._queue.put_nowait(message_id)
+            if pending_message_ids:
+                logger.info(f"NegotiationMessageOutbox: {len(pending_message_ids)} pending messages loaded from DB")
+        except Exception as e:
+            logger.error(f"NegotiationMessageOutbox: failed to load pending messages from DB: {e}", exc_info=True)
+        self._workers_running = True
+        self._worker_tasks = [asyncio.create_task(self._worker(worker_number)) for worker_number in range(1, self._worker_count + 1)]
+
+
+    async def stop(self, wait: bool = True) -> None:
+        """Stop background delivery workers.
+        Args:
+            wait: If True, deliver messages that are still in the queue before stopping
+        """
+        if not self._workers_running:
+            logger.warning("Negotiation messages workers are not running")
+            return
+        if wait:
+            await self._queue.join()
+        self._workers_running = False
+        for worker_task in self._worker_tasks:
+            worker_task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+
+
+# Global outbox of messages to applicants
+negotiation_message_outbox = NegotiationMessageOutbox(rate_limiter=hh_rate_limiter)
@@ -0,0 +1,645 @@
+# TAGS: [task_queue]
+# Durable task queue stored in Postgres ('tasks' table), drained by workers of any number of processes
+
+import argparse
+import asyncio
+import importlib
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import and_, exists, func, or_
+from sqlalchemy.orm import aliased
+
+from database import SessionLocal, QueuedTasks
+from shared_services.constants import (
+    AI_ANALYSIS_WORKERS,
+    AI_TASK_MAX_ATTEMPTS,
+    AI_TASK_RETRY_BASE_DELAY_SECS,
+    AI_TASK_RETRY_MAX_DELAY_SECS,
+    AI_TASK_QUEUE_LANES,
+    AI_TASK_QUEUE_DEFAULT_LANE,
+    AI_TASK_QUEUE_RESERVED_WORKERS,
+    TASK_QUEUE_LEASE_SECS,
+    TASK_QUEUE_POLL_INTERVAL_SECS,
+)
+from shared_services.db_service import upsert_records_in_db
+from shared_services.metrics_service import metrics_registry
+from shared_services.task_queue_service import Task, DeadLetter, pick_weighted_lane
+
+logger = logging.getLogger(__name__)
+
+TASK_STATUS_PENDING = "pending"
+TASK_STATUS_RUNNING = "running"
+TASK_STATUS_DEAD = "dead"
+
+# Marker of pathlib.Path in JSON arguments (tasks of manager bot receive paths of resume files)
+_PATH_MARKER = "__path__"
+
+
+def get_callable_name(func: Callable) -> str:
+    """'module:qualname' of module level function, the name is resolved back by 'resolve_callable' in any process."""
+    module_name = getattr(func, "__module__", None)
+    qualname = getattr(func, "__qualname__", None)
+    if not module_name or not qualname or "<" in qualname:
+        raise ValueError(f"Task function must be defined at module level to be stored in DB, got {func!r}")
+    return f"{module_name}:{qualname}"
+
+
+def resolve_callable(func_name: str) -> Callable:
+    module_name, qualname = func_name.split(":", 1)
+    target: Any = importlib.import_module(module_name)
+    for attribute in qualname.split("."):
+        target = getattr(target, attribute)
+    return target
+
+
+def encode_task_value(value: Any) -> Any:
+    """Argument of task as JSON value: paths are marked, tuples become lists.
+    Raises:
+        ValueError: If the value can not be stored as JSON
+    """
+    if isinstance(value, Path):
+        return {_PATH_MARKER: str(value)}
+    if isinstance(value, dict):
+        return {str(key): encode_task_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [encode_task_value(item) for item in value]
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    raise ValueError(f"Task argument of type {type(value).__name__} can not be stored as JSON")
+
+
+def decode_task_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if len(value) == 1 and _PATH_MARKER in value:
+            return Path(value[_PATH_MARKER])
+        return {key: decode_task_value(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [decode_task_value(item) for item in value]
+    return value
+
+
+class PersistentTaskQueue:
+    """Task queue with the same interface as 'TaskQueue', but tasks are rows of 'tasks' table:
+    - put / put_nowait store (callable name, JSON args), so queued tasks survive restart and deploy
+    - worker claims the oldest due task with 'SELECT ... FOR UPDATE SKIP LOCKED', so workers of several processes
+      never take the same task and never wait for each other
+    - claimed task has a lease which is extended while it runs; if the process dies, the lease expires
+      and the task is claimed again (counted as an attempt, so a task crashing the process ends in dead letters)
+    - finished task is deleted, failed task is retried with exponential backoff ('run_after'),
+      after 'max_attempts' it stays in the table with status 'dead'
+    - priority lanes work as in 'TaskQueue': worker picks a lane with due tasks by weighted round robin
+    - tasks with the same 'key_fn' key run one at a time in order of enqueueing (in all processes):
+      task is not claimed while an earlier task with its key is pending, waiting for retry or running
+    Task functions must be defined at module level and be importable by every worker process.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 200,
+        concurrency: int = 1,
+        max_attempts: int = 1,
+        retry_base_delay_secs: float = 1.0,
+        retry_max_delay_secs: float = 60.0,
+        name: str = "task_queue",
+        lanes: Optional[Dict[str, int]] = None,
+        default_lane: Optional[str] = None,
+        reserved_workers: Optional[Dict[str, int]] = None,
+        key_fn: Optional[Callable[[Task], Optional[str]]] = None,
+        lease_secs: float = TASK_QUEUE_LEASE_SECS,
+        poll_interval_secs: float = TASK_QUEUE_POLL_INTERVAL_SECS,
+    ):
+        if concurrency <= 0:
+            raise ValueError(f"concurrency must be positive, got {concurrency}")
+        if max_attempts <= 0:
+            raise ValueError(f"max_attempts must be positive, got {max_attempts}")
+        self._lane_weights = dict(lanes or {"default": 1})
+        if any(weight <= 0 for weight in self._lane_weights.values()):
+            raise ValueError(f"lane weights must be positive, got {self._lane_weights}")
+        self._default_lane = default_lane or next(iter(self._lane_weights))
+        self._reserved_workers = dict(reserved_workers or {})
+        for lane in [self._default_lane, *self._reserved_workers]:
+            if lane not in self._lane_weights:
+                raise ValueError(f"Unknown lane '{lane}', expected one of {list(self._lane_weights)}")
+        # Credits of weighted round robin are shared by workers, which claim tasks in threads
+        self._lane_credits: Dict[str, int] = {lane: 0 for lane in self._lane_weights}
+        self._lane_credits_lock = threading.Lock()
+        self._key_fn = key_fn
+        self._maxsize = maxsize
+        self._concurrency = concurrency
+        self._max_attempts = max_attempts
+        self._retry_base_delay_secs = retry_base_delay_secs
+        self._retry_max_delay_secs = retry_max_delay_secs
+        self._lease_secs = lease_secs
+        self._poll_interval_secs = poll_interval_secs
+        self.name = name
+        self._worker_running = False
+        self._worker_tasks: List[asyncio.Task] = []
+        # Number of tasks currently executed by workers of this process
+        self._running_count = 0
+        # Unique per queue object, so lease of the task is never confused between processes and queues
+        self._worker_id_prefix = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+    # ----- ENQUEUEING -----
+
+
+    def _resolve_lane(self, lane: Optional[str]) -> str:
+        lane = lane or self._default_lane
+        if lane not in self._lane_weights:
+            raise ValueError(f"Unknown lane '{lane}', expected one of {list(self._lane_weights)}")
+        return lane
+
+
+    def _count_queued(self, lane: Optional[str] = None) -> int:
+        """Pending and running tasks of the queue (of one lane if 'lane' is set)"""
+        with SessionLocal() as db:
+            query = db.query(func.count(QueuedTasks.id)).filter(
+                QueuedTasks.queue_name == self.name,
+                QueuedTasks.status.in_([TASK_STATUS_PENDING, TASK_STATUS_RUNNING]),
+            )
+            if lane is not None:
+                query = query.filter(QueuedTasks.lane == lane)
+            return query.scalar() or 0
+
+
+    def _is_lane_full(self, lane: str) -> bool:
+        return self._maxsize > 0 and self._count_queued(lane) >= self._maxsize
+
+
+    def _build_task_record(self, func: Callable, args: tuple, kwargs: dict, task_id: Optional[str], lane: Optional[str]) -> Dict[str, Any]:
+        """Row of the task. Raises ValueError (in the caller, not in the worker) if task can not be stored."""
+        lane = self._resolve_lane(lane)
+        ordering_key = None
+        if self._key_fn is not None:
+            ordering_key = self._key_fn(Task(func=func, args=args, kwargs=kwargs, task_id=task_id, lane=lane))
+        return {
+            "id": uuid.uuid4().hex,
+            "queue_name": self.name,
+            "lane": lane,
+            "task_key": task_id,
+            "ordering_key": ordering_key,
+            "func_name": get_callable_name(func),
+            "args": encode_task_value(args),
+            "kwargs": encode_task_value(kwargs),
+            "status": TASK_STATUS_PENDING,
+            "attempt": 0,
+            "run_after": datetime.now(timezone.utc),
+        }
+
+
+    def _insert_task_record(self, record: Dict[str, Any]) -> None:
+        # Task could wait for free space, so it is due from the moment of insert.
+        # 'created_at' is set here with microseconds, it defines order of tasks with the same ordering key
+        record["run_after"] = record["created_at"] = datetime.now(timezone.utc)
+        upsert_records_in_db(db_model=QueuedTasks, records=[record])
+        metrics_registry.observe("task_queue_depth", self._count_queued(record["lane"]), labels={"queue": self.name, "lane": record["lane"]})
+
+
+    async def put(self, func: Callable, *args, task_id: Optional[str] = None, lane: Optional[str] = None, **kwargs) -> bool:
+        """Store task in DB. If 'maxsize' tasks of the lane are queued, waits until workers free space.
+        Returns:
+            bool: Always True
+        """
+        record = self._build_task_record(func, args, kwargs, task_id, lane)
+        while await asyncio.to_thread(self._is_lane_full, record["lane"]):
+            await asyncio.sleep(self._poll_interval_secs)
+        await asyncio.to_thread(self._insert_task_record, record)
+        logger.debug(f"Task {task_id or 'without ID'} stored in '{self.name}'")
+        return True
+
+
+    async def put_nowait(self, func: Callable, *args, task_id: Optional[str] = None, lane: Optional[str] = None, **kwargs) -> bool:
+        """Store task in DB if less than 'maxsize' tasks of the lane are queued.
+        Returns:
+            bool: True if task is stored, False if lane is full
+        """
+        record = self._build_task_record(func, args, kwargs, task_id, lane)
+        if await asyncio.to_thread(self._is_lane_full, record["lane"]):
+            logger.warning(f"Lane '{record['lane']}' of '{self.name}' is full. Task {task_id or 'without ID'} not added.")
+            return False
+        await asyncio.to_thread(self._insert_task_record, record)
+        logger.debug(f"Task {task_id or 'without ID'} stored in '{self.name}' (nowait)")
+        return True
+
+
+    def qsize(self, lane: Optional[str] = None) -> int:
+        """Number of pending and running tasks of the queue or lane (in all processes)"""
+        return self._count_queued(lane)
+
+
+    def lane_sizes(self) -> Dict[str, int]:
+        return {lane: self._count_queued(lane) for lane in self._lane_weights}
+
+
+    def is_full(self, lane: Optional[str] = None) -> bool:
+        return self._is_lane_full(self._resolve_lane(lane))
+
+
+    def is_empty(self) -> bool:
+        return self._count_queued() == 0
+
+
+    # ----- CLAIMING AND EXECUTION -----
+
+
+    def _due_tasks_filter(self, lanes: List[str], now: datetime):
+        earlier_task = aliased(QueuedTasks)
+        # Other task with the same ordering key which is running or was enqueued earlier and is pending (or waits for retry)
+        blocking_task_exists = exists().where(
+            earlier_task.queue_name == QueuedTasks.queue_name,
+            earlier_task.ordering_key == QueuedTasks.ordering_key,
+            earlier_task.id != QueuedTasks.id,
+            or_(
+                earlier_task.status == TASK_STATUS_RUNNING,
+                and_(
+                    earlier_task.status == TASK_STATUS_PENDING,
+                    or_(
+                        earlier_task.created_at < QueuedTasks.created_at,
+                        and_(earlier_task.created_at == QueuedTasks.created_at, earlier_task.id < QueuedTasks.id),
+                    ),
+                ),
+            ),
+        )
+        return and_(
+            QueuedTasks.queue_name == self.name,
+            QueuedTasks.lane.in_(lanes),
+            or_(
+                and_(QueuedTasks.status == TASK_STATUS_PENDING, QueuedTasks.run_after <= now),
+                and_(QueuedTasks.status == TASK_STATUS_RUNNING, QueuedTasks.locked_until < now),
+            ),
+            or_(QueuedTasks.ordering_key.is_(None), ~blocking_task_exists),
+        )
+
+
+    def _claim_task(self, worker_id: str, lanes: List[str]) -> Optional[Dict[str, Any]]:
+        """Claim the oldest due task of the lane picked by weighted round robin:
+        pending one or running one with expired lease (its worker died).
+        Returns:
+            dict: Claimed task record, None if there is no due task
+        """
+        while True:
+            now = datetime.now(timezone.utc)
+            with SessionLocal() as db:
+                ready_lanes = [row[0] for row in db.query(QueuedTasks.lane).filter(self._due_tasks_filter(lanes, now)).distinct().all()]
+                with self._lane_credits_lock:
+                    chosen_lane = pick_weighted_lane(lanes, ready_lanes, self._lane_weights, self._lane_credits)
+                if chosen_lane is None:
+                    return None
+                record = None
+                # Tasks of the chosen lane could be taken by other workers meanwhile, then other ready lanes are tried
+                for lane in [chosen_lane] + [lane for lane in ready_lanes if lane != chosen_lane]:
+                    record = (
+                        db.query(QueuedTasks)
+                        .filter(self._due_tasks_filter([lane], now))
+                        .order_by(QueuedTasks.run_after, QueuedTasks.created_at)
+                        .with_for_update(skip_locked=True, of=QueuedTasks)
+                        .first()
+                    )
+                    if record is not None:
+                        break
+                if record is None:
+                    return None
+                # Values before the update (attributes of 'record' are reloaded after commit)
+                claimed_record = {
+                    "id": record.id,
+                    "task_key": record.task_key,
+                    "func_name": record.func_name,
+                    "args": record.args,
+                    "kwargs": record.kwargs,
+                    "attempt": record.attempt + 1,
+                    "lane": record.lane,
+                    "run_after": record.run_after,
+                }
+                is_recovered = record.status == TASK_STATUS_RUNNING
+                previous_worker_id = record.locked_by
+                updates = {
+                    "status": TASK_STATUS_RUNNING,
+                    "attempt": record.attempt + 1,
+                    "locked_by": worker_id,
+                    "locked_until": now + timedelta(seconds=self._lease_secs),
+                }
+                if is_recovered:
+                    # Task which keeps crashing its worker is not claimed forever
+                    if record.attempt >= self._max_attempts:
+                        updates = {
+                            "status": TASK_STATUS_DEAD,
+                            "locked_by": None,
+                            "locked_until": None,
+                            "last_error": f"Worker {record.locked_by} stopped while executing the task",
+                        }
+                # Row lock already excludes other workers on Postgres, the compare-and-set also keeps DBs without
+                # 'SKIP LOCKED' (local SQLite) from running the task twice
+                claimed_count = db.query(QueuedTasks).filter(
+                    QueuedTasks.id == record.id,
+                    QueuedTasks.status == record.status,
+                    QueuedTasks.attempt == record.attempt,
+                ).update(updates, synchronize_session=False)
+                db.commit()
+                if not claimed_count:
+                    continue
+                if is_recovered:
+                    logger.warning(f"Task {claimed_record['task_key'] or claimed_record['id']} of '{self.name}' lost its worker {previous_worker_id}, recovered")
+                if updates["status"] == TASK_STATUS_DEAD:
+                    metrics_registry.increment("task_queue_dead_letters_total", labels={"queue": self.name})
+                    continue
+                # SQLite returns naive timestamps, they are stored in UTC
+                run_after = claimed_record.pop("run_after")
+                if run_after.tzinfo is None:
+                    run_after = run_after.replace(tzinfo=timezone.utc)
+                metrics_registry.observe(
+                    "task_queue_wait_secs",
+                    max(0.0, (now - run_after).total_seconds()),
+                    labels={"queue": self.name, "lane": claimed_record["lane"]},
+                )
+                return claimed_record
+
+
+    def _update_claimed_task(self, record_id: str, worker_id: str, updates: Dict[str, Any]) -> bool:
+        """Update task only if it is still claimed by the worker (lease was not lost)."""
+        with SessionLocal() as db:
+            updated_count = db.query(QueuedTasks).filter(
+                QueuedTasks.id == record_id,
+                QueuedTasks.status == TASK_STATUS_RUNNING,
+                QueuedTasks.locked_by == worker_id,
+            ).update(updates, synchronize_session=False)
+            db.commit()
+            return updated_count > 0
+
+
+    def _complete_task(self, record_id: str, worker_id: str) -> None:
+        with SessionLocal() as db:
+            db.query(QueuedTasks).filter(QueuedTasks.id == record_id, QueuedTasks.locked_by == worker_id).delete(synchronize_session=False)
+            db.commit()
+
+
+    def _retry_delay_secs(self, attempt: int) -> float:
+        return min(self._retry_max_delay_secs, self._retry_base_delay_secs * 2 ** (attempt - 1))
+
+
+    def _fail_task(self, record: Dict[str, Any], worker_id: str, error: Exception) -> None:
+        task_key = record["task_key"] or record["id"]
+        error_text = f"{type(error).__name__}: {error}"[:1000]
+        if record["attempt"] < self._max_attempts:
+            delay_secs = self._retry_delay_secs(record["attempt"])
+            logger.warning(f"Task {task_key} will be retried in {delay_secs:.1f}s (attempt {record['attempt'] + 1}/{self._max_attempts})")
+            metrics_registry.increment("task_queue_retries_total", labels={"queue": self.name})
+            updates = {
+                "status": TASK_STATUS_PENDING,
+                "run_after": datetime.now(timezone.utc) + timedelta(seconds=delay_secs),
+                "locked_by": None,
+                "locked_until": None,
+                "last_error": error_text,
+            }
+        else:
+            logger.error(f"Task {task_key} failed {record['attempt']} time(s), moved to dead letters of '{self.name}'")
+            metrics_registry.increment("task_queue_dead_letters_total", labels={"queue": self.name})
+            updates = {"status": TASK_STATUS_DEAD, "locked_by": None, "locked_until": None, "last_error": error_text}
+        self._update_claimed_task(record_id=record["id"], worker_id=worker_id, updates=updates)
+
+
+    def _release_task(self, record: Dict[str, Any], worker_id: str) -> None:
+        """Return interrupted task to the queue without counting the attempt (worker is stopping)."""
+        self._update_claimed_task(
+            record_id=record["id"],
+            worker_id=worker_id,
+            updates={
+                "status": TASK_STATUS_PENDING,
+                "attempt": record["attempt"] - 1,
+                "run_after": datetime.now(timezone.utc),
+                "locked_by": None,
+                "locked_until": None,
+            },
+        )
+
+
+    async def _extend_lease(self, record_id: str, worker_id: str) -> None:
+        """Extend lease of the running task until cancelled."""
+        while True:
+            await asyncio.sleep(self._lease_secs / 3)
+            try:
+                is_extended = await asyncio.to_thread(
+                    self._update_claimed_task,
+                    record_id,
+                    worker_id,
+                    {"locked_until": datetime.now(timezone.utc) + timedelta(seconds=self._lease_secs)},
+                )
+                if not is_extended:
+                    logger.warning(f"Task {record_id} of '{self.name}' is not claimed by {worker_id} anymore, lease is not extended")
+                    return
+            except Exception as e:
+                logger.warning(f"Failed to extend lease of task {record_id} of '{self.name}': {e}")
+
+
+    async def _execute_task(self, task: Task) -> Any:
+        """Run async function in event loop, sync function in executor (like 'TaskQueue')."""
+        if asyncio.iscoroutinefunction(task.func):
+            return await task.func(*task.args, **task.kwargs)
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, lambda: task.func(*task.args, **task.kwargs))
+
+
+    async def _process_claimed_task(self, record: Dict[str, Any], worker_id: str) -> None:
+        task_id_str = f" (ID: {record['task_key']})" if record["task_key"] else ""
+        lease_task = asyncio.create_task(self._extend_lease(record["id"], worker_id))
+        self._running_count += 1
+        try:
+            task = Task(
+                func=resolve_callable(record["func_name"]),
+                args=tuple(decode_task_value(record["args"])),
+                kwargs=decode_task_value(record["kwargs"]),
+                task_id=record["task_key"],
+                attempt=record["attempt"],
+            )
+            logger.info(f"Executing task{task_id_str}")
+            await self._execute_task(task)
+            await asyncio.to_thread(self._complete_task, record["id"], worker_id)
+            logger.info(f"Task{task_id_str} completed successfully")
+        except asyncio.CancelledError:
+            logger.warning(f"Task{task_id_str} was interrupted, returned to '{self.name}'")
+            await asyncio.to_thread(self._release_task, record, worker_id)
+            raise
+        except Exception as e:
+            logger.error(f"Task{task_id_str} failed with error (attempt {record['attempt']}/{self._max_attempts}): {e}", exc_info=True)
+            await asyncio.to_thread(self._fail_task, record, worker_id, e)
+        finally:
+            self._running_count -= 1
+            lease_task.cancel()
+
+
+    async def _worker(self, worker_number: int = 1, lanes: Optional[List[str]] = None):
+        worker_id = f"{self._worker_id_prefix}:{worker_number}"
+        lanes = lanes or list(self._lane_weights)
+        logger.info(f"Persistent task queue '{self.name}' worker {worker_id} started (lanes: {', '.join(lanes)})")
+        while self._worker_running:
+            try:
+                record = await asyncio.to_thread(self._claim_task, worker_id, lanes)
+                if record is None:
+                    await asyncio.sleep(self._poll_interval_secs)
+                    continue
+                await self._process_claimed_task(record, worker_id)
+            except asyncio.CancelledError:
+                logger.info(f"Persistent task queue '{self.name}' worker {worker_id} cancelled")
+                break
+            except Exception as e:
+                # DB is unavailable or task function can not be imported: keep working, the task lease will expire
+                logger.error(f"Unexpected error in worker {worker_id} of '{self.name}': {e}", exc_info=True)
+                await asyncio.sleep(self._poll_interval_secs)
+        logger.info(f"Persistent task queue '{self.name}' worker {worker_id} stopped")
+
+
+    def start_worker(self):
+        if self._worker_running:
+            logger.warning("Worker is already running")
+            return
+        self._worker_running = True
+        self._worker_tasks = [
+            asyncio.create_task(self._worker(worker_number))
+            for worker_number in range(1, self._concurrency + 1)
+        ]
+        for lane, workers_count in self._reserved_workers.items():
+            for _ in range(workers_count):
+                worker_number = len(self._worker_tasks) + 1
+                self._worker_tasks.append(asyncio.create_task(self._worker(worker_number, lanes=[lane])))
+        logger.info(f"Persistent task queue '{self.name}' workers started: {len(self._worker_tasks)} (reserved: {self._reserved_workers or 'none'})")
+
+
+    async def stop_worker(self, wait: bool = True):
+        """
+        Stop workers of this process. Queued tasks stay in DB for the next start or other processes.
+        Args:
+            wait: If True, finish tasks which are being executed, otherwise interrupt them and return them to the queue
+        """
+        if not self._worker_running:
+            logger.warning("Worker is not running")
+            return
+        self._worker_running = False
+        if wait:
+            while self._running_count:
+                await asyncio.sleep(self._poll_interval_secs)
+        for worker_task in self._worker_tasks:
+            worker_task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        logger.info(f"Persistent task queue '{self.name}' workers stopped")
+
+
+    async def wait_empty(self):
+        """Wait until there are no pending or running tasks (including scheduled retries)"""
+        while await asyncio.to_thread(self._count_queued):
+            await asyncio.sleep(self._poll_interval_secs)
+
+
+    # ----- DEAD LETTERS -----
+
+
+    def get_dead_letters(self) -> Dict[str, DeadLetter]:
+        """Dead letters of the queue: {task_id (or record ID if task has no task_id): DeadLetter}"""
+        with SessionLocal() as db:
+            records = db.query(QueuedTasks).filter(
+                QueuedTasks.queue_name == self.name,
+                QueuedTasks.status == TASK_STATUS_DEAD,
+            ).order_by(QueuedTasks.updated_at).all()
+        dead_letters = {}
+        for record in records:
+            try:
+                task_func = resolve_callable(record.func_name)
+            except Exception:
+                task_func = None
+            task = Task(
+                func=task_func,
+                args=tuple(decode_task_value(record.args)),
+                kwargs=decode_task_value(record.kwargs),
+                task_id=record.task_key,
+                attempt=record.attempt,
+            )
+            failed_at = record.updated_at.timestamp() if record.updated_at else time.time()
+            dead_letters[record.task_key or record.id] = DeadLetter(task=task, error=record.last_error or "", failed_at=failed_at)
+        return dead_letters
+
+
+    def _dead_letters_filter(self, db, task_keys: Optional[List[str]]):
+        query = db.query(QueuedTasks).filter(QueuedTasks.queue_name == self.name, QueuedTasks.status == TASK_STATUS_DEAD)
+        if task_keys is not None:
+            query = query.filter(or_(QueuedTasks.task_key.in_(task_keys), QueuedTasks.id.in_(task_keys)))
+        return query
+
+
+    def _replay_dead_letters(self, task_keys: Optional[List[str]]) -> int:
+        now = datetime.now(timezone.utc)
+        with SessionLocal() as db:
+            replayed_count = self._dead_letters_filter(db, task_keys).update(
+                # Replayed task is enqueued anew, after tasks with the same ordering key which are already queued
+                {"status": TASK_STATUS_PENDING, "attempt": 0, "run_after": now, "created_at": now, "last_error": None},
+                synchronize_session=False,
+            )
+            db.commit()
+        return replayed_count
+
+
+    async def replay_dead_letters(self, task_keys: Optional[List[str]] = None) -> int:
+        """
+        Return dead letters to the queue (attempts are counted from the start).
+        Args:
+            task_keys: task_id or record ID of dead letters, all by default
+        Returns:
+            int: Number of tasks returned to the queue
+        """
+        replayed_count = await asyncio.to_thread(self._replay_dead_letters, task_keys)
+        logger.info(f"{replayed_count} dead letter(s) of '{self.name}' replayed")
+        return replayed_count
+
+
+    def clear_dead_letters(self) -> int:
+        with SessionLocal() as db:
+            cleared_count = self._dead_letters_filter(db, None).delete(synchronize_session=False)
+            db.commit()
+        return cleared_count
+
+
+def main():
+    """Standalone worker process draining a persistent queue (in addition to workers of the bot process):
+        python3 -m shared_services.persistent_task_queue_service --queue ai_task_queue --concurrency 8
+    Task functions are imported by their stored names, so the worker needs the same code and environment as the bot."""
+    parser = argparse.ArgumentParser(description="Worker of persistent task queue")
+    parser.add_argument("--queue", default="ai_task_queue")
+    # Defaults are the settings of 'ai_task_queue' of manager bot
+    parser.add_argument("--concurrency", type=int, default=AI_ANALYSIS_WORKERS)
+    parser.add_argument("--max-attempts", type=int, default=AI_TASK_MAX_ATTEMPTS)
+    parser.add_argument("--retry-base-delay-secs", type=float, default=AI_TASK_RETRY_BASE_DELAY_SECS)
+    parser.add_argument("--retry-max-delay-secs", type=float, default=AI_TASK_RETRY_MAX_DELAY_SECS)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    async def run_worker() -> None:
+        queue = PersistentTaskQueue(
+            concurrency=args.concurrency,
+            max_attempts=args.max_attempts,
+            retry_base_delay_secs=args.retry_base_delay_secs,
+            retry_max_delay_secs=args.retry_max_delay_secs,
+            name=args.queue,
+            lanes=AI_TASK_QUEUE_LANES,
+            default_lane=AI_TASK_QUEUE_DEFAULT_LANE,
+            reserved_workers=AI_TASK_QUEUE_RESERVED_WORKERS,
+        )
+        queue.start_worker()
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await queue.stop_worker(wait=False)
+
+    try:
+        asyncio.run(run_worker())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
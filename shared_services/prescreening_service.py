@@ -0,0 +1,130 @@
+# TAGS: [resume_related]
+# Rule-based pre-screening of resumes by structured HH.ru fields before paid AI scoring
+
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from shared_services.metrics_service import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+PRESCREENING_METRIC_NAME = "ai_prescreening_results_total"
+
+# HH.ru education levels which satisfy "higher education" requirement
+HIGHER_EDUCATION_LEVEL_IDS = ["higher", "bachelor", "master", "candidate", "doctor"]
+NO_RELOCATION_TYPE_ID = "no_relocation"
+
+# Patterns of "must" criterias which can be checked by structured resume fields
+_CITIZENSHIP_RF_PATTERN = re.compile(r"гражданств\w*\s+(?:рф|р\.ф\.|российской\s+федерации|росси\w*)", re.IGNORECASE)
+_HIGHER_EDUCATION_PATTERN = re.compile(r"высше\w*\s+(?:[\w-]+\s+)?образовани", re.IGNORECASE)
+_EXPERIENCE_YEARS_PATTERN = re.compile(r"(?:от|не\s+менее|более|свыше)\s+(\d+(?:[.,]\d+)?)\s*(?:-?х\s*)?(?:лет|года|год)", re.IGNORECASE)
+
+
+@dataclass
+class PrescreeningRules:
+    """Machine-readable must-have requirements. Empty rule is not checked."""
+    min_experience_months: Optional[int] = None
+    citizenship_names: List[str] = field(default_factory=list)
+    education_level_ids: List[str] = field(default_factory=list)
+    area_names: List[str] = field(default_factory=list)
+
+
+    def is_empty(self) -> bool:
+        return not (self.min_experience_months or self.citizenship_names or self.education_level_ids or self.area_names)
+
+
+def build_prescreening_rules(sourcing_criterias: dict) -> PrescreeningRules:
+    """Rules from sourcing criterias.
+    Explicit rules can be set in criterias as:
+        "prescreening": {"min_experience_months": 36, "citizenship_names": ["Россия"],
+                         "education_level_ids": ["higher"], "area_names": ["Москва"]}
+    Otherwise rules are recognized in "must" texts (citizenship of Russia, higher education, experience from N years).
+    Only requirements which can be checked unambiguously are recognized, the rest is left to AI.
+    """
+    explicit_rules = sourcing_criterias.get("prescreening") if isinstance(sourcing_criterias, dict) else None
+    if isinstance(explicit_rules, dict):
+        return PrescreeningRules(
+            min_experience_months=explicit_rules.get("min_experience_months"),
+            citizenship_names=list(explicit_rules.get("citizenship_names") or []),
+            education_level_ids=list(explicit_rules.get("education_level_ids") or []),
+            area_names=list(explicit_rules.get("area_names") or []),
+        )
+
+    rules = PrescreeningRules()
+    requirements = sourcing_criterias.get("requirements", {}) if isinstance(sourcing_criterias, dict) else {}
+    must_list = requirements.get("must", []) if isinstance(requirements, dict) else []
+    for requirement in must_list:
+        if not isinstance(requirement, str):
+            continue
+        if _CITIZENSHIP_RF_PATTERN.search(requirement):
+            rules.citizenship_names = ["Россия"]
+        if _HIGHER_EDUCATION_PATTERN.search(requirement):
+            rules.education_level_ids = list(HIGHER_EDUCATION_LEVEL_IDS)
+        if "опыт" in requirement.lower():
+            experience_match = _EXPERIENCE_YEARS_PATTERN.search(requirement)
+            if experience_match:
+                # Requirement to specific experience (e.g. "юристом от 3 лет") needs at least that total experience
+                months = int(float(experience_match.group(1).replace(",", ".")) * 12)
+                rules.min_experience_months = max(rules.min_experience_months or 0, months)
+    return rules
+
+
+def _area_matches(area_name: str, rule_area_names: List[str]) -> bool:
+    area_name = area_name.lower()
+    return any(rule_area_name.lower() in area_name for rule_area_name in rule_area_names)
+
+
+def prescreen_resume(resume_data: dict, rules: PrescreeningRules) -> Optional[str]:
+    """Check resume against rules.
+    Resume is rejected only if the field is present and clearly fails the rule, missing data is left to AI.
+    Returns:
+        str: Reason of rejection, None if resume passed
+    """
+    if rules.min_experience_months:
+        total_experience = resume_data.get("total_experience") or {}
+        months = total_experience.get("months")
+        if isinstance(months, int) and months < rules.min_experience_months:
+            return f"Общий опыт работы {months} мес. меньше требуемого ({rules.min_experience_months} мес.)"
+
+    if rules.citizenship_names:
+        citizenship_names = [item.get("name") for item in resume_data.get("citizenship") or [] if isinstance(item, dict)]
+        if citizenship_names and not set(citizenship_names) & set(rules.citizenship_names):
+            return f"Гражданство {', '.join(citizenship_names)} не соответствует требуемому ({', '.join(rules.citizenship_names)})"
+
+    if rules.education_level_ids:
+        education_level = (resume_data.get("education") or {}).get("level") or {}
+        if education_level.get("id") and education_level["id"] not in rules.education_level_ids:
+            return f"Уровень образования '{education_level.get('name', education_level['id'])}' не соответствует требуемому"
+
+    if rules.area_names:
+        area_name = (resume_data.get("area") or {}).get("name")
+        if area_name and not _area_matches(area_name, rules.area_names):
+            relocation = resume_data.get("relocation") or {}
+            relocation_type_id = (relocation.get("type") or {}).get("id")
+            relocation_area_names = [item.get("name", "") for item in relocation.get("area") or [] if isinstance(item, dict)]
+            can_relocate = relocation_type_id and relocation_type_id != NO_RELOCATION_TYPE_ID and (
+                not relocation_area_names or any(_area_matches(name, rules.area_names) for name in relocation_area_names)
+            )
+            if not can_relocate:
+                return f"Регион '{area_name}' не соответствует требуемому ({', '.join(rules.area_names)}), переезд невозможен"
+
+    return None
+
+
+def prescreen_resume_with_metrics(resume_data: dict, rules: PrescreeningRules) -> Optional[str]:
+    """'prescreen_resume' counting results: each rejected resume is one AI call saved."""
+    reason = prescreen_resume(resume_data=resume_data, rules=rules)
+    metrics_registry.increment(PRESCREENING_METRIC_NAME, labels={"result": "rejected" if reason else "passed"})
+    return reason
+
+
+def build_prescreening_rejection_analysis(reason: str) -> dict:
+    """Analysis stored for resume rejected by pre-screening, in the same format as AI analysis."""
+    return {
+        "final_score": 0,
+        "recommendation": f"Отклонено предварительным отбором: {reason}",
+        "requirements_compliance": {"attention": [reason]},
+        "prescreening_rejected": True,
+    }
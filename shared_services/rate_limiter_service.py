@@ -0,0 +1,74 @@
+# TAGS: [rate_limit]
+# Shared rate limiter for calls to external APIs (HH.ru etc.)
+
+import asyncio
+import logging
+import time
+
+from shared_services.constants import (
+    HH_API_MAX_REQUESTS_PER_SECOND,
+    HH_API_MAX_CONCURRENT_REQUESTS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncRateLimiter:
+    """Limits calls to an upstream API:
+    - not more than `max_calls_per_second` calls are started per second
+    - not more than `max_concurrency` calls are in flight at the same time
+    Usage:
+        async with hh_rate_limiter:
+            await asyncio.to_thread(requests.get, ...)
+    """
+
+    def __init__(self, max_calls_per_second: float, max_concurrency: int, name: str = "rate_limiter"):
+        if max_calls_per_second <= 0:
+            raise ValueError(f"max_calls_per_second must be positive, got {max_calls_per_second}")
+        if max_concurrency <= 0:
+            raise ValueError(f"max_concurrency must be positive, got {max_concurrency}")
+        self.name = name
+        # Minimal interval between starts of two consecutive calls
+        self._min_interval_secs = 1.0 / max_calls_per_second
+        self._next_call_allowed_at = 0.0
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._lock = asyncio.Lock()
+
+
+    async def acquire(self) -> None:
+        """Wait for a free concurrency slot and for the next allowed start time."""
+        await self._semaphore.acquire()
+        try:
+            async with self._lock:
+                now = time.monotonic()
+                wait_secs = self._next_call_allowed_at - now
+                self._next_call_allowed_at = max(now, self._next_call_allowed_at) + self._min_interval_secs
+            if wait_secs > 0:
+                logger.debug(f"{self.name}: waiting {wait_secs:.3f}s before next call")
+                await asyncio.sleep(wait_secs)
+        except BaseException:
+            # Do not leak the slot if waiting was cancelled
+            self._semaphore.release()
+            raise
+
+
+    def release(self) -> None:
+        """Free concurrency slot taken by 'acquire'."""
+        self._semaphore.release()
+
+
+    async def __aenter__(self) -> "AsyncRateLimiter":
+        await self.acquire()
+        return self
+
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self.release()
+
+
+# Global rate limiter shared by all background calls to HH.ru API
+hh_rate_limiter = AsyncRateLimiter(
+    max_calls_per_second=HH_API_MAX_REQUESTS_PER_SECOND,
+    max_concurrency=HH_API_MAX_CONCURRENT_REQUESTS,
+    name="hh_rate_limiter",
+)
@@ -6,7 +6,7 @@
 import asyncio
 import json
 import logging
-from typing import Callable, Awaitable, Optional, Dict, Any
+from typing import Callable, Awaitable, Optional, Dict, Any, List
 from telegram.ext import Application
 """
 from shared_services.data_service import get_users_records_file_path
@@ -22,6 +22,7 @@ from services.status_validation_service import (
 from shared_services.data_service import (
     is_vacany_data_enough_for_resume_analysis,
 )   
+from shared_services.circuit_breaker_service import CircuitBreaker, ALL_CIRCUIT_BREAKERS
 
 logger = logging.getLogger(__name__)
 
@@ -32,7 +33,8 @@ async def run_periodic_task_for_all_users(
     interval_seconds: int,
     shutdown_flag: Optional[Callable[[], bool]] = None,
     task_name: str = "periodic_task",
-    requires_bot: bool = False
+    requires_bot: bool = False,
+    circuit_breakers: Optional[List[CircuitBreaker]] = None,
 ) -> None:
     """
     Универсальная функция для периодического запуска задачи для всех пользователей.
@@ -46,7 +48,12 @@ async def run_periodic_task_for_all_users(
         shutdown_flag: Опциональная функция для проверки флага завершения () -> bool
         task_name: Имя задачи для логирования
         requires_bot: Если True, получает bot из application и передает в task_function
+        circuit_breakers: Circuit breakers внешних API, которые использует task_function.
+                          Если хотя бы один из них открыт, запуск пропускается.
+                          По умолчанию проверяются все (HH.ru и callback endpoint), [] - не проверять.
     """
+    if circuit_breakers is None:
+        circuit_breakers = ALL_CIRCUIT_BREAKERS
     while True:
         try:
 
@@ -64,6 +71,13 @@ async def run_periodic_task_for_all_users(
                 logger.info(f"{task_name}: Shutdown flag detected, stopping task")
                 break
             
+            # ---- SKIP RUN WHILE UPSTREAM IS DOWN ----
+
+            open_circuit_names = [circuit_breaker.name for circuit_breaker in circuit_breakers if circuit_breaker.is_open()]
+            if open_circuit_names:
+                logger.warning(f"{task_name}: Skipping run, circuit is open for: {', '.join(open_circuit_names)}")
+                continue
+
             logger.info(f"{task_name}: Starting periodic task for all active users...")
             
             # ---- GET ALL USERS FROM RECORDS ----
@@ -0,0 +1,119 @@
+# TAGS: [rate_limit]
+# Coalescing of identical in-flight calls to external APIs (HH.ru etc.)
+
+import copy
+import functools
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from shared_services.constants import HH_SINGLE_FLIGHT_RESULT_TTL_SECS
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _InFlightCall:
+    """Call executed by the first caller, other callers wait for its result."""
+    done: threading.Event = field(default_factory=threading.Event)
+    result: Any = None
+    error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Makes concurrent identical calls share one upstream request.
+    - the first caller executes the call, callers with the same key wait for its result
+    - successful (not None) result is reused for 'ttl_secs' after the call finished
+    - thread-safe, because HH.ru calls are blocking and are executed in threads ('asyncio.to_thread')
+    Each caller gets its own copy of the result, so callers can modify it safely.
+    """
+
+    def __init__(self, name: str = "single_flight"):
+        self.name = name
+        self._lock = threading.Lock()
+        self._in_flight: Dict[Hashable, _InFlightCall] = {}
+        # Recent results: {key: (expires_at (monotonic), result)}
+        self._results: Dict[Hashable, Tuple[float, Any]] = {}
+        self._stats = {"executed": 0, "coalesced": 0, "reused": 0}
+
+
+    def do(self, key: Hashable, func: Callable[[], Any], ttl_secs: float = 0) -> Any:
+        """Execute 'func' once for all concurrent callers with the same 'key'.
+        Args:
+            key: Identity of the call (endpoint, params, token)
+            func: Call without arguments executing the upstream request
+            ttl_secs: How long a successful result is reused after the call finished (0 - not reused)
+        Returns:
+            Result of 'func' (copy)
+        """
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None:
+                if cached[0] > time.monotonic():
+                    self._stats["reused"] += 1
+                    return copy.deepcopy(cached[1])
+                del self._results[key]
+
+            call = self._in_flight.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = _InFlightCall()
+                self._in_flight[key] = call
+                self._stats["executed"] += 1
+            else:
+                self._stats["coalesced"] += 1
+
+        if not is_leader:
+            logger.debug(f"{self.name}: waiting for in-flight call {key[0] if isinstance(key, tuple) else key}")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+                # Failed calls (None result or exception) are not reused, so the next caller retries
+                if ttl_secs > 0 and call.error is None and call.result is not None:
+                    self._results[key] = (time.monotonic() + ttl_secs, call.result)
+            call.done.set()
+        return copy.deepcopy(call.result)
+
+
+    def forget(self, key_prefix: Hashable) -> None:
+        """Drop reused results whose key starts with 'key_prefix' (e.g. function name after a write call)."""
+        with self._lock:
+            for key in [key for key in self._results if isinstance(key, tuple) and key[0] == key_prefix]:
+                del self._results[key]
+
+
+    def stats(self) -> Dict[str, int]:
+        """Counters of executed, coalesced (waited for in-flight call) and reused (recent result) calls."""
+        with self._lock:
+            return dict(self._stats)
+
+
+def single_flight(coalescer: SingleFlight, ttl_secs: float = HH_SINGLE_FLIGHT_RESULT_TTL_SECS):
+    """Decorator: coalesce concurrent calls of the function with the same arguments (including access token).
+    Usage:
+        @single_flight(hh_single_flight)
+        def get_resume_info(access_token: str, resume_id: str): ...
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (func.__name__, args, tuple(sorted(kwargs.items())))
+            return coalescer.do(key=key, func=lambda: func(*args, **kwargs), ttl_secs=ttl_secs)
+        return wrapper
+    return decorator
+
+
+# Global coalescer shared by all GET calls to HH.ru API
+hh_single_flight = SingleFlight(name="hh_single_flight")
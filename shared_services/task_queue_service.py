@@ -1,7 +1,13 @@
 import asyncio
+import heapq
 import logging
-from typing import Callable, Any, Optional
-from dataclasses import dataclass
+import random
+import time
+from collections import deque
+from typing import Callable, Any, Optional, List, Dict, Set, Deque
+from dataclasses import dataclass, replace
+
+from shared_services.metrics_service import metrics_registry
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +26,16 @@ class Task:
     # (keyword arguments) — именованные аргументы: передаются по именам параметров
     kwargs: dict = None
     task_id: Optional[str] = None
+    # Номер попытки выполнения (1 - первая попытка, больше 1 - повтор после ошибки)
+    attempt: int = 1
+    # Полоса приоритета, в которую поставлена задача (см. TaskQueue 'lanes')
+    lane: Optional[str] = None
+    # Время постановки в очередь (time.monotonic), для метрики ожидания
+    enqueued_at: float = 0.0
+    # Ключ упорядочивания (см. TaskQueue 'key_fn'): задачи с одним ключом выполняются по одной в порядке добавления
+    key: Optional[str] = None
+    # Порядковый номер добавления в очередь (0 - еще не добавлена)
+    sequence: int = 0
     
     #Вызывается после инициализации объекта и инициализирует kwargs, если они не были переданы
     def __post_init__(self):
@@ -27,25 +43,130 @@ class Task:
             self.kwargs = {}
 
 
+def pick_weighted_lane(lanes: List[str], ready_lanes: List[str], weights: Dict[str, int], credits: Dict[str, int]) -> Optional[str]:
+    """
+    Выбрать полосу для следующей задачи (smooth weighted round robin, как в nginx):
+    каждая полоса с задачами получает кредит, равный весу, выбирается полоса с наибольшим кредитом,
+    и ее кредит уменьшается на сумму весов. Так задачи полос чередуются пропорционально весам, без пачек.
+    Args:
+        lanes: Полосы, которые обслуживает воркер
+        ready_lanes: Полосы из 'lanes', в которых есть задачи
+        credits: Накопленные кредиты полос (изменяются)
+    Returns:
+        str: Выбранная полоса, None если задач нет
+    """
+    if not ready_lanes:
+        return None
+    for lane in lanes:
+        if lane in ready_lanes:
+            credits[lane] += weights[lane]
+        else:
+            # Пустая полоса не копит кредит, иначе после простоя она забрала бы пачку задач подряд
+            credits[lane] = 0
+    chosen_lane = max(ready_lanes, key=lambda lane: credits[lane])
+    credits[chosen_lane] -= sum(weights[lane] for lane in ready_lanes)
+    return chosen_lane
+
+
+@dataclass
+class DeadLetter:
+    """Задача, которая не выполнилась за все попытки.
+    Хранится вместе с ошибкой, чтобы её можно было посмотреть и повторить вручную (replay_dead_letters)"""
+    task: Task
+    error: str
+    failed_at: float
+
+
 class TaskQueue:
-    """Класс который объединяет очередь задач и воркер для их обработки.
-    Очереди задач с лимитом 200 и приоритизацией FIFO"""
+    """Класс который объединяет очередь задач и воркеры для их обработки.
+    Очереди задач с лимитом 200 и приоритизацией FIFO.
+    Задачи выполняются параллельно 'concurrency' воркерами (по умолчанию 1 - строго по очереди)
+    Очередь может делиться на полосы приоритета ('lanes'), например интерактивные задачи и массовые:
+    у каждой полосы свой FIFO и лимит 'maxsize', воркеры выбирают полосу взвешенным round robin по весам полос,
+    поэтому массовые задачи не могут надолго задержать интерактивные, но и сами не голодают.
+    Для полосы можно выделить отдельных воркеров ('reserved_workers'), которые берут задачи только из нее.
+    Если задан 'key_fn', задачи с одинаковым ключом (например, одно и то же резюме или вакансия) выполняются
+    строго по одной и в порядке добавления, даже в разных полосах, а задачи с разными ключами - параллельно.
+    Задача, ожидающая повтора, сохраняет свое место: следующие задачи с тем же ключом ждут ее.
+    Задача, завершившаяся ошибкой, повторяется до 'max_attempts' раз с экспоненциальной задержкой,
+    после последней попытки попадает в dead letters (в памяти процесса)."""
     
-    def __init__(self, maxsize: int = 200):
+    def __init__(
+        self,
+        maxsize: int = 200,
+        concurrency: int = 1,
+        max_attempts: int = 1,
+        retry_base_delay_secs: float = 1.0,
+        retry_max_delay_secs: float = 60.0,
+        dead_letters_maxsize: int = 1000,
+        name: str = "task_queue",
+        lanes: Optional[Dict[str, int]] = None,
+        default_lane: Optional[str] = None,
+        reserved_workers: Optional[Dict[str, int]] = None,
+        key_fn: Optional[Callable[[Task], Optional[str]]] = None,
+    ):
         """
         Инициализация объекта очереди задач
         Args:
             maxsize: Максимальный размер очереди (по умолчанию 200)
+            concurrency: Количество воркеров, которые выполняют задачи параллельно (по умолчанию 1)
+            max_attempts: Максимальное количество попыток выполнения задачи (по умолчанию 1 - без повторов)
+            retry_base_delay_secs: Задержка перед первым повтором, каждая следующая в 2 раза больше
+            retry_max_delay_secs: Максимальная задержка перед повтором
+            dead_letters_maxsize: Сколько dead letters хранить (самые старые удаляются)
+            name: Имя очереди в логах и метриках
+            lanes: {имя полосы: вес}, по умолчанию одна полоса "default". Из непустых полос полоса с весом 4
+                   получает 4 задачи на каждую задачу полосы с весом 1
+            default_lane: Полоса задач, добавленных без 'lane' (по умолчанию первая полоса)
+            reserved_workers: {имя полосы: количество воркеров}, дополнительные воркеры только для этой полосы
+            key_fn: Функция, которая возвращает ключ упорядочивания задачи (None - задача без ограничений)
         """
-        # Создает асинхронную очередь с максимальным размером maxsize
-        self._queue = asyncio.Queue(maxsize=maxsize)
-        # Флаг состояния воркера, по умолчанию воркер не запущен
+        if concurrency <= 0:
+            raise ValueError(f"concurrency must be positive, got {concurrency}")
+        if max_attempts <= 0:
+            raise ValueError(f"max_attempts must be positive, got {max_attempts}")
+        self._lane_weights = dict(lanes or {"default": 1})
+        if any(weight <= 0 for weight in self._lane_weights.values()):
+            raise ValueError(f"lane weights must be positive, got {self._lane_weights}")
+        self._default_lane = default_lane or next(iter(self._lane_weights))
+        self._reserved_workers = dict(reserved_workers or {})
+        for lane in [self._default_lane, *self._reserved_workers]:
+            if lane not in self._lane_weights:
+                raise ValueError(f"Unknown lane '{lane}', expected one of {list(self._lane_weights)}")
+        # FIFO каждой полосы и лимит размера полосы (0 или меньше - без лимита, как у asyncio.Queue)
+        self._lanes: Dict[str, Deque[Task]] = {lane: deque() for lane in self._lane_weights}
+        self._maxsize = maxsize
+        # Накопленные "кредиты" полос для взвешенного round robin (smooth weighted round robin)
+        self._lane_credits: Dict[str, int] = {lane: 0 for lane in self._lane_weights}
+        # Условие, которое будит воркеров при добавлении задачи и продюсеров при освобождении места
+        self._condition = asyncio.Condition()
+        # Количество задач, которые добавлены, но еще не выполнены (аналог asyncio.Queue.join)
+        self._unfinished_tasks = 0
+        self._all_tasks_done = asyncio.Event()
+        self._all_tasks_done.set()
+        self._key_fn = key_fn
+        self._next_sequence = 1
+        # Ключи задач, которые сейчас выполняются
+        self._running_keys: Set[str] = set()
+        # {ключ: куча номеров задач, ожидающих выполнения (в полосах или повтора)}, выполняться может только наименьший
+        self._waiting_key_sequences: Dict[str, List[int]] = {}
+        self._concurrency = concurrency
+        # Флаг состояния воркеров, по умолчанию воркеры не запущены
         self._worker_running = False
-        # это не задачи из очереди, а сама задача (asyncio.Task), которая представляет запущенный процесс воркера.
-        self._worker_task: Optional[asyncio.Task] = None
+        # это не задачи из очереди, а сами задачи (asyncio.Task), которые представляют запущенные процессы воркеров.
+        self._worker_tasks: List[asyncio.Task] = []
+        self.name = name
+        self._max_attempts = max_attempts
+        self._retry_base_delay_secs = retry_base_delay_secs
+        self._retry_max_delay_secs = retry_max_delay_secs
+        self._dead_letters_maxsize = dead_letters_maxsize
+        # Задачи, ожидающие повтора (asyncio.Task, которые после задержки кладут задачу обратно в очередь)
+        self._scheduled_retries: Set[asyncio.Task] = set()
+        # {ключ задачи: DeadLetter}, ключ - task_id (или имя функции с номером, если task_id не задан)
+        self._dead_letters: Dict[str, DeadLetter] = {}
     
 
-    async def put(self, func: Callable, *args, task_id: Optional[str] = None, **kwargs) -> bool:
+    async def put(self, func: Callable, *args, task_id: Optional[str] = None, lane: Optional[str] = None, **kwargs) -> bool:
         """
         Используется для критичных задач, которые Должны быть добавлены в очередь.
         Добавить задачу в очередь.
@@ -54,23 +175,23 @@ class TaskQueue:
             func: Функция для выполнения (может быть async или sync)
             *args: Позиционные аргументы для функции
             task_id: Опциональный идентификатор задачи
+            lane: Полоса приоритета (по умолчанию 'default_lane')
             **kwargs: Именованные аргументы для функции
         
         Returns:
             bool: Всегда возвращает True (метод блокируется до добавления задачи)
         """
         # Создает объект Task, который представляет задачу для выполнения в очереди
-        task = Task(func=func, args=args, kwargs=kwargs, task_id=task_id)
-        # Ожидание освобождения места, если очередь заполнена, если очередь не заполнена, то задача добавляется в очередь
-        # await self._queue.put() блокируется и ждет, если очередь заполнена, поэтому QueueFull не выбрасывается
-        await self._queue.put(task)
+        task = self._create_task(func, args, kwargs, task_id, lane)
+        # Ожидание освобождения места, если полоса заполнена, если не заполнена, то задача добавляется сразу
+        await self._put_task(task)
         # Логирование добавления задачи в очередь
-        logger.debug(f"Task {task_id or 'without ID'} added to queue. Queue size: {self._queue.qsize()}")
+        logger.debug(f"Task {task_id or 'without ID'} added to lane '{task.lane}'. Queue size: {self.qsize()}")
         # Возвращает True, если задача успешно добавлена
         return True
     
 
-    async def put_nowait(self, func: Callable, *args, task_id: Optional[str] = None, **kwargs) -> bool:
+    async def put_nowait(self, func: Callable, *args, task_id: Optional[str] = None, lane: Optional[str] = None, **kwargs) -> bool:
         """
         Используется для некритичных задач, которые Можно Пропустить, если очередь.
         Добавить задачу в очередь если есть место и не нужно ждать освобождения места (non-blocking)
@@ -79,33 +200,152 @@ class TaskQueue:
             func: Функция для выполнения
             *args: Позиционные аргументы для функции
             task_id: Опциональный идентификатор задачи
+            lane: Полоса приоритета (по умолчанию 'default_lane')
             **kwargs: Именованные аргументы для функции
         Returns:
-            bool: True если задача успешно добавлена, False если очередь переполнена
+            bool: True если задача успешно добавлена, False если полоса переполнена
         """
-        task = Task(func=func, args=args, kwargs=kwargs, task_id=task_id)
-        try:
-            self._queue.put_nowait(task)
-            logger.debug(f"Task {task_id or 'without ID'} added to queue (nowait). Queue size: {self._queue.qsize()}")
+        task = self._create_task(func, args, kwargs, task_id, lane)
+        async with self._condition:
+            if self._is_lane_full(task.lane):
+                logger.warning(f"Lane '{task.lane}' of queue is full. Task {task_id or 'without ID'} not added.")
+                return False
+            self._append_task(task)
+        logger.debug(f"Task {task_id or 'without ID'} added to lane '{task.lane}' (nowait). Queue size: {self.qsize()}")
+        return True
+
+
+    def _create_task(self, func: Callable, args: tuple, kwargs: dict, task_id: Optional[str], lane: Optional[str]) -> Task:
+        task = Task(func=func, args=args, kwargs=kwargs, task_id=task_id, lane=self._resolve_lane(lane))
+        if self._key_fn is not None:
+            task.key = self._key_fn(task)
+        return task
+
+
+    def _resolve_lane(self, lane: Optional[str]) -> str:
+        lane = lane or self._default_lane
+        if lane not in self._lanes:
+            raise ValueError(f"Unknown lane '{lane}', expected one of {list(self._lanes)}")
+        return lane
+
+
+    def _is_lane_full(self, lane: str) -> bool:
+        return 0 < self._maxsize <= len(self._lanes[lane])
+
+
+    def _register_key_sequence(self, task: Task) -> None:
+        """Занять место задачи в порядке ее ключа"""
+        if task.sequence == 0:
+            task.sequence = self._next_sequence
+            self._next_sequence += 1
+        if task.key is not None:
+            heapq.heappush(self._waiting_key_sequences.setdefault(task.key, []), task.sequence)
+
+
+    def _is_task_allowed(self, task: Task) -> bool:
+        """Задачу можно выполнять: у нее нет ключа, или задача с тем же ключом не выполняется и раньше нее никто не ждет"""
+        if task.key is None:
             return True
-        except asyncio.QueueFull:
-            logger.warning(f"Queue is full. Task {task_id or 'without ID'} not added.")
-            return False
-    
+        return task.key not in self._running_keys and self._waiting_key_sequences[task.key][0] == task.sequence
+
+
+    def _append_task(self, task: Task, is_registered: bool = False) -> None:
+        """Добавить задачу в ее полосу и разбудить воркеров (вызывается под self._condition)
+        'is_registered' - место задачи в порядке ключа уже занято (повтор после ошибки)"""
+        if not is_registered:
+            self._register_key_sequence(task)
+        task.enqueued_at = time.monotonic()
+        self._lanes[task.lane].append(task)
+        self._unfinished_tasks += 1
+        self._all_tasks_done.clear()
+        metrics_registry.observe("task_queue_depth", len(self._lanes[task.lane]), labels={"queue": self.name, "lane": task.lane})
+        self._condition.notify_all()
+
+
+    async def _put_task(self, task: Task, is_registered: bool = False) -> None:
+        """Добавить задачу, ожидая освобождения места в полосе"""
+        async with self._condition:
+            await self._condition.wait_for(lambda: not self._is_lane_full(task.lane))
+            self._append_task(task, is_registered=is_registered)
+
+
+    def _first_allowed_task_index(self, lane: str) -> Optional[int]:
+        """Индекс первой задачи полосы, которую можно выполнять (задачи, ждущие свой ключ, пропускаются)"""
+        for index, task in enumerate(self._lanes[lane]):
+            if self._is_task_allowed(task):
+                return index
+        return None
+
+
+    def _pick_lane(self, lanes: List[str]) -> Optional[str]:
+        """Выбрать полосу с задачей, которую можно выполнять, по весам полос"""
+        ready_lanes = [lane for lane in lanes if self._first_allowed_task_index(lane) is not None]
+        return pick_weighted_lane(lanes, ready_lanes, self._lane_weights, self._lane_credits)
+
+
+    def _has_allowed_task(self, lanes: List[str]) -> bool:
+        return any(self._first_allowed_task_index(lane) is not None for lane in lanes)
+
+
+    async def _get_task(self, lanes: List[str], timeout: float) -> Optional[Task]:
+        """Взять следующую задачу из полос 'lanes', None если задач нет в течение 'timeout' секунд"""
+        async with self._condition:
+            try:
+                await asyncio.wait_for(self._condition.wait_for(lambda: self._has_allowed_task(lanes)), timeout=timeout)
+            except asyncio.TimeoutError:
+                return None
+            lane = self._pick_lane(lanes)
+            task_index = self._first_allowed_task_index(lane)
+            task = self._lanes[lane][task_index]
+            del self._lanes[lane][task_index]
+            if task.key is not None:
+                # Задача с наименьшим номером своего ключа уходит из ожидания и занимает ключ до завершения
+                heapq.heappop(self._waiting_key_sequences[task.key])
+                if not self._waiting_key_sequences[task.key]:
+                    del self._waiting_key_sequences[task.key]
+                self._running_keys.add(task.key)
+            # Освободилось место в полосе - будим продюсеров, которые ждут в put
+            self._condition.notify_all()
+        metrics_registry.observe("task_queue_wait_secs", time.monotonic() - task.enqueued_at, labels={"queue": self.name, "lane": lane})
+        return task
+
+
+    async def _release_task_key(self, task: Task) -> None:
+        """Освободить ключ выполненной задачи и разбудить воркеров, ждущих этот ключ"""
+        if task.key is None:
+            return
+        async with self._condition:
+            self._running_keys.discard(task.key)
+            self._condition.notify_all()
+
+
+    def _task_done(self) -> None:
+        self._unfinished_tasks -= 1
+        if self._unfinished_tasks <= 0:
+            self._unfinished_tasks = 0
+            self._all_tasks_done.set()
 
-    def qsize(self) -> int:
-        """Получить текущий размер очереди"""
-        return self._queue.qsize()
+
+    def qsize(self, lane: Optional[str] = None) -> int:
+        """Получить текущий размер очереди (или одной полосы)"""
+        if lane is not None:
+            return len(self._lanes[lane])
+        return sum(len(lane_tasks) for lane_tasks in self._lanes.values())
+
+
+    def lane_sizes(self) -> Dict[str, int]:
+        """Размер каждой полосы: {имя полосы: количество задач}"""
+        return {lane: len(lane_tasks) for lane, lane_tasks in self._lanes.items()}
     
 
-    def is_full(self) -> bool:
-        """Проверить, заполнена ли очередь"""
-        return self._queue.full()
+    def is_full(self, lane: Optional[str] = None) -> bool:
+        """Проверить, заполнена ли полоса (по умолчанию 'default_lane')"""
+        return self._is_lane_full(self._resolve_lane(lane))
     
 
     def is_empty(self) -> bool:
         """Проверить, пуста ли очередь"""
-        return self._queue.empty()
+        return self.qsize() == 0
     
 
     async def _execute_task(self, task: Task) -> Any:
@@ -154,35 +394,116 @@ class TaskQueue:
         # Обработка ошибок
         except Exception as e:
             # Логирование ошибки выполнения задачи
-            logger.error(f"Task{task_id_str} failed with error: {e}", exc_info=True)
+            logger.error(f"Task{task_id_str} failed with error (attempt {task.attempt}/{self._max_attempts}): {e}", exc_info=True)
+            # Планируем повтор или отправляем задачу в dead letters
+            self._handle_failed_task(task, e)
             # Возвращаем None в случае ошибки
             return None
+
+
+    def _retry_delay_secs(self, attempt: int) -> float:
+        """Экспоненциальная задержка перед повтором со случайным разбросом (чтобы повторы не шли пачкой)"""
+        delay_secs = min(self._retry_max_delay_secs, self._retry_base_delay_secs * 2 ** (attempt - 1))
+        return delay_secs * random.uniform(0.5, 1.0)
+
+
+    def _handle_failed_task(self, task: Task, error: Exception) -> None:
+        task_id_str = f" (ID: {task.task_id})" if task.task_id else ""
+        if task.attempt < self._max_attempts:
+            delay_secs = self._retry_delay_secs(task.attempt)
+            logger.warning(f"Task{task_id_str} will be retried in {delay_secs:.1f}s (attempt {task.attempt + 1}/{self._max_attempts})")
+            metrics_registry.increment("task_queue_retries_total", labels={"queue": self.name})
+            retried_task = replace(task, attempt=task.attempt + 1)
+            # Повтор сразу занимает место в порядке ключа, чтобы следующие задачи с тем же ключом не обогнали его
+            self._register_key_sequence(retried_task)
+            retry_task = asyncio.create_task(self._put_after_delay(retried_task, delay_secs))
+            self._scheduled_retries.add(retry_task)
+            retry_task.add_done_callback(self._scheduled_retries.discard)
+            return
+
+        dead_letter_key = task.task_id or f"{getattr(task.func, '__name__', 'task')}_{id(task)}"
+        self._dead_letters[dead_letter_key] = DeadLetter(task=task, error=f"{type(error).__name__}: {error}", failed_at=time.time())
+        # Самые старые dead letters удаляются, чтобы не копить память бесконечно
+        while len(self._dead_letters) > self._dead_letters_maxsize:
+            self._dead_letters.pop(next(iter(self._dead_letters)))
+        metrics_registry.increment("task_queue_dead_letters_total", labels={"queue": self.name})
+        logger.error(f"Task{task_id_str} failed {task.attempt} time(s), moved to dead letters of '{self.name}'")
+
+
+    async def _put_after_delay(self, task: Task, delay_secs: float) -> None:
+        try:
+            await asyncio.sleep(delay_secs)
+        except asyncio.CancelledError:
+            # Повтор отменен (остановка очереди) - освобождаем его место в порядке ключа
+            if task.key is not None and task.sequence in self._waiting_key_sequences.get(task.key, []):
+                self._waiting_key_sequences[task.key].remove(task.sequence)
+                heapq.heapify(self._waiting_key_sequences[task.key])
+                if not self._waiting_key_sequences[task.key]:
+                    del self._waiting_key_sequences[task.key]
+            raise
+        # Повтор добавляется без проверки размера полосы: он уже занял место в порядке ключа, и если ждать места,
+        # задачи с тем же ключом в заполненной полосе ждут повтор, а повтор ждет их (deadlock)
+        async with self._condition:
+            self._append_task(task, is_registered=True)
+
+
+    def get_dead_letters(self) -> Dict[str, DeadLetter]:
+        """Dead letters очереди: {ключ задачи: DeadLetter}"""
+        return dict(self._dead_letters)
+
+
+    async def replay_dead_letters(self, task_keys: Optional[List[str]] = None) -> int:
+        """
+        Вернуть dead letters в очередь (попытки считаются заново).
+        Args:
+            task_keys: Ключи dead letters, по умолчанию все
+        Returns:
+            int: Количество задач, возвращенных в очередь
+        """
+        task_keys = list(self._dead_letters) if task_keys is None else [key for key in task_keys if key in self._dead_letters]
+        for task_key in task_keys:
+            dead_letter = self._dead_letters.pop(task_key)
+            # Повтор вручную встает в конец порядка своего ключа
+            await self._put_task(replace(dead_letter.task, attempt=1, sequence=0))
+        logger.info(f"{len(task_keys)} dead letter(s) of '{self.name}' replayed")
+        return len(task_keys)
+
+
+    def clear_dead_letters(self) -> int:
+        cleared_count = len(self._dead_letters)
+        self._dead_letters.clear()
+        return cleared_count
     
 
-    async def _worker(self):
+    async def _worker(self, worker_number: int = 1, lanes: Optional[List[str]] = None):
         """
         Воркер, который обрабатывает задачи из очереди последовательно.
+        Несколько воркеров берут задачи из одной очереди, поэтому задачи выполняются параллельно.
         При ошибке в задаче не останавливается, продолжает обрабатывать следующие задачи.
+        Args:
+            lanes: Полосы, из которых воркер берет задачи (по умолчанию все)
         """
+        lanes = lanes or list(self._lanes)
         # Логирование начала работы воркера
-        logger.info("Task queue worker started")
+        logger.info(f"Task queue worker {worker_number} started (lanes: {', '.join(lanes)})")
         # Пока воркер запущен, обрабатываем задачи из очереди
         while self._worker_running:
             try:
-                try:
-                    # Получаем задачу из очереди с таймаутом для возможности проверки флага (если очередь пуста, то ждем 1 секунду)
-                    task = await asyncio.wait_for(self._queue.get(), timeout=1.0)
-                except asyncio.TimeoutError:
+                # Получаем задачу с таймаутом для возможности проверки флага (если полосы пусты, то ждем 1 секунду)
+                task = await self._get_task(lanes, timeout=1.0)
+                if task is None:
                     # Таймаут - проверяем, нужно ли продолжать работу
                     continue
                 # Выполняем задачу
-                await self._execute_task(task)
-                # После выполнения задачи, помечаем задачу как выполненную
-                # метод asyncio.Queue, который сообщает очереди, что задача завершена. 
-                self._queue.task_done()
+                try:
+                    await self._execute_task(task)
+                finally:
+                    await self._release_task_key(task)
+                # После выполнения задачи, помечаем задачу как выполненную (аналог asyncio.Queue.task_done)
+                self._task_done()
             except asyncio.CancelledError:
                 # Если воркер был остановлен, то логируем это
-                logger.info("Task queue worker cancelled")
+                logger.info(f"Task queue worker {worker_number} cancelled")
                 break
             except Exception as e:
                 # Логируем ошибку
@@ -190,21 +511,29 @@ class TaskQueue:
                 # Продолжаем работу даже при неожиданной ошибке (чтобы не останавливать воркер)
                 continue
         # Логирование остановки воркера
-        logger.info("Task queue worker stopped")
+        logger.info(f"Task queue worker {worker_number} stopped")
     
 
     def start_worker(self):
         """
-        Запустить воркер для обработки задач
+        Запустить воркеры для обработки задач
         """
         if self._worker_running:
             logger.warning("Worker is already running")
             return
         
         self._worker_running = True
-        # Оборачиваем корутину в объект asyncio.Task и планируем её выполнение в Event Loop. (то есть запускаем воркер)
-        self._worker_task = asyncio.create_task(self._worker())
-        logger.info("Task queue worker started")
+        # Оборачиваем корутины в объекты asyncio.Task и планируем их выполнение в Event Loop. (то есть запускаем воркеры)
+        self._worker_tasks = [
+            asyncio.create_task(self._worker(worker_number))
+            for worker_number in range(1, self._concurrency + 1)
+        ]
+        # Выделенные воркеры полос берут задачи только из своей полосы
+        for lane, workers_count in self._reserved_workers.items():
+            for _ in range(workers_count):
+                worker_number = len(self._worker_tasks) + 1
+                self._worker_tasks.append(asyncio.create_task(self._worker(worker_number, lanes=[lane])))
+        logger.info(f"Task queue workers started: {len(self._worker_tasks)} (reserved: {self._reserved_workers or 'none'})")
     
 
     async def stop_worker(self, wait: bool = True):
@@ -217,25 +546,49 @@ class TaskQueue:
             logger.warning("Worker is not running")
             return
         
-        self._worker_running = False
-        
         if wait:
-            # Ждем завершения всех задач в очереди
-            await self._queue.join()
+            # Ждем завершения всех задач в очереди (воркеры должны работать, пока очередь не опустеет)
+            await self._all_tasks_done.wait()
+
+        self._worker_running = False
+
+        # Повторы, которые еще ждут задержки, не выполняются: не задерживаем остановку на время задержки
+        if self._scheduled_retries:
+            logger.warning(f"{len(self._scheduled_retries)} scheduled retries of '{self.name}' are dropped on stop")
+            for retry_task in list(self._scheduled_retries):
+                retry_task.cancel()
         
-        if self._worker_task:
-            # Останавливаем воркер
-            self._worker_task.cancel()
-            try:
-                await self._worker_task
-            except asyncio.CancelledError:
-                pass
-        logger.info("Task queue worker stopped")
+        # Останавливаем воркеры
+        for worker_task in self._worker_tasks:
+            worker_task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        logger.info("Task queue workers stopped")
     
 
     async def wait_empty(self):
-        """Дождаться, пока очередь не станет пустой"""
-        await self._queue.join()
+        """Дождаться, пока очередь не станет пустой и не останется запланированных повторов"""
+        await self._all_tasks_done.wait()
+        while self._scheduled_retries:
+            await asyncio.gather(*list(self._scheduled_retries), return_exceptions=True)
+            await self._all_tasks_done.wait()
+
+
+def build_task_queue(backend: str = "memory", **kwargs):
+    """
+    Создает очередь задач с выбранным хранилищем.
+    Args:
+        backend: "memory" - TaskQueue (asyncio очередь процесса, задачи теряются при перезапуске),
+                 "postgres" - PersistentTaskQueue (таблица 'tasks', задачи переживают перезапуск и выполняются воркерами всех процессов)
+        **kwargs: Параметры конструктора очереди
+    """
+    if backend == "memory":
+        return TaskQueue(**kwargs)
+    if backend == "postgres":
+        # Импорт здесь, чтобы очередь в памяти не зависела от БД
+        from shared_services.persistent_task_queue_service import PersistentTaskQueue
+        return PersistentTaskQueue(**kwargs)
+    raise ValueError(f"Unknown task queue backend '{backend}', expected 'memory' or 'postgres'")
 
 '''
 # Пример использования
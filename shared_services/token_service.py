@@ -0,0 +1,146 @@
+# TAGS: [user_related]
+# In-memory cache of HH.ru access tokens with proactive refresh
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from database import Managers
+from shared_services.constants import HH_ACCESS_TOKEN_REFRESH_MARGIN_SECS
+from shared_services.db_service import get_column_values_in_db, update_record_in_db
+from shared_services.hh_service import refresh_access_token_from_hh
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedHHToken:
+    """Access token of the manager and data required to refresh it."""
+    access_token: str
+    # Unix timestamp (seconds) when access token expires
+    expires_at: Optional[int]
+    refresh_token: Optional[str]
+
+
+class HHTokenManager:
+    """Keeps access tokens of managers in memory and refreshes them before expiry.
+    - DB is read only once per manager (on the first request after start or after 'invalidate')
+    - token is refreshed via refresh-token flow when it expires in less than 'refresh_margin_secs'
+    - concurrent refreshes of the same manager are serialized, so the refresh token is used only once
+    - DB calls are blocking, so they are executed in a separate thread
+    """
+
+    def __init__(self, refresh_margin_secs: int = HH_ACCESS_TOKEN_REFRESH_MARGIN_SECS):
+        self._refresh_margin_secs = refresh_margin_secs
+        self._tokens: Dict[str, CachedHHToken] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+
+    def _is_expiring(self, token: CachedHHToken) -> bool:
+        if token.expires_at is None:
+            # Without expiry information token is used as is
+            return False
+        return token.expires_at - time.time() < self._refresh_margin_secs
+
+
+    def _get_lock(self, manager_id: str) -> asyncio.Lock:
+        if manager_id not in self._locks:
+            self._locks[manager_id] = asyncio.Lock()
+        return self._locks[manager_id]
+
+
+    async def _load_from_db(self, manager_id: str) -> Optional[CachedHHToken]:
+        manager = await asyncio.to_thread(
+            get_column_values_in_db,
+            db_model=Managers,
+            record_id=manager_id,
+            field_names=["access_token", "access_token_expires_at", "refresh_token"],
+        )
+        if not manager.get("access_token"):
+            logger.warning(f"HHTokenManager: no access token in DB for manager {manager_id}")
+            return None
+        return CachedHHToken(
+            access_token=manager["access_token"],
+            expires_at=manager["access_token_expires_at"],
+            refresh_token=manager["refresh_token"],
+        )
+
+
+    async def _refresh(self, manager_id: str, token: CachedHHToken) -> Optional[CachedHHToken]:
+        """Refresh token via HH.ru and save the new pair to DB.
+        Returns the old token if refresh failed but the old token is still valid, otherwise None."""
+        if not token.refresh_token:
+            logger.warning(f"HHTokenManager: access token of manager {manager_id} is expiring, but there is no refresh token")
+            return token if token.expires_at > time.time() else None
+
+        logger.info(f"HHTokenManager: refreshing access token of manager {manager_id}")
+        # 'requests' is blocking, so the call is executed in a separate thread
+        token_data = await asyncio.to_thread(refresh_access_token_from_hh, refresh_token=token.refresh_token)
+        if not token_data or not token_data.get("access_token"):
+            logger.error(f"HHTokenManager: failed to refresh access token of manager {manager_id}")
+            return token if token.expires_at > time.time() else None
+
+        refreshed_token = CachedHHToken(
+            access_token=token_data["access_token"],
+            expires_at=int(time.time()) + int(token_data.get("expires_in", 0)),
+            refresh_token=token_data.get("refresh_token", token.refresh_token),
+        )
+        await asyncio.to_thread(
+            update_record_in_db,
+            db_model=Managers,
+            record_id=manager_id,
+            updates={
+                "access_token": refreshed_token.access_token,
+                "access_token_expires_at": refreshed_token.expires_at,
+                "refresh_token": refreshed_token.refresh_token,
+            },
+        )
+        logger.info(f"HHTokenManager: access token of manager {manager_id} refreshed, expires at {refreshed_token.expires_at}")
+        return refreshed_token
+
+
+    async def get_access_token(self, manager_id: str) -> Optional[str]:
+        """Get valid access token of the manager.
+        Returns:
+            str: Access token or None if manager has no valid token
+        """
+        manager_id = str(manager_id)
+
+        # Fast path: cached token which is not expiring soon, no DB read and no lock
+        token = self._tokens.get(manager_id)
+        if token is not None and not self._is_expiring(token):
+            return token.access_token
+
+        async with self._get_lock(manager_id):
+            # Token could have been loaded or refreshed while waiting for the lock
+            token = self._tokens.get(manager_id)
+            if token is None:
+                token = await self._load_from_db(manager_id)
+            if token is not None and self._is_expiring(token):
+                token = await self._refresh(manager_id, token)
+
+            if token is None:
+                self._tokens.pop(manager_id, None)
+                return None
+            self._tokens[manager_id] = token
+            return token.access_token
+
+
+    def set_token(self, manager_id: str, access_token: str, expires_at: Optional[int], refresh_token: Optional[str]) -> None:
+        """Put freshly received token to the cache (e.g. right after authorization)."""
+        self._tokens[str(manager_id)] = CachedHHToken(
+            access_token=access_token,
+            expires_at=expires_at,
+            refresh_token=refresh_token,
+        )
+
+
+    def invalidate(self, manager_id: str) -> None:
+        """Drop cached token, so the next request reads it from DB (e.g. after manual update in DB)."""
+        self._tokens.pop(str(manager_id), None)
+
+
+# Global token manager shared by all HH.ru calls of the manager bot
+hh_token_manager = HHTokenManager()
@@ -0,0 +1,51 @@
+"""
+Shared setup of tests: dummy environment variables and SQLite database in place of Postgres.
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add the project root to the path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+# Tests never touch the real database or users data
+_tests_data_dir = tempfile.mkdtemp(prefix="hrvibe_tests_")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tests_data_dir}/tests.db"
+os.environ["USERS_DATA_DIR"] = f"{_tests_data_dir}/users_data"
+for env_var_name in (
+    "OPENAI_API_KEY",
+    "TELEGRAM_MANAGER_BOT_TOKEN",
+    "TELEGRAM_APPLICANT_BOT_TOKEN",
+    "HH_CLIENT_ID",
+    "HH_CLIENT_SECRET",
+    "OAUTH_REDIRECT_URL",
+    "BOT_SHARED_SECRET",
+):
+    os.environ.setdefault(env_var_name, "test")
+os.environ.setdefault("ADMIN_ID", "1")
+
+import pytest
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.compiler import compiles
+
+
+@compiles(JSONB, "sqlite")
+def _compile_jsonb_for_sqlite(type_, compiler, **kw):
+    return "JSON"
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """Empty tables for the test. 'INSERT ... ON CONFLICT' of upserts is built with SQLite dialect."""
+    from database import Base, engine
+    from shared_services import db_service
+
+    monkeypatch.setattr(db_service, "pg_insert", sqlite_insert)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
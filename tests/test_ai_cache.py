@@ -0,0 +1,31 @@
+"""
+Tests of the cache of AI resume analyses.
+"""
+
+from database import AIAnalysisCacheEntries
+from shared_services.ai_cache_service import ResumeAnalysisCache
+from shared_services.db_service import get_record_ids_by_fields
+
+
+SOURCING_CRITERIAS = {"must": ["Python"]}
+PROMPT_TEXT = "Оцени резюме"
+
+
+def test_invalidate_criterias_keeps_analyses_of_other_vacancies(db):
+    cache = ResumeAnalysisCache()
+    for cache_key, vacancy_id in (("key_1", "vacancy_1"), ("key_2", "vacancy_1"), ("key_3", "vacancy_2")):
+        cache.put(
+            cache_key=cache_key,
+            analysis={"final_score": 7},
+            sourcing_criterias=SOURCING_CRITERIAS,
+            prompt_resume_analysis_text=PROMPT_TEXT,
+            model="gpt-test",
+            vacancy_id=vacancy_id,
+        )
+    assert cache.stats()["entries"] == 3
+
+    deleted_count = cache.invalidate_criterias(sourcing_criterias=SOURCING_CRITERIAS, vacancy_id="vacancy_1")
+
+    assert deleted_count == 2
+    assert get_record_ids_by_fields(db_model=AIAnalysisCacheEntries, search_values={}) == ["key_3"]
+    assert cache.stats()["entries"] == 1
@@ -0,0 +1,55 @@
+"""
+Tests of circuit breakers around HTTP calls to HH.ru and the callback endpoint.
+"""
+
+import pytest
+import requests
+
+from shared_services import auth_service, hh_service
+from shared_services.circuit_breaker_service import CircuitBreaker, CIRCUIT_STATE_HALF_OPEN
+
+
+def _build_half_open_circuit_breaker() -> CircuitBreaker:
+    # Zero recovery timeout: the circuit is half-open right after it is opened
+    circuit_breaker = CircuitBreaker(name="test", failure_threshold=1, recovery_timeout_secs=0)
+    circuit_breaker.record_failure()
+    assert circuit_breaker.state == CIRCUIT_STATE_HALF_OPEN
+    return circuit_breaker
+
+
+@pytest.mark.parametrize("error", [
+    requests.exceptions.ChunkedEncodingError("connection broken"),
+    requests.exceptions.TooManyRedirects("too many redirects"),
+    requests.exceptions.InvalidURL("invalid url"),
+])
+def test_hh_request_error_releases_half_open_trial_call(monkeypatch, error):
+    circuit_breaker = _build_half_open_circuit_breaker()
+    monkeypatch.setattr(hh_service, "hh_circuit_breaker", circuit_breaker)
+
+    def failing_request(method, url, **kwargs):
+        raise error
+
+    monkeypatch.setattr(hh_service.requests, "request", failing_request)
+
+    with pytest.raises(type(error)):
+        hh_service._send_hh_request("GET", "https://hh.test/me", endpoint="/me")
+
+    # Failed trial call opens the circuit again instead of keeping it blocked forever
+    assert not circuit_breaker.is_open()
+    circuit_breaker.before_call()
+
+
+def test_callback_endpoint_request_error_releases_half_open_trial_call(monkeypatch):
+    circuit_breaker = _build_half_open_circuit_breaker()
+    monkeypatch.setattr(auth_service, "callback_endpoint_circuit_breaker", circuit_breaker)
+
+    def failing_request(method, url, **kwargs):
+        raise requests.exceptions.ChunkedEncodingError("connection broken")
+
+    monkeypatch.setattr(auth_service.requests, "request", failing_request)
+
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        auth_service._send_callback_endpoint_request("GET", "https://callback.test/")
+
+    assert not circuit_breaker.is_open()
+    circuit_breaker.before_call()
@@ -0,0 +1,62 @@
+"""
+Tests of scoring several resumes per AI request.
+"""
+
+import asyncio
+
+from shared_services import ai_service
+
+
+def test_single_resume_fallback_requests_run_concurrently(db, monkeypatch):
+    resume_ids = ["resume_1", "resume_2", "resume_3"]
+    running_requests = {"current": 0, "max": 0}
+
+    async def fake_create_json_chat_completion_async(user_message, model, timeout_secs, operation, **kwargs):
+        if operation == "multi_resume_analysis":
+            raise ValueError("invalid multi-resume response")
+        running_requests["current"] += 1
+        running_requests["max"] = max(running_requests["max"], running_requests["current"])
+        await asyncio.sleep(0.05)
+        running_requests["current"] -= 1
+        return {"final_score": 7}
+
+    monkeypatch.setattr(ai_service, "_create_json_chat_completion_async", fake_create_json_chat_completion_async)
+
+    analyses = asyncio.run(ai_service.analyze_resumes_with_ai_async(
+        vacancy_description={"name": "Python developer"},
+        sourcing_criterias={"must": ["Python"]},
+        resumes_data={resume_id: {"id": resume_id, "title": resume_id} for resume_id in resume_ids},
+        prompt_resume_analysis_text="Оцени резюме",
+        use_cache=False,
+    ))
+
+    assert list(analyses) == resume_ids
+    assert all(analysis == {"final_score": 7} for analysis in analyses.values())
+    assert running_requests["max"] == len(resume_ids)
+
+
+def test_failed_single_resume_fallback_keeps_other_analyses(db, monkeypatch):
+    resume_ids = ["resume_1", "resume_2", "resume_3"]
+    analysis_inputs = {
+        "vacancy_description": {"name": "Python developer"},
+        "sourcing_criterias": {"must": ["Python"]},
+        "prompt_resume_analysis_text": "Оцени резюме",
+    }
+
+    async def fake_create_json_chat_completion_async(user_message, model, timeout_secs, operation, **kwargs):
+        if operation == "multi_resume_analysis":
+            raise ValueError("invalid multi-resume response")
+        if "resume_2" in user_message:
+            raise TimeoutError("request timed out")
+        return {"final_score": 7}
+
+    monkeypatch.setattr(ai_service, "_create_json_chat_completion_async", fake_create_json_chat_completion_async)
+    resumes_data = {resume_id: {"id": resume_id, "title": resume_id} for resume_id in resume_ids}
+
+    analyses = asyncio.run(ai_service.analyze_resumes_with_ai_async(resumes_data=resumes_data, use_cache=False, **analysis_inputs))
+
+    assert analyses == {"resume_1": {"final_score": 7}, "resume_3": {"final_score": 7}}
+    # Paid analyses are cached, so retry of the task sends only the failed resume
+    for resume_id in ("resume_1", "resume_3"):
+        cache_key = ai_service.build_resume_analysis_cache_key(resume_data=resumes_data[resume_id], model=ai_service.MODEL_NAME, **analysis_inputs)
+        assert ai_service.resume_analysis_cache.get(cache_key) == {"final_score": 7}
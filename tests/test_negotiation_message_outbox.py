@@ -0,0 +1,83 @@
+"""
+Tests of delivery of messages to applicants through the outbox: only transient HH.ru errors are retried.
+"""
+
+import asyncio
+
+import requests
+
+from database import SessionLocal, Managers, NegotiationMessages
+from shared_services import negotiation_message_service
+from shared_services.db_service import get_column_value_in_db
+from shared_services.negotiation_message_service import (
+    MESSAGE_STATUS_FAILED,
+    MESSAGE_STATUS_SENT,
+    NegotiationMessageOutbox,
+    build_negotiation_message_id,
+)
+from shared_services.rate_limiter_service import AsyncRateLimiter
+
+
+MANAGER_ID = "100"
+NEGOTIATION_ID = "negotiation_1"
+TEMPLATE = "video_request"
+
+
+def _http_error(status_code: int) -> requests.exceptions.HTTPError:
+    response = requests.Response()
+    response.status_code = status_code
+    return requests.exceptions.HTTPError(f"{status_code} error", response=response)
+
+
+def _deliver_with_hh_responses(monkeypatch, hh_responses: list) -> tuple:
+    """Enqueue one message and deliver it while HH.ru answers with 'hh_responses' (exception or result) in turn."""
+    with SessionLocal() as db:
+        db.add(Managers(id=MANAGER_ID))
+        db.commit()
+
+    send_calls = []
+
+    def fake_send_negotiation_message(access_token, negotiation_id, user_message):
+        send_calls.append(negotiation_id)
+        hh_response = hh_responses[len(send_calls) - 1]
+        if isinstance(hh_response, Exception):
+            raise hh_response
+        return hh_response
+
+    async def fake_get_access_token(manager_id):
+        return "token"
+
+    monkeypatch.setattr(negotiation_message_service, "send_negotiation_message", fake_send_negotiation_message)
+    monkeypatch.setattr(negotiation_message_service.hh_token_manager, "get_access_token", fake_get_access_token)
+
+    async def deliver():
+        outbox = NegotiationMessageOutbox(
+            rate_limiter=AsyncRateLimiter(max_calls_per_second=1000, max_concurrency=1),
+            max_attempts=3,
+            retry_delay_secs=0,
+        )
+        await outbox.enqueue(negotiation_id=NEGOTIATION_ID, manager_id=MANAGER_ID, template=TEMPLATE, message_text="Hello")
+        return await outbox._deliver(build_negotiation_message_id(negotiation_id=NEGOTIATION_ID, template=TEMPLATE))
+
+    return asyncio.run(deliver()), send_calls
+
+
+def _message_status() -> str:
+    message_id = build_negotiation_message_id(negotiation_id=NEGOTIATION_ID, template=TEMPLATE)
+    return get_column_value_in_db(db_model=NegotiationMessages, record_id=message_id, field_name="status")
+
+
+def test_transient_hh_errors_are_retried(db, monkeypatch):
+    is_sent, send_calls = _deliver_with_hh_responses(monkeypatch, [_http_error(503), requests.exceptions.ConnectionError(), {"status": "success"}])
+
+    assert is_sent is True
+    assert len(send_calls) == 3
+    assert _message_status() == MESSAGE_STATUS_SENT
+
+
+def test_permanent_hh_error_fails_message_without_retry(db, monkeypatch):
+    is_sent, send_calls = _deliver_with_hh_responses(monkeypatch, [_http_error(403), {"status": "success"}])
+
+    assert is_sent is False
+    assert len(send_calls) == 1
+    assert _message_status() == MESSAGE_STATUS_FAILED
@@ -0,0 +1,134 @@
+"""
+Tests of OpenAI Batch API ingestion of resume analyses: results file -> DB records and sorted resume files.
+"""
+
+import asyncio
+import json
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from database import SessionLocal, Managers, Vacancies, Negotiations, NegotiationMessages
+from shared_services import ai_service
+from shared_services.constants import NEGOTIATION_MESSAGE_TEMPLATE_VIDEO_REQUEST
+from shared_services.data_service import get_vacancy_resumes_directory
+from shared_services.db_service import get_column_value_in_db, get_record_ids_by_fields
+
+
+MANAGER_ID = "100"
+VACANCY_ID = "200"
+
+
+def _build_output_line(custom_id: str, analysis: dict) -> str:
+    return json.dumps({
+        "custom_id": custom_id,
+        "response": {
+            "status_code": 200,
+            "body": {
+                "model": "gpt-test",
+                "choices": [{"message": {"content": json.dumps(analysis)}}],
+                "usage": {"prompt_tokens": 100, "completion_tokens": 20},
+            },
+        },
+        "error": None,
+    })
+
+
+def _write_batch_output_file(file_path: Path) -> Path:
+    lines = [
+        _build_output_line("resume_passed", {"final_score": 8}),
+        _build_output_line("resume_failed", {"final_score": 2}),
+        json.dumps({"custom_id": "resume_error", "response": {"status_code": 500, "body": {"error": "server error"}}}),
+        # truncated line must not throw away results of the whole batch
+        '{"custom_id": "resume_truncated", "response": {"status_code": 200, "bo',
+        _build_output_line("resume_sorted_before", {"final_score": 9}),
+    ]
+    file_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return file_path
+
+
+@pytest.fixture
+def fake_batch(tmp_path, monkeypatch):
+    """Completed batch whose output file is served by fake Batch API client."""
+    output_file_path = _write_batch_output_file(tmp_path / "batch_output.jsonl")
+
+    async def fake_files_content(file_id):
+        assert file_id == "file_output"
+        return SimpleNamespace(text=output_file_path.read_text(encoding="utf-8"))
+
+    monkeypatch.setattr(ai_service, "batch_client", SimpleNamespace(files=SimpleNamespace(content=fake_files_content)))
+    return SimpleNamespace(
+        id="batch_test",
+        status="completed",
+        output_file_id="file_output",
+        error_file_id=None,
+        metadata={"manager_id": MANAGER_ID, "vacancy_id": VACANCY_ID},
+    )
+
+
+def _create_vacancy_with_negotiations(resume_sorting_statuses: dict) -> None:
+    with SessionLocal() as db:
+        db.add(Managers(id=MANAGER_ID))
+        db.add(Vacancies(
+            id=VACANCY_ID,
+            manager_id=MANAGER_ID,
+            description_json={"name": "Python developer"},
+            sourcing_criterias_json={"must": ["python"]},
+        ))
+        for resume_id, resume_sorting_status in resume_sorting_statuses.items():
+            db.add(Negotiations(id=f"negotiation_{resume_id}", vacancy_id=VACANCY_ID, resume_id=resume_id, resume_sorting_status=resume_sorting_status))
+        db.commit()
+
+
+def test_download_batch_results_keeps_batch_on_malformed_line(db, fake_batch):
+    results = asyncio.run(ai_service.download_batch_results(batch=fake_batch))
+
+    assert results["resume_passed"] == {"final_score": 8}
+    assert results["resume_failed"] == {"final_score": 2}
+    assert "error" in results["resume_error"]
+    assert "error" in results["resume_truncated"]
+
+
+def test_ingest_resume_analysis_batch_sorts_resumes_from_batch_output(db, fake_batch, monkeypatch):
+    from manager_bot import manager_bot
+
+    _create_vacancy_with_negotiations({
+        "resume_passed": "new",
+        "resume_failed": "new",
+        "resume_error": "new",
+        "resume_truncated": "new",
+        "resume_sorted_before": "passed",
+    })
+    resume_data_dir = get_vacancy_resumes_directory(vacancy_id=VACANCY_ID)
+    for resume_id in ("resume_passed", "resume_failed", "resume_error", "resume_truncated"):
+        (resume_data_dir / "new" / f"resume_{resume_id}.json").write_text(json.dumps({"id": resume_id, "title": "Developer"}), encoding="utf-8")
+
+    async def fake_wait_for_batch_completion(batch_id):
+        assert batch_id == fake_batch.id
+        return fake_batch
+
+    employer_state_changes = []
+
+    async def fake_change_employer_state_command(bot_user_id, resume_id):
+        employer_state_changes.append(resume_id)
+
+    monkeypatch.setattr(manager_bot, "wait_for_batch_completion", fake_wait_for_batch_completion)
+    monkeypatch.setattr(manager_bot, "change_employer_state_command", fake_change_employer_state_command)
+    monkeypatch.setattr(manager_bot, "PROMPT_DIR", str(Path(manager_bot.__file__).parent / "docs" / "ai_prompts"))
+
+    asyncio.run(manager_bot.ingest_resume_analysis_batch(bot_user_id=MANAGER_ID, batch_id=fake_batch.id))
+
+    assert sorted(employer_state_changes) == ["resume_failed", "resume_passed"]
+    assert (resume_data_dir / "passed" / "resume_resume_passed.json").exists()
+    assert (resume_data_dir / "failed" / "resume_resume_failed.json").exists()
+    assert get_column_value_in_db(db_model=Negotiations, record_id="negotiation_resume_passed", field_name="resume_sorting_status") == "passed"
+    assert get_column_value_in_db(db_model=Negotiations, record_id="negotiation_resume_passed", field_name="resume_ai_analysis") == {"final_score": 8}
+    assert get_column_value_in_db(db_model=Negotiations, record_id="negotiation_resume_failed", field_name="resume_sorting_status") == "failed"
+    # failed requests stay "new" for the next analysis run
+    for resume_id in ("resume_error", "resume_truncated"):
+        assert (resume_data_dir / "new" / f"resume_{resume_id}.json").exists()
+        assert get_column_value_in_db(db_model=Negotiations, record_id=f"negotiation_{resume_id}", field_name="resume_sorting_status") == "new"
+    assert get_column_value_in_db(db_model=Negotiations, record_id="negotiation_resume_sorted_before", field_name="resume_ai_analysis") is None
+    # video request invitation is not queued for applicant of failed resume
+    assert f"negotiation_resume_failed:{NEGOTIATION_MESSAGE_TEMPLATE_VIDEO_REQUEST}" not in get_record_ids_by_fields(db_model=NegotiationMessages, search_values={"manager_id": MANAGER_ID})
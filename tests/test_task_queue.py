@@ -0,0 +1,78 @@
+"""
+Tests of the in-memory task queue.
+"""
+
+import asyncio
+
+from shared_services.task_queue_service import TaskQueue
+
+
+def test_retry_is_enqueued_into_full_lane_without_deadlock():
+    async def run() -> list:
+        queue = TaskQueue(
+            maxsize=1,
+            concurrency=1,
+            max_attempts=2,
+            retry_base_delay_secs=0.05,
+            retry_max_delay_secs=0.05,
+            key_fn=lambda task: "same_key",
+        )
+        executed = []
+
+        async def fail_first_attempt():
+            executed.append("first")
+            if executed.count("first") == 1:
+                raise RuntimeError("temporary failure")
+
+        async def second():
+            executed.append("second")
+
+        queue.start_worker()
+        await queue.put(fail_first_attempt, task_id="first")
+        # Wait until the first task has failed and its retry is scheduled
+        while not queue._scheduled_retries:
+            await asyncio.sleep(0.01)
+        # The lane is full now; the task waits for the retry of the same key
+        await queue.put(second, task_id="second")
+        assert queue.is_full()
+
+        await asyncio.wait_for(queue.wait_empty(), timeout=5)
+        await queue.stop_worker(wait=True)
+        return executed
+
+    assert asyncio.run(run()) == ["first", "first", "second"]
+
+
+def test_ai_tasks_of_the_same_vacancy_run_in_order(monkeypatch):
+    from manager_bot import manager_bot
+
+    events = []
+
+    async def fake_resume_analysis(bot_user_id, target_vacancy_id, *args):
+        events.append(f"resume_{target_vacancy_id}_started")
+        await asyncio.sleep(0.05)
+        events.append(f"resume_{target_vacancy_id}_finished")
+
+    async def fake_resumes_group_analysis(bot_user_id, target_vacancy_id, *args):
+        events.append(f"group_{target_vacancy_id}_started")
+        await asyncio.sleep(0.05)
+        events.append(f"group_{target_vacancy_id}_finished")
+
+    monkeypatch.setattr(manager_bot, "resume_analysis_from_ai_to_user_sort_resume", fake_resume_analysis)
+    monkeypatch.setattr(manager_bot, "resumes_group_analysis_from_ai_to_user_sort_resumes", fake_resumes_group_analysis)
+
+    async def run() -> None:
+        queue = TaskQueue(maxsize=10, concurrency=3, key_fn=manager_bot.get_ai_task_ordering_key)
+        queue.start_worker()
+        # Different task IDs, but both tasks write records of vacancy 200
+        await queue.put(manager_bot.resume_analysis_from_ai_to_user_sort_resume, "100", "200", task_id="resume_analysis_100_200_1")
+        await queue.put(manager_bot.resumes_group_analysis_from_ai_to_user_sort_resumes, "100", "200", task_id="resumes_group_analysis_100_200_1")
+        await queue.put(manager_bot.resume_analysis_from_ai_to_user_sort_resume, "100", "300", task_id="resume_analysis_100_300_2")
+        await asyncio.wait_for(queue.wait_empty(), timeout=5)
+        await queue.stop_worker(wait=True)
+
+    asyncio.run(run())
+
+    assert events.index("resume_200_finished") < events.index("group_200_started")
+    # Task of another vacancy is not blocked
+    assert events.index("resume_300_started") < events.index("resume_200_finished")
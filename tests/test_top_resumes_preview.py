@@ -0,0 +1,47 @@
+"""
+Tests of the preview of resumes most similar to the vacancy (/admin_top_resumes).
+"""
+
+import asyncio
+import json
+from pathlib import Path
+
+from database import SessionLocal, Managers, Vacancies, Negotiations
+from shared_services.data_service import get_vacancy_resumes_directory
+
+
+MANAGER_ID = "100"
+VACANCY_ID = "200"
+
+
+def test_build_top_resumes_preview_text_ranks_resumes_of_vacancy_from_db(db, monkeypatch):
+    from manager_bot import manager_bot
+
+    monkeypatch.setattr(manager_bot, "PROMPT_DIR", str(Path(manager_bot.__file__).parent / "docs" / "ai_prompts"))
+    resumes = {
+        "python_resume": ("new", "Python developer Django PostgreSQL"),
+        "scored_resume": ("passed", "Python backend developer"),
+        "cook_resume": ("new", "Cook pastry chef"),
+        "failed_resume": ("failed", "Python developer"),
+    }
+    with SessionLocal() as db:
+        db.add(Managers(id=MANAGER_ID))
+        db.add(Vacancies(
+            id=VACANCY_ID,
+            manager_id=MANAGER_ID,
+            description_json={"name": "Python developer", "description": "Django PostgreSQL backend"},
+            sourcing_criterias_json={"must": ["Python"]},
+        ))
+        for resume_id, (resume_sorting_status, _) in resumes.items():
+            db.add(Negotiations(id=f"negotiation_{resume_id}", vacancy_id=VACANCY_ID, resume_id=resume_id, resume_sorting_status=resume_sorting_status))
+        db.commit()
+    resume_data_dir = get_vacancy_resumes_directory(vacancy_id=VACANCY_ID)
+    for resume_id, (resume_sorting_status, title) in resumes.items():
+        (resume_data_dir / resume_sorting_status / f"resume_{resume_id}.json").write_text(json.dumps({"id": resume_id, "title": title}), encoding="utf-8")
+
+    preview_text = asyncio.run(manager_bot.build_top_resumes_preview_text(bot_user_id=MANAGER_ID, top_n=2))
+
+    lines = preview_text.splitlines()
+    assert lines[0].startswith("Топ-2 из 3 резюме")
+    assert "Cook pastry chef" not in preview_text
+    assert "ждет оценки AI" in preview_text and "оценено AI" in preview_text